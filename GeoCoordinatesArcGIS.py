@@ -20,31 +20,105 @@ Khushbu Patel (GitHub Username: khushbuupatel)
 Sponsor: DataDisca Pty Ltd. Australia
 https://github.com/DataDisca
 """
-import logging
+import re
+import threading
+import time
 import requests
 from arcgis.gis import GIS
-from arcgis.geocoding import geocode, batch_geocode
+from arcgis.geocoding import geocode, batch_geocode, get_geocoders
+from GeoCoordinatesBase import GeoCoordinatesBase, geocode_lookup, select_fields, DETAIL_SCORED, DETAIL_RAW
+from GeoCoordinatesBulk import imap_ordered
+from GeoCoordinatesCircuitBreaker import CircuitOpenError
+from GeoCoordinatesColumns import GeoCoordinatesColumns
+from GeoCoordinatesRetry import GeoCoordinatesRetryPolicy
+from GeoCoordinatesLogging import get_logger
+from GeoCoordinatesJSON import lean_pattern, lean_object
 
+logger = get_logger(__name__)
 
-class GeoCoordinatesArcGIS:
+_LOCATION = lean_pattern('location')
 
-    # Set Log Level
-    logging.basicConfig(filename='./log/arcgis_log.txt', level=logging.INFO)
+# The ArcGIS Library Raises a Plain Exception Ending In "(Error Code: <HTTP or Token Status>)"
+_ERROR_CODE = re.compile(r'Error Code: (\d+)')
+# Invalid or Expired Token, Token Required
+_TOKEN_ERROR_CODES = frozenset((498, 499))
+_CONNECTION_ERRORS = (ConnectionError, TimeoutError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+def _error_code(error: Exception) -> int:
+    match = _ERROR_CODE.search('{}'.format(error))
+    return int(match.group(1)) if match else None
+
+
+class GeoCoordinatesArcGIS(GeoCoordinatesBase):
 
     # Class Variables
+    provider_name = 'arcgis'
     connection_params: dict = {}
+    geocode_url = 'https://geocode.arcgis.com/arcgis/rest/services/World/GeocodeServer/findAddressCandidates'
     username_password_flag = False
+    # Batch Size Used When The Service Does Not Suggest One
+    default_batch_size = 150
+    # Fields Under 'attributes.' Are Requested As outFields
+    default_fields = ('address', 'attributes.Addr_type')
 
-    def __init__(self, username: str = None, password: str = None, output_format: str = 'json') -> None:
+    def __init__(self, username: str = None, password: str = None, output_format: str = 'json',
+                 gis_session_ttl: float = 55 * 60, **kwargs) -> None:
         """
         Class Initializer
         @param username: Username For The ArcGIS Developer Account
         @param password: Password For The Above User Account
         @param output_format: Required Output Format
+        @param gis_session_ttl: Seconds a Login Is Reused Before Logging In Again (ArcGIS Tokens Last 60 Minutes)
+        @param kwargs: Transport Options Passed To GeoCoordinatesBase (session, pool_maxsize, cache, ...)
         """
+        super().__init__(**kwargs)
         if username and password:
             self.username_password_flag = True
         self.connection_params = {'username': username, 'password': password, 'output_format': output_format}
+        self.gis_session_ttl = gis_session_ttl
+        self._gis = None
+        self._geocoder = None
+        self._gis_created = 0.0
+        self._gis_lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """
+        purpose: Pickle The Settings For a Worker Process, Which Logs In On Its Own
+        """
+        state = super().__getstate__()
+        for name in ('_gis', '_geocoder', '_gis_created', '_gis_lock'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        super().__setstate__(state)
+        self._gis = None
+        self._geocoder = None
+        self._gis_created = 0.0
+        self._gis_lock = threading.Lock()
+
+    def _get_geocoder(self):
+        """
+        purpose: Return The Geocoder Of The Logged In GIS, Logging In Only On First Use or When The Token Is Due
+        The Lock Makes Concurrent Callers Wait For a Single Login Instead Of Each Logging In.
+        @return: arcgis.geocoding.Geocoder
+        """
+        with self._gis_lock:
+            if self._gis is None or time.monotonic() - self._gis_created > self.gis_session_ttl:
+                self._gis = GIS("http://www.arcgis.com", self.connection_params['username'],
+                                self.connection_params['password'])
+                self._geocoder = get_geocoders(self._gis)[0]
+                self._gis_created = time.monotonic()
+            return self._geocoder
+
+    def _reset_gis(self) -> None:
+        """
+        purpose: Drop The Cached Login So The Next Call Logs In Again (e.g. After an Invalid Token Error)
+        """
+        with self._gis_lock:
+            self._gis = None
+            self._geocoder = None
 
     @staticmethod
     def __get_error_msg(error_msg: str):
@@ -64,6 +138,13 @@ class GeoCoordinatesArcGIS:
             'result': None
         }
 
+    def geocode(self, location_address: str, coalesce: bool = True) -> dict:
+        """
+        purpose: Default Single Address Lookup Used By The Bulk Methods (get_geo_coordinates_from_arcgis)
+        """
+        return self.get_geo_coordinates_from_arcgis(location_address, coalesce)
+
+    @geocode_lookup
     def get_geo_coordinates_from_arcgis(self, location_address: str):
         """
         purpose: Retrieve Latitude and Longitude to a Given Address/Location
@@ -77,41 +158,74 @@ class GeoCoordinatesArcGIS:
                 'longitude': Longitude of the Address Provided
               }
         """
-        base_url = 'https://geocode.arcgis.com/arcgis/rest/services/World/GeocodeServer/findAddressCandidates'
-        endpoint = '{}?f={}&singleLine={}'.format(base_url, self.connection_params['output_format'], location_address)
+        endpoint = self._geocode_endpoint(location_address)
 
         try:
             # make the GET request
-            response = requests.get(endpoint)
-
-            # check if codes were successfully obtained or not
-            if response.status_code == 200:
-                location = response.json()['candidates'][0]['location']
-                return {
-                    'status': True,
-                    'message': None,
-                    'result': {
-                        'longitude': location['x'],
-                        'latitude': location['y']
-                    }
-                }
-            elif response.status_code == 400:
-                return self.__get_error_msg('Request Failed Validation. Please Check your API key')
-            elif response.status_code == 503:
-                return self.__get_error_msg('Temporary Server Error. Please Check back again in a short while')
-            else:
-                return self.__get_error_msg('Some Unknown Error Occurred While Sending Request To Server')
+            response = self._get(endpoint)
+            return self._parse(self._parse_geocode, response.status_code, response.content)
 
         except ConnectionError:
             return self.__get_error_msg('Connection Error')
         except TypeError:
             return self.__get_error_msg('Type Error')
         except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
             return self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
 
+    def _geocode_endpoint(self, location_address: str) -> str:
+        """
+        purpose: Build The findAddressCandidates Request URL For an Address/Location
+        """
+        endpoint = '{}?f={}&singleLine={}'.format(self.geocode_url, self.connection_params['output_format'],
+                                                  location_address)
+        # Only The Best Candidate Is Used Unless The Raw Response Is Kept
+        if self._detail() != DETAIL_RAW:
+            endpoint += '&maxLocations=1&outFields={}'.format(self._out_fields())
+        return endpoint
+
+    def _out_fields(self) -> str:
+        """
+        purpose: Return The Attribute Names To Request From The Service For The Instance's Detail Level
+        """
+        if self._detail() != DETAIL_SCORED:
+            return 'Score'
+        fields = self.fields or self.default_fields
+        return ','.join(field.split('.', 1)[1] for field in fields if field.startswith('attributes.')) or 'Score'
+
+    def _parse_geocode(self, status_code: int, content: bytes) -> dict:
+        """
+        purpose: Turn a findAddressCandidates Response Into The Result Dict (Shared By The Sync and Async Clients)
+        @param status_code: HTTP Status Code
+        @param content: Raw Response Body
+        @return: Dict (Same Format As get_geo_coordinates_from_arcgis)
+        """
+        # check if codes were successfully obtained or not
+        if status_code == 200:
+            if self._lean():
+                # candidates[0].location Is The First "location" Object Of The Body
+                location = lean_object(content, _LOCATION, self.decode)
+                if location is not None:
+                    return self._build_result(location['x'], location['y'])
+
+            results = self.decode(content)
+            candidate = results['candidates'][0]
+            location = candidate['location']
+            return self._build_result(location['x'], location['y'], candidate, candidate.get('score'), results)
+        elif status_code == 400:
+            return self.__get_error_msg('Request Failed Validation. Please Check your API key')
+        elif status_code == 429:
+            return self.__get_error_msg('Too Many Requests. Please Reduce The Request Rate')
+        elif status_code == 503:
+            return self.__get_error_msg('Temporary Server Error. Please Check back again in a short while')
+        else:
+            return self.__get_error_msg('Some Unknown Error Occurred While Sending Request To Server')
+
     def get_geo_coordinates_from_arcgis_with_login(self, location_address: str):
         """
         purpose: Retrieve Latitude and Longitude to a Given Address/Location With Credentials
+        The Request Waits On The Instance's rate_limiter (If Any), Like The Other Methods, and Transient Errors Are
+        Retried With Its retry_policy (If Any), Like The Batch Method's Chunks.
         @param location_address: Latitude and Longitude needed Address/Location
         @return: Dict
             status: True or False based on success,
@@ -120,7 +234,8 @@ class GeoCoordinatesArcGIS:
               {
                 'latitude': Latitude of the Address Provided
                 'longitude': Longitude of the Address Provided
-                'all_results': Whole Response Object Received From Arc GIS
+                'all_results': Whole Response Object Received From Arc GIS (Only With detail 'raw', The Default)
+                'score', 'fields': Match Score and Selected Fields (Only With detail 'scored')
               }
         """
 
@@ -128,42 +243,165 @@ class GeoCoordinatesArcGIS:
         # if self.username_password_flag:
         #     return self.__get_error_msg('Username or Password is not Set')
 
+        options = {}
+        if self._detail(DETAIL_RAW) != DETAIL_RAW:
+            # Lean Detail: Ask For The Best Candidate Only, So The Other Candidates Are Never Built
+            options = {'max_locations': 1, 'out_fields': self._out_fields()}
+
         try:
-            # Establish Connection To ArcGIS Server Via GIS Library
-            GIS("http://www.arcgis.com", self.connection_params['username'], self.connection_params['password'])
-            arc_gis_loc = geocode(location_address)
+            # Reuse The Connection To ArcGIS Server Via GIS Library
+            arc_gis_loc = self._guarded('arcgis:geocode', lambda: self._arcgis_call(
+                lambda geocoder: geocode(location_address, geocoder=geocoder, **options), self.retry_policy),
+                rate_limited=False)
             if len(arc_gis_loc) > 0:
-                return {
-                    'status': True,
-                    'message': None,
-                    'result': {
-                        'longitude': arc_gis_loc[0]['location']['x'],
-                        'latitude': arc_gis_loc[0]['location']['y'],
-                        'all_results': arc_gis_loc
-                    }
-                }
+                candidate = arc_gis_loc[0]
+                return self._build_result(candidate['location']['x'], candidate['location']['y'], candidate,
+                                          candidate.get('score'), arc_gis_loc, DETAIL_RAW)
             else:
                 return self.__get_error_msg('Unknown Location. No Results Found')
+        except CircuitOpenError as e:
+            # The Service Is Down, Not The Login: Keep It
+            return self.__get_error_msg('{}'.format(e))
         except ConnectionError:
             return self.__get_error_msg('Connection Error')
         except TypeError:
             return self.__get_error_msg('Type Error')
         except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
+            self._reset_gis()
             return self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
 
-    def get_batch_geo_coordinates_from_arcgis_with_login(self, location_addresses: list):
+    def _arcgis_call(self, function, policy):
+        """
+        purpose: Call an ArcGIS Library Function With The Geocoder, Retrying It With The Retry Policy (If Any)
+        Only Transient Errors (Connection Errors, Timeouts and The Policy's retry_statuses, e.g. 429 and 5xx) and
+        Token Errors Are Retried; a Token Error Drops The Cached Login First, So The Next Attempt Logs In Again.
+        Any Other Error (e.g. Bad Credentials or a Rejected Request) Is Raised At Once.
+        With a Rate Limiter, Every Attempt Takes One Token.
+        @param function: Function Taking The Geocoder (e.g. lambda geocoder: geocode(address, geocoder=geocoder))
+        @param policy: GeoCoordinatesRetryPolicy or None For a Single Attempt
+        @return: The Result Of function (The Last Error Is Raised If Every Attempt Failed)
+        """
+        def attempt():
+            self._acquire_rate_limit()
+            try:
+                return function(self._get_geocoder()), None
+            except Exception as e:
+                if _error_code(e) in _TOKEN_ERROR_CODES:
+                    self._reset_gis()
+                return None, e
+
+        def is_retryable(outcome) -> tuple:
+            error = outcome[1]
+            if error is None:
+                return False, None
+            if isinstance(error, _CONNECTION_ERRORS):
+                return policy.retry_on_connection_error, None
+            code = _error_code(error)
+            return code in _TOKEN_ERROR_CODES or code in policy.retry_statuses, None
+
+        results, error = attempt() if policy is None else policy.call(attempt, is_retryable)
+        if error is not None:
+            raise error
+        return results
+
+    def _get_batch_size(self, geocoder) -> int:
+        """
+        purpose: Return The Batch Size Suggested By The Geocode Service (Capped By Its Maximum Batch Size)
+        """
+        try:
+            locator_properties = geocoder.properties.locatorProperties
+            suggested = locator_properties.get('SuggestedBatchSize') or self.default_batch_size
+            maximum = locator_properties.get('MaxBatchSize') or suggested
+            return min(suggested, maximum)
+        except (AttributeError, KeyError):
+            return self.default_batch_size
+
+    def _batch_geocode_chunk(self, chunk: list, policy) -> tuple:
+        """
+        purpose: Geocode One Chunk, Retrying It On Its Own If It Fails
+        With a Circuit Breaker, a Chunk Whose Attempts All Failed Counts As One Failure Of batch_geocode.
+        Only Transient and Token Errors Are Retried (See _arcgis_call). With a Rate Limiter, Every Attempt Takes
+        One Token (One batch_geocode Request Per Chunk).
+        @return: (Results, None) On Success or (None, Error Message) Once The Attempts Run Out
+        """
+        try:
+            return self._guarded('arcgis:batch_geocode', lambda: self._arcgis_call(
+                lambda geocoder: batch_geocode(chunk, geocoder=geocoder), policy), rate_limited=False), None
+        except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
+            return None, '{}'.format(e)
+
+    def _batch_chunks(self, location_addresses: list, batch_size: int, workers: int, chunk_attempts: int):
+        """
+        purpose: Split The Addresses Into Chunks and Geocode Them Concurrently
+        @return: (List of Chunks, Generator Yielding (Results, Error Message) Per Chunk In Order)
+        """
+        if batch_size is None:
+            batch_size = self._get_batch_size(self._get_geocoder())
+        policy = self.retry_policy or GeoCoordinatesRetryPolicy(max_attempts=chunk_attempts)
+        chunks = [location_addresses[i:i + batch_size] for i in range(0, len(location_addresses), batch_size)]
+        return chunks, imap_ordered(lambda chunk_: self._batch_geocode_chunk(chunk_, policy), chunks, workers)
+
+    def _batch_row(self, loc: dict, detail: str) -> dict:
+        """
+        purpose: Return The lat_lng_list Entry Of One batch_geocode Result
+        """
+        row = {'longitude': loc['location']['x'], 'latitude': loc['location']['y']}
+        if detail == DETAIL_SCORED:
+            row['score'] = loc.get('score')
+            row['fields'] = select_fields(loc, self.fields or self.default_fields)
+        return row
+
+    def get_batch_geo_columns_from_arcgis_with_login(self, location_addresses: list, batch_size: int = None,
+                                                     workers: int = 1, chunk_attempts: int = 3,
+                                                     keep_raw: bool = False) -> GeoCoordinatesColumns:
+        """
+        purpose: Columnar Version of get_batch_geo_coordinates_from_arcgis_with_login For Very Large Inputs
+        The Coordinates Of Each Chunk Go Straight Into The Columns, No Dict Is Kept Per Row.
+        @param location_addresses: Latitude and Longitude needed Addresses/Locations
+        @param batch_size: Addresses Per batch_geocode Call (Default: The Service's Suggested Batch Size)
+        @param workers: Number of Chunks Geocoded Concurrently
+        @param chunk_attempts: Attempts Per Chunk (Ignored If The Instance Has a retry_policy)
+        @param keep_raw: Keep The Whole Response Object Received From Arc GIS For Every Row
+        @return: GeoCoordinatesColumns With One Row Per Address (Rows Of Failed Chunks Have status 0 and a Message)
+        """
+        columns = GeoCoordinatesColumns(keep_raw)
+        try:
+            chunks, chunk_results = self._batch_chunks(location_addresses, batch_size, workers, chunk_attempts)
+            for chunk, (results, error) in zip(chunks, chunk_results):
+                if error is not None:
+                    columns.append_error('Unknown Error Occurred, Error: {}'.format(error), len(chunk))
+                    continue
+                for loc in results:
+                    columns.append_values(loc['location']['y'], loc['location']['x'], raw=loc)
+        except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
+            self._reset_gis()
+            columns.append_error('Unknown Error Occurred, Error: {}'.format(e), len(location_addresses) - len(columns))
+        return columns
+
+    def get_batch_geo_coordinates_from_arcgis_with_login(self, location_addresses: list, batch_size: int = None,
+                                                         workers: int = 1, chunk_attempts: int = 3):
         """
         purpose: Retrieve Latitude and Longitude to a Given Addresses/Locations With Credentials
+        The Addresses Are Split Into Chunks Of The Service's Suggested Batch Size, Which Are Sent Concurrently.
+        A Failing Chunk Is Retried On Its Own; If It Still Fails Its Rows Are Returned With None Values.
+        With a rate_limiter, Every batch_geocode Request (One Per Chunk and Attempt) Takes One Token.
         @param location_addresses: Latitude and Longitude needed Addresses/Locations
+        @param batch_size: Addresses Per batch_geocode Call (Default: The Service's Suggested Batch Size)
+        @param workers: Number of Chunks Geocoded Concurrently
+        @param chunk_attempts: Attempts Per Chunk (Ignored If The Instance Has a retry_policy)
         @return: Dict
             status: True or False based on success,
-            message: Error message if an error occurred
+            message: Error message if an error occurred (Also Set When Only Some Chunks Failed)
             result:
               {
                 'lat_lng_list': List of Longitudes and Latitudes of the Addresses Provided
                     'latitude':
                     'longitude':
-                'all_results': Whole Response Object Received From Arc GIS
+                    'score', 'fields': Match Score and Selected Fields (Only With detail 'scored')
+                'all_results': Whole Response Object Received From Arc GIS (Only With detail 'raw', The Default)
               }
         """
 
@@ -171,24 +409,40 @@ class GeoCoordinatesArcGIS:
         # if self.username_password_flag:
         #     return self.__get_error_msg('Username or Password is not Set')
 
+        detail = self._detail(DETAIL_RAW)
         try:
-            GIS("http://www.arcgis.com", self.connection_params['username'], self.connection_params['password'])
-            arc_gis_locations = batch_geocode(location_addresses)
+            chunks, results = self._batch_chunks(location_addresses, batch_size, workers, chunk_attempts)
 
-            if len(arc_gis_locations) > 0:
+            arc_gis_locations = [] if detail == DETAIL_RAW else None
+            lat_lng_list = []
+            errors = []
+            for chunk, (chunk_results, error) in zip(chunks, results):
+                if error is not None:
+                    errors.append(error)
+                    if arc_gis_locations is not None:
+                        arc_gis_locations.extend([None] * len(chunk))
+                    lat_lng_list.extend({'longitude': None, 'latitude': None} for _ in chunk)
+                    continue
 
-                # Filter only Latitude and Longitude Values
-                lat_lng_list = list(
-                    map(lambda loc: {'longitude': loc['location']['x'], 'latitude': loc['location']['y']},
-                        arc_gis_locations))
+                # Filter only Latitude and Longitude Values (The Raw Chunk Is Dropped Unless detail Is 'raw')
+                if arc_gis_locations is not None:
+                    arc_gis_locations.extend(chunk_results)
+                lat_lng_list.extend(self._batch_row(loc, detail) for loc in chunk_results)
 
+            if errors and len(errors) == len(chunks):
+                self._reset_gis()
+                return self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(errors[-1]))
+            elif len(lat_lng_list) > 0:
+                message = None
+                if errors:
+                    message = '{} of {} Chunks Failed, Error: {}'.format(len(errors), len(chunks), errors[-1])
+                result = {'lat_lng_list': lat_lng_list}
+                if arc_gis_locations is not None:
+                    result['all_results'] = arc_gis_locations
                 return {
                     'status': True,
-                    'message': None,
-                    'result': {
-                        'lat_lng_list': lat_lng_list,
-                        'all_results': arc_gis_locations
-                    }
+                    'message': message,
+                    'result': result
                 }
             else:
                 return self.__get_error_msg('Unknown Location. No Results Found')
@@ -198,4 +452,19 @@ class GeoCoordinatesArcGIS:
         except TypeError:
             return self.__get_error_msg('Type Error')
         except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
+            self._reset_gis()
             return self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+
+    def geocode_batch(self, location_addresses: list, workers: int = 8) -> list:
+        """
+        purpose: Geocode One Batch of Addresses, Using batch_geocode When Credentials Are Set
+        @param location_addresses: List of Addresses/Locations
+        @param workers: Number of Concurrent Requests (Chunks When Using batch_geocode)
+        @return: List of Dicts (status, message, result) In The Same Order As location_addresses
+        """
+        if not self.username_password_flag:
+            return super().geocode_batch(location_addresses, workers)
+
+        # The Columnar Path Does Not Keep The Raw Responses Of The Whole Batch Around
+        return list(self.get_batch_geo_columns_from_arcgis_with_login(list(location_addresses), workers=workers))
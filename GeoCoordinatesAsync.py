@@ -0,0 +1,292 @@
+"""
+Purpose:
+This Module Contains asyncio Clients For The Provider Classes, Built On aiohttp.
+
+GeoCoordinatesAsync: Async Client Wrapping Any Provider Instance (geocode, geocode_many)
+GeoCoordinatesGoogleAsync: Async Counterpart of GeoCoordinatesGoogle (get_geo_coordinates_from_google)
+GeoCoordinatesHereAsync: Async Counterpart of GeoCoordinatesHere (get_geo_coordinates_from_here)
+GeoCoordinatesArcGISAsync: Async Counterpart of GeoCoordinatesArcGIS (get_geo_coordinates_from_arcgis)
+
+All Requests Of a Client Share One aiohttp Connection Pool and a Semaphore Capping The Requests In Flight.
+The Response Parsing, The Timeouts and The Optional Cache and Circuit Breaker Are Shared With The Sync Provider
+Classes. A Cache With a Persistent (SQLite) Tier Is Read and Written On The Loop's Default Executor, So Its Disk
+I/O Never Blocks The Event Loop.
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import asyncio
+import logging
+import time
+import aiohttp
+
+from GeoCoordinatesCache import make_key
+from GeoCoordinatesCircuitBreaker import endpoint_key
+from GeoCoordinatesGoogle import GeoCoordinatesGoogle
+from GeoCoordinatesHere import GeoCoordinatesHere
+from GeoCoordinatesArcGIS import GeoCoordinatesArcGIS
+from GeoCoordinatesLogging import get_logger
+
+logger = get_logger(__name__)
+
+
+class GeoCoordinatesAsync:
+
+    # Class Variables
+    session: aiohttp.ClientSession = None
+    owns_session = False
+
+    def __init__(self, provider, max_in_flight: int = 100, limit_per_host: int = 0,
+                 session: aiohttp.ClientSession = None) -> None:
+        """
+        Class Initializer
+        @param provider: GeoCoordinatesGoogle, GeoCoordinatesHere or GeoCoordinatesArcGIS Instance
+        @param max_in_flight: Maximum Number of Concurrent Requests (Also The Connection Pool Size)
+        @param limit_per_host: Maximum Number of Connections Per Host (0 = Only Limited By max_in_flight)
+        @param session: Existing aiohttp.ClientSession To Share With Other Clients (Optional)
+        """
+        self.provider = provider
+        self.max_in_flight = max_in_flight
+        self.limit_per_host = limit_per_host
+        self.session = session
+        self._semaphore = None
+        self._timeout = aiohttp.ClientTimeout(sock_connect=provider.connect_timeout, sock_read=provider.read_timeout)
+
+    @property
+    def single_flight(self):
+        return self.provider.single_flight
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        purpose: Create The Pooled Session Lazily (aiohttp Sessions Must Be Created Inside The Running Loop)
+        """
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.limit_per_host)
+            self.session = aiohttp.ClientSession(connector=connector)
+            self.owns_session = True
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self.session
+
+    async def geocode(self, location_address: str, coalesce: bool = True) -> dict:
+        """
+        purpose: Retrieve Latitude and Longitude to a Given Address/Location
+        @param location_address: Latitude and Longitude needed Address/Location
+        @param coalesce: Share an Identical In-Flight Lookup (With single_flight); False Always Sends a Request
+        @return: Dict (Same Format As The Provider's Sync Method)
+            status: True or False based on success,
+            message: Error message if an error occurred
+            result:
+              {
+                'latitude': Latitude of the Address Provided
+                'longitude': Longitude of the Address Provided
+              }
+        """
+        metrics = self.provider.metrics
+        if metrics is None:
+            return await self._geocode(location_address, coalesce)
+
+        start = time.perf_counter()
+        response = await self._geocode(location_address, coalesce)
+        metrics.observe(self.provider.provider_name, 'total', time.perf_counter() - start)
+        metrics.increment('lookups', self.provider.provider_name, 'ok' if response and response['status'] else 'error')
+        return response
+
+    async def _geocode(self, location_address: str, coalesce: bool) -> dict:
+        provider = self.provider
+        if provider.cache is not None:
+            cached = await self._cache_call(provider.cache.get, provider.cache_name, location_address)
+            if provider.metrics is not None:
+                provider.metrics.increment('cache', provider.provider_name, 'miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached
+
+        if provider.single_flight is None or not coalesce:
+            return await self._lookup(location_address)
+        return await provider.single_flight.do_async(make_key(provider.cache_name, location_address),
+                                                     lambda: self._lookup(location_address))
+
+    async def _lookup(self, location_address: str) -> dict:
+        """
+        purpose: Send The Request For an Address (With Rate Limiting and Retries) and Cache a Successful Result
+        """
+        provider = self.provider
+        session = self._get_session()
+        endpoint = provider._geocode_endpoint(location_address)
+
+        async def request():
+            async with self._semaphore:
+                if provider.metrics is not None:
+                    response = await self._measured_request(session, endpoint)
+                else:
+                    if provider.rate_limiter is not None:
+                        await provider.rate_limiter.acquire_async()
+                    async with session.get(endpoint, timeout=self._timeout) as raw:
+                        response = raw.status, await raw.read(), raw.headers
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('%s GET %s %s', provider.provider_name, endpoint_key(endpoint), response[0])
+            return response
+
+        breaker = provider.circuit_breaker
+
+        async def send():
+            if breaker is None:
+                return await request()
+            return await breaker.call_async(endpoint_key(endpoint), request,
+                                            lambda response: response[0] in breaker.failure_statuses)
+
+        attempts = []
+
+        async def counted():
+            attempts.append(None)
+            return await send()
+
+        try:
+            if provider.retry_policy is None:
+                status_code, content, _ = await send()
+            else:
+                try:
+                    status_code, content, _ = await provider.retry_policy.call_async(
+                        counted, lambda response: provider._check_retry(*response),
+                        (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+                finally:
+                    if provider.metrics is not None and len(attempts) > 1:
+                        provider.metrics.increment('retries', provider.provider_name, '', len(attempts) - 1)
+            result = provider._parse(provider._parse_geocode, status_code, content)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            return provider._get_error_msg('Connection Error')
+        except TypeError:
+            return provider._get_error_msg('Type Error')
+        except Exception as e:
+            return provider._get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+
+        if provider.cache is not None and result and result['status']:
+            await self._cache_call(provider.cache.set, provider.cache_name, location_address, result)
+        return result
+
+    async def _cache_call(self, function, *args):
+        """
+        purpose: Call a Cache Method, On The Default Executor When The Cache Has a Persistent Tier (SQLite Reads and
+        Commits Would Block Every Other Coroutine), Directly When It Is In-Memory Only
+        """
+        if getattr(self.provider.cache, 'path', None) is None:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def _measured_request(self, session: aiohttp.ClientSession, endpoint: str) -> tuple:
+        """
+        purpose: Send a Request Recording The rate_limit, server and download Phases, The Status and The In-Flight
+        Gauge (A New Connection's connect and tls Time Is Part Of server Here)
+        @return: (Status, Body, Headers)
+        """
+        metrics, provider = self.provider.metrics, self.provider.provider_name
+        if self.provider.rate_limiter is not None:
+            start = time.perf_counter()
+            await self.provider.rate_limiter.acquire_async()
+            metrics.observe(provider, 'rate_limit', time.perf_counter() - start)
+
+        metrics.add_in_flight(provider, 1)
+        start = time.perf_counter()
+        try:
+            async with session.get(endpoint, timeout=self._timeout) as response:
+                headers = time.perf_counter()
+                content = await response.read()
+        except Exception as e:
+            metrics.increment('errors', provider, e.__class__.__name__)
+            raise
+        finally:
+            metrics.add_in_flight(provider, -1)
+        metrics.observe(provider, 'server', headers - start)
+        metrics.observe(provider, 'download', time.perf_counter() - headers)
+        metrics.increment('requests', provider, '{}'.format(response.status))
+        return response.status, content, response.headers
+
+    async def geocode_many(self, location_addresses, concurrency: int = None) -> list:
+        """
+        purpose: Retrieve Latitude and Longitude For Many Addresses/Locations On The Running Event Loop
+        A Fixed Number of Worker Coroutines Pull From The Input, So Memory Does Not Grow With Its Length.
+        @param location_addresses: Iterable of Addresses/Locations
+        @param concurrency: Number of Worker Coroutines (Default: max_in_flight)
+        @return: List of Dicts In The Same Order As location_addresses
+        """
+        rows = enumerate(location_addresses)
+        results = {}
+
+        async def worker():
+            # All Workers Share The Same Iterator, So Every Row Is Taken Exactly Once
+            for index, location_address in rows:
+                results[index] = await self.geocode(location_address)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency or self.max_in_flight)))
+        return [results[index] for index in range(len(results))]
+
+    async def close(self) -> None:
+        """
+        purpose: Close The Session If It Was Created By This Client
+        """
+        if self.owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class GeoCoordinatesGoogleAsync(GeoCoordinatesAsync):
+
+    def __init__(self, api_key: str, output_format: str = 'json', max_in_flight: int = 100, limit_per_host: int = 0,
+                 session: aiohttp.ClientSession = None, **kwargs) -> None:
+        """
+        Class Initializer
+        @param api_key: Google API Key
+        @param output_format: Required Output Format
+        @param max_in_flight: Maximum Number of Concurrent Requests (Also The Connection Pool Size)
+        @param limit_per_host: Maximum Number of Connections Per Host (0 = Only Limited By max_in_flight)
+        @param session: Existing aiohttp.ClientSession To Share With Other Clients (Optional)
+        @param kwargs: Provider Options Passed To GeoCoordinatesGoogle (cache, rate_limiter, ...)
+        """
+        super().__init__(GeoCoordinatesGoogle(api_key, output_format, **kwargs), max_in_flight, limit_per_host,
+                         session)
+
+    async def get_geo_coordinates_from_google(self, location_address: str) -> dict:
+        return await self.geocode(location_address)
+
+
+class GeoCoordinatesHereAsync(GeoCoordinatesAsync):
+
+    def __init__(self, api_key: str, max_in_flight: int = 100, limit_per_host: int = 0,
+                 session: aiohttp.ClientSession = None, **kwargs) -> None:
+        """
+        Class Initializer
+        @param api_key: Here API Key
+        @param max_in_flight: Maximum Number of Concurrent Requests (Also The Connection Pool Size)
+        @param limit_per_host: Maximum Number of Connections Per Host (0 = Only Limited By max_in_flight)
+        @param session: Existing aiohttp.ClientSession To Share With Other Clients (Optional)
+        @param kwargs: Provider Options Passed To GeoCoordinatesHere (cache, rate_limiter, ...)
+        """
+        super().__init__(GeoCoordinatesHere(api_key, **kwargs), max_in_flight, limit_per_host, session)
+
+    async def get_geo_coordinates_from_here(self, location_address: str) -> dict:
+        return await self.geocode(location_address)
+
+
+class GeoCoordinatesArcGISAsync(GeoCoordinatesAsync):
+
+    def __init__(self, output_format: str = 'json', max_in_flight: int = 100, limit_per_host: int = 0,
+                 session: aiohttp.ClientSession = None, **kwargs) -> None:
+        """
+        Class Initializer
+        @param output_format: Required Output Format
+        @param max_in_flight: Maximum Number of Concurrent Requests (Also The Connection Pool Size)
+        @param limit_per_host: Maximum Number of Connections Per Host (0 = Only Limited By max_in_flight)
+        @param session: Existing aiohttp.ClientSession To Share With Other Clients (Optional)
+        @param kwargs: Provider Options Passed To GeoCoordinatesArcGIS (cache, rate_limiter, ...)
+        """
+        super().__init__(GeoCoordinatesArcGIS(output_format=output_format, **kwargs), max_in_flight, limit_per_host,
+                         session)
+
+    async def get_geo_coordinates_from_arcgis(self, location_address: str) -> dict:
+        return await self.geocode(location_address)
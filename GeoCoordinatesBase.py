@@ -0,0 +1,454 @@
+"""
+Purpose:
+This Class Contains The Shared Transport Layer Used By All Provider Classes
+(GeoCoordinatesGoogle, GeoCoordinatesHere and GeoCoordinatesArcGIS).
+
+create_session: Create a Pooled HTTP Session With Keep-Alive
+select_fields: Pick Fields (Dotted Paths Allowed) From a Provider Candidate
+geocode_lookup: Decorator For Single Address Lookups (Optional Cache and In-Flight De-Duplication)
+GeoCoordinatesBase: Base Class Holding The Session Shared By All Methods Of a Provider Instance
+    (Every Request Has Connect/Read Timeouts and Can Go Through a Per-Endpoint Circuit Breaker;
+    With metrics= Every Request Is Measured, See GeoCoordinatesMetrics)
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import functools
+import logging
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from GeoCoordinatesBulk import GeoCoordinatesBulkMixin
+from GeoCoordinatesCache import make_key
+from GeoCoordinatesCircuitBreaker import endpoint_key, CircuitOpenError
+from GeoCoordinatesMetrics import instrument_session, reset_connection_timings, connection_timings
+from GeoCoordinatesLogging import get_logger
+from GeoCoordinatesJSON import get_decoder
+from GeoCoordinatesRetry import parse_retry_after
+
+# Response Detail Levels
+DETAIL_COORDS = 'coords'
+DETAIL_SCORED = 'scored'
+DETAIL_RAW = 'raw'
+
+logger = get_logger(__name__)
+
+# Guards The Lazy Creation Of The Provider Sessions
+_session_lock = threading.Lock()
+
+
+def create_session(pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                   keep_alive: bool = True) -> requests.Session:
+    """
+    purpose: Create a Session With a Connection Pool That Can Be Shared Between Provider Instances
+    @param pool_connections: Number of Per-Host Connection Pools To Keep
+    @param pool_maxsize: Maximum Number of Connections Kept Open Per Host
+    @param pool_block: Block When All Connections To a Host Are In Use Instead of Opening Extra Ones
+    @param keep_alive: Keep Connections Open Between Requests
+    @return: requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def select_fields(candidate: dict, fields) -> dict:
+    """
+    purpose: Pick Fields From a Provider Candidate
+    @param candidate: Candidate Dict From The Provider Response
+    @param fields: Field Names, a Dotted Name Reads a Nested Field (e.g. 'address.label')
+    @return: Dict Of Field Name -> Value (None If The Candidate Does Not Have It)
+    """
+    selected = {}
+    for field in fields:
+        value = candidate
+        for key in field.split('.'):
+            value = value.get(key) if isinstance(value, dict) else None
+        selected[field] = value
+    return selected
+
+
+def geocode_lookup(method):
+    """
+    purpose: Wrap a Provider Method Taking a Single Address So That Successful Results Are Cached and
+    Concurrent Identical Lookups Share One Request (With Metrics, The Whole Lookup Is The total Phase)
+    The Wrapped Method Takes an Extra coalesce=True Argument; coalesce=False Always Sends Its Own Request
+    (e.g. a Hedge Request Must Not Join The In-Flight Request It Is Hedging).
+    @param method: Provider Method With The Signature (self, location_address)
+    @return: Wrapped Method
+    """
+    def lookup_cached(self, location_address: str, coalesce: bool):
+        if self.cache is not None:
+            cached = self.cache.get(self.cache_name, location_address)
+            if self.metrics is not None:
+                self.metrics.increment('cache', self.provider_name, 'miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached
+
+        def lookup():
+            response = method(self, location_address)
+            if self.cache is not None and response and response['status']:
+                self.cache.set(self.cache_name, location_address, response)
+            return response
+
+        if self.single_flight is None or not coalesce:
+            return lookup()
+        return self.single_flight.do(make_key(self.cache_name, location_address), lookup)
+
+    @functools.wraps(method)
+    def wrapper(self, location_address: str, coalesce: bool = True):
+        if self.metrics is None:
+            return lookup_cached(self, location_address, coalesce)
+
+        start = time.perf_counter()
+        response = lookup_cached(self, location_address, coalesce)
+        self.metrics.observe(self.provider_name, 'total', time.perf_counter() - start)
+        self.metrics.increment('lookups', self.provider_name, 'ok' if response and response['status'] else 'error')
+        return response
+
+    return wrapper
+
+
+class GeoCoordinatesBase(GeoCoordinatesBulkMixin):
+
+    # Class Variables
+    provider_name: str = None
+    _session: requests.Session = None
+    owns_session = False
+    cache = None
+    rate_limiter = None
+    retry_policy = None
+    single_flight = None
+    circuit_breaker = None
+    metrics = None
+    decode = None
+    lean_parse = True
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    detail: str = None
+    fields: tuple = None
+    # Fields Returned With detail='scored' When None Are Given (Provider Specific)
+    default_fields: tuple = ()
+
+    def __init__(self, session: requests.Session = None, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False, keep_alive: bool = True, cache=None, rate_limiter=None,
+                 retry_policy=None, single_flight=None, circuit_breaker=None, connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0, detail: str = None, fields: tuple = None, metrics=None,
+                 json_backend='auto', lean_parse: bool = True) -> None:
+        """
+        Class Initializer
+        @param session: Existing Session To Share With Other Provider Instances (Optional)
+        @param pool_connections: Number of Per-Host Connection Pools To Keep
+        @param pool_maxsize: Maximum Number of Connections Kept Open Per Host
+        @param pool_block: Block When All Connections To a Host Are In Use Instead of Opening Extra Ones
+        @param keep_alive: Keep Connections Open Between Requests
+        @param cache: GeoCoordinatesCache Used In Front Of The Single Address Lookups (Optional)
+        @param rate_limiter: GeoCoordinatesRateLimiter Every Request Waits On (Optional, See shared_rate_limiter)
+        @param retry_policy: GeoCoordinatesRetryPolicy For Transient Errors (Optional, No Retries If Not Given)
+        @param single_flight: GeoCoordinatesSingleFlight Coalescing Concurrent Identical Lookups (Optional)
+        @param circuit_breaker: GeoCoordinatesCircuitBreaker Failing Fast While an Endpoint Is Down (Optional)
+        @param connect_timeout: Seconds To Wait For a Connection To The Provider
+        @param read_timeout: Seconds To Wait For The Provider To Send a Response Once Connected
+        @param detail: What a Successful Result Holds
+            'coords': Latitude and Longitude Only
+            'scored': Latitude, Longitude, The Provider's Match Score ('score') and The Selected Fields ('fields')
+            'raw': Latitude, Longitude and The Whole Provider Response ('all_results')
+            None: Each Method's Own Default ('coords', Except 'raw' For The ArcGIS Login Methods)
+        @param fields: Fields Returned With detail='scored' (Default: The Provider's default_fields)
+        @param metrics: GeoCoordinatesMetrics Collecting Latencies, Counters and Gauges (Optional, Nothing Is
+            Measured If Not Given)
+        @param json_backend: Response Decoder: 'auto' (orjson If Installed, Else The Standard Library), 'orjson',
+            'json' or a Callable
+        @param lean_parse: With detail='coords', Decode Only The Status and Location Of a Response Instead Of The
+            Whole Body
+        """
+        if detail not in (None, DETAIL_COORDS, DETAIL_SCORED, DETAIL_RAW):
+            raise ValueError('Unsupported Detail: {}'.format(detail))
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.single_flight = single_flight
+        self.circuit_breaker = circuit_breaker
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.detail = detail
+        self.fields = tuple(fields) if fields is not None else None
+        self.metrics = metrics
+        self.json_backend = json_backend
+        self.decode = get_decoder(json_backend)
+        self.lean_parse = lean_parse
+        self.pool_options = {'pool_connections': pool_connections, 'pool_maxsize': pool_maxsize,
+                             'pool_block': pool_block, 'keep_alive': keep_alive}
+        if session is not None:
+            self._session = session
+            if metrics is not None:
+                instrument_session(session)
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        purpose: Return The Pooled Session, Created On First Use (An Instance That Never Sends a Request Itself,
+        e.g. One Wrapped By an Async Client, Opens No Connection Pool)
+        """
+        if self._session is None:
+            with _session_lock:
+                if self._session is None:
+                    session = create_session(**self.pool_options)
+                    if self.metrics is not None:
+                        instrument_session(session)
+                    self.owns_session = True
+                    self._session = session
+        return self._session
+
+    @property
+    def cache_name(self) -> str:
+        """
+        purpose: Return The Name Results Are Cached Under (Results With Extra Detail Are Cached Separately and Scored
+        Results Per Field Selection, So Instances Sharing a Cache Never Serve Each Other Differently Shaped Results)
+        """
+        if self.detail in (None, DETAIL_COORDS):
+            return self.provider_name
+        if self.detail == DETAIL_SCORED:
+            return '{}/{}/{}'.format(self.provider_name, self.detail, ','.join(self.fields or self.default_fields))
+        return '{}/{}'.format(self.provider_name, self.detail)
+
+    def _detail(self, default: str = DETAIL_COORDS) -> str:
+        return self.detail or default
+
+    def _lean(self) -> bool:
+        """
+        purpose: True If Responses Can Take The Lean Path (Only The Coordinates Are Returned)
+        """
+        return self.lean_parse and self._detail() == DETAIL_COORDS
+
+    def _build_result(self, longitude: float, latitude: float, candidate: dict = None, score: float = None,
+                      raw=None, default_detail: str = DETAIL_COORDS) -> dict:
+        """
+        purpose: Return The Success Object For a Lookup At The Instance's Detail Level
+        @param longitude: Longitude Found
+        @param latitude: Latitude Found
+        @param candidate: Best Candidate Of The Response (Fields Are Selected From It With detail='scored')
+        @param score: The Provider's Match Score For The Candidate (None If The Provider Has None)
+        @param raw: Whole Response Object (Only Kept With detail='raw')
+        @param default_detail: Detail Used When The Instance Has None Set
+        @return: Dict (status, message, result)
+        """
+        result = {'longitude': longitude, 'latitude': latitude}
+        detail = self._detail(default_detail)
+        if detail == DETAIL_SCORED:
+            result['score'] = score
+            result['fields'] = select_fields(candidate or {}, self.fields or self.default_fields)
+        elif detail == DETAIL_RAW:
+            result['all_results'] = raw
+        return {'status': True, 'message': None, 'result': result}
+
+    def _get(self, endpoint: str, **kwargs) -> requests.Response:
+        """
+        purpose: Send a GET Request, Retrying Transient Errors If a Retry Policy Is Set
+        @param endpoint: Request URL
+        @return: requests.Response
+        """
+        if self.retry_policy is None:
+            return self._send(endpoint, **kwargs)
+        attempts = []
+
+        def send():
+            attempts.append(None)
+            return self._send(endpoint, **kwargs)
+
+        try:
+            return self.retry_policy.call(send,
+                                          lambda response: self._check_retry(response.status_code, response.content,
+                                                                             response.headers),
+                                          (requests.ConnectionError, requests.Timeout))
+        finally:
+            if self.metrics is not None and len(attempts) > 1:
+                self.metrics.increment('retries', self.provider_name, '', len(attempts) - 1)
+
+    def _send(self, endpoint: str, **kwargs) -> requests.Response:
+        """
+        purpose: Send a Single GET Request Through The Pooled Session, Waiting On The Rate Limiter First
+        With a Circuit Breaker, Requests To an Endpoint That Is Down Raise CircuitOpenError Without Being Sent.
+        """
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        request = self._request if self.metrics is None else self._measured_request
+        if self.circuit_breaker is None:
+            response = request(endpoint, **kwargs)
+        else:
+            failure_statuses = self.circuit_breaker.failure_statuses
+            try:
+                response = self.circuit_breaker.call(endpoint_key(endpoint), lambda: request(endpoint, **kwargs),
+                                                     lambda response_: response_.status_code in failure_statuses)
+            except CircuitOpenError:
+                if self.metrics is not None:
+                    self.metrics.increment('errors', self.provider_name, 'CircuitOpenError')
+                raise
+
+        # One Line Per Request: Checked First, So It Costs Nothing Unless DEBUG Is On (The URL Holds The Key)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('%s GET %s %s', self.provider_name, endpoint_key(endpoint), response.status_code)
+        return response
+
+    def _request(self, endpoint: str, **kwargs) -> requests.Response:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return self.session.get(endpoint, **kwargs)
+
+    def _measured_request(self, endpoint: str, **kwargs) -> requests.Response:
+        """
+        purpose: _request, Recording The Latency Of Each Phase, The Status and The In-Flight Gauge
+        """
+        metrics, provider = self.metrics, self.provider_name
+        if self.rate_limiter is not None:
+            start = time.perf_counter()
+            self.rate_limiter.acquire()
+            metrics.observe(provider, 'rate_limit', time.perf_counter() - start)
+
+        reset_connection_timings()
+        metrics.add_in_flight(provider, 1)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(endpoint, **kwargs)
+        except Exception as e:
+            metrics.increment('errors', provider, e.__class__.__name__)
+            raise
+        finally:
+            metrics.add_in_flight(provider, -1)
+        total = time.perf_counter() - start
+
+        # response.elapsed Runs Until The Headers Arrived (Including Any New Connection); The Rest Is The Body
+        connect, tls = connection_timings()
+        headers = response.elapsed.total_seconds()
+        if connect:
+            metrics.observe(provider, 'connect', connect)
+        if tls:
+            metrics.observe(provider, 'tls', tls)
+        metrics.observe(provider, 'server', max(headers - connect - tls, 0.0))
+        metrics.observe(provider, 'download', max(total - headers, 0.0))
+        metrics.increment('requests', provider, '{}'.format(response.status_code))
+        return response
+
+    def _parse(self, function, *args):
+        """
+        purpose: Run a Response Parser, Recording Its Time As The parse Phase When Metrics Are On
+        @param function: Parser (e.g. self._parse_geocode)
+        @return: The Result Of function(*args)
+        """
+        if self.metrics is None:
+            return function(*args)
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.metrics.observe(self.provider_name, 'parse', time.perf_counter() - start)
+
+    def _guarded(self, endpoint: str, function, rate_limited: bool = True):
+        """
+        purpose: Run a Call That Does Not Go Through The Session (e.g. The ArcGIS Library) Through The Circuit Breaker
+        @param endpoint: Endpoint Key
+        @param function: Function Making The Call
+        @param rate_limited: Wait On The Rate Limiter First, Like a Session Request (False When function Does So
+            Itself, e.g. Once Per Retried Attempt)
+        @return: The Result Of function()
+        """
+        if self.metrics is not None:
+            function = self._measured_call(function)
+        if rate_limited and self.rate_limiter is not None:
+            function = self._rate_limited_call(function)
+        if self.circuit_breaker is None:
+            return function()
+        try:
+            return self.circuit_breaker.call(endpoint, function)
+        except CircuitOpenError:
+            if self.metrics is not None:
+                self.metrics.increment('errors', self.provider_name, 'CircuitOpenError')
+            raise
+
+    def _acquire_rate_limit(self) -> None:
+        """
+        purpose: Wait On The Rate Limiter (If Any) Before a Call Made Outside The Session
+        """
+        if self.rate_limiter is None:
+            return
+        if self.metrics is None:
+            self.rate_limiter.acquire()
+            return
+        start = time.perf_counter()
+        self.rate_limiter.acquire()
+        self.metrics.observe(self.provider_name, 'rate_limit', time.perf_counter() - start)
+
+    def _rate_limited_call(self, function):
+        def call():
+            self._acquire_rate_limit()
+            return function()
+        return call
+
+    def _measured_call(self, function):
+        """
+        purpose: Wrap a Call Made Outside The Session So Its Whole Time Is Recorded As The server Phase
+        """
+        metrics, provider = self.metrics, self.provider_name
+
+        def call():
+            metrics.add_in_flight(provider, 1)
+            start = time.perf_counter()
+            try:
+                result = function()
+            except Exception as e:
+                metrics.increment('errors', provider, e.__class__.__name__)
+                raise
+            finally:
+                metrics.add_in_flight(provider, -1)
+            metrics.observe(provider, 'server', time.perf_counter() - start)
+            return result
+        return call
+
+    def _check_retry(self, status_code: int, content: bytes, headers) -> tuple:
+        """
+        purpose: Decide Whether a Response Should Be Retried Under The Retry Policy
+        @return: (True If Retryable, Seconds From The Retry-After Header or None)
+        """
+        if status_code in self.retry_policy.retry_statuses or self._retryable_body(status_code, content):
+            return True, parse_retry_after(headers.get('Retry-After'))
+        return False, None
+
+    def _retryable_body(self, status_code: int, content: bytes) -> bool:
+        """
+        purpose: Detect Transient Errors Reported In The Body of a Successful HTTP Response (Provider Specific)
+        """
+        return False
+
+    def __getstate__(self) -> dict:
+        """
+        purpose: Pickle The Provider's Settings For a Worker Process (See GeoCoordinatesProcessPool)
+        The Copy Opens Its Own Connection Pool. It Has No Rate Limiter (The Process Pool Gives Each Worker a Share
+        Of The Quota) and No Metrics. Its Cache, Retry Policy, Single Flight and Circuit Breaker Are Fresh Copies.
+        """
+        state = self.__dict__.copy()
+        for name in ('_session', 'owns_session', 'rate_limiter', 'metrics', 'decode'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.decode = get_decoder(self.json_backend)
+
+    def close(self) -> None:
+        """
+        purpose: Close The Session If It Was Created By This Instance
+        """
+        if self.owns_session and self._session is not None:
+            self._session.close()
+            self._session = None
+            self.owns_session = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,276 @@
+"""
+Purpose:
+This Module Benchmarks The Library's Own Overhead Against The Local Mock Server (GeoCoordinatesMock), So No
+Credentials or Network Are Needed. For Every Provider Class and Call Path It Reports Requests Per Second,
+p50/p99 Latency, CPU Time Per Request and Peak Python Memory.
+
+Paths:
+    single: provider.geocode In a Loop
+    threaded: provider.geocode_many (List Of Dicts)
+    bulk: provider.geocode_many With as_columns=True (Google Also Runs get_bulk_altitude_from_google As 'elevation')
+    async: GeoCoordinatesAsync.geocode_many (Needs aiohttp)
+
+run_benchmarks: Run The Benchmarks and Return a Row Per Provider and Path
+format_results: Format The Rows As a Table
+benchmark_decoding: Time The Full and Lean Response Parsing Per JSON Backend (No Server Needed)
+format_decoding: Format The Decoding Rows As a Table
+
+Usage: python GeoCoordinatesBenchmark.py --count 2000 --workers 8 --latency 0.005
+       python GeoCoordinatesBenchmark.py --decoding
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from GeoCoordinatesJSON import orjson
+from GeoCoordinatesMock import GeoCoordinatesMockServer, synthetic_response, GOOGLE_GEOCODE_PATH, \
+    HERE_GEOCODE_PATH, ARCGIS_GEOCODE_PATH
+
+PROVIDERS = ('google', 'here', 'arcgis')
+PATHS = ('single', 'threaded', 'bulk', 'async')
+
+
+def _create_provider(provider_name: str, pool_maxsize: int, **kwargs):
+    """
+    purpose: Create a Provider Instance With a Dummy Key (Imported Here, So a Missing Optional Library Only Skips It)
+    """
+    if provider_name == 'google':
+        from GeoCoordinatesGoogle import GeoCoordinatesGoogle
+        return GeoCoordinatesGoogle('mock-key', pool_maxsize=pool_maxsize, **kwargs)
+    if provider_name == 'here':
+        from GeoCoordinatesHere import GeoCoordinatesHere
+        return GeoCoordinatesHere('mock-key', pool_maxsize=pool_maxsize, **kwargs)
+    if provider_name == 'arcgis':
+        from GeoCoordinatesArcGIS import GeoCoordinatesArcGIS
+        return GeoCoordinatesArcGIS(pool_maxsize=pool_maxsize, **kwargs)
+    raise ValueError('Unsupported Provider: {}'.format(provider_name))
+
+
+def _percentile(latencies: list, percentile: float) -> float:
+    if not latencies:
+        return 0.0
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * percentile))]
+
+
+def _timed(function, latencies: list):
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_async(function, latencies: list):
+    async def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return await function(*args)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def _scenario(server, provider_name: str, path: str, count: int, workers: int):
+    """
+    purpose: Prepare One Benchmark Run
+    @return: (Function Running It and Returning The Results, List Filled With Per Request Latencies)
+    """
+    provider = server.attach(_create_provider(provider_name, workers))
+    latencies = []
+    addresses = ['{} Mock Street, Mock City {}'.format(index, path) for index in range(count)]
+
+    if path == 'single':
+        provider.geocode = _timed(provider.geocode, latencies)
+        return lambda: [provider.geocode(address) for address in addresses], latencies
+    if path == 'threaded':
+        provider.geocode = _timed(provider.geocode, latencies)
+        return lambda: provider.geocode_many(addresses, workers), latencies
+    if path == 'bulk':
+        provider.geocode = _timed(provider.geocode, latencies)
+        return lambda: provider.geocode_many(addresses, workers, as_columns=True), latencies
+    if path == 'elevation':
+        # Latencies Are Per Packed Elevation Request Here
+        provider._get_elevation_batch = _timed(provider._get_elevation_batch, latencies)
+        points = [(-60.0 + index * 0.0001, 100.0 + index * 0.0001) for index in range(count)]
+        return lambda: provider.get_bulk_altitude_from_google(points, workers), latencies
+    if path == 'async':
+        from GeoCoordinatesAsync import GeoCoordinatesAsync
+        client = GeoCoordinatesAsync(provider, max_in_flight=workers * 8)
+        client.geocode = _timed_async(client.geocode, latencies)
+
+        async def run():
+            async with client:
+                return await client.geocode_many(addresses)
+        return lambda: asyncio.run(run()), latencies
+    raise ValueError('Unsupported Path: {}'.format(path))
+
+
+def _run(server, provider_name: str, path: str, count: int, workers: int, memory: bool) -> dict:
+    """
+    purpose: Run One Provider and Path, Timed, Then Once More Under tracemalloc For The Peak Memory
+    """
+    run, latencies = _scenario(server, provider_name, path, count, workers)
+    wall, cpu = time.perf_counter(), time.process_time()
+    results = run()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    peak = None
+    if memory:
+        run_again, _ = _scenario(server, provider_name, path, count, workers)
+        tracemalloc.start()
+        try:
+            run_again()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'provider': provider_name,
+        'path': path,
+        'requests': count,
+        'errors': sum(1 for result in results if not result['status']),
+        'seconds': wall,
+        'requests_per_second': count / wall if wall else 0.0,
+        'p50_ms': _percentile(latencies, 0.5) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'cpu_ms_per_request': cpu / count * 1000,
+        'peak_memory_kb': None if peak is None else peak / 1024
+    }
+
+
+def run_benchmarks(providers=PROVIDERS, paths=PATHS, count: int = 1000, workers: int = 8, latency: float = 0.0,
+                   latency_jitter: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                   unavailable_rate: float = 0.0, memory: bool = True, separate_process: bool = True) -> list:
+    """
+    purpose: Benchmark The Provider Classes Against a Local Mock Server
+    @param providers: Provider Names ('google', 'here', 'arcgis')
+    @param paths: Call Paths ('single', 'threaded', 'bulk', 'async')
+    @param count: Requests Per Run
+    @param workers: Concurrent Requests For The threaded and bulk Paths (The async Path Uses 8 x workers)
+    @param latency: Seconds The Mock Server Delays Every Response
+    @param latency_jitter: Extra Random Delay Of The Mock Server
+    @param error_rate: Share Of HTTP 500 Responses
+    @param rate_limit_rate: Share Of HTTP 429 Responses
+    @param unavailable_rate: Share Of HTTP 503 Responses
+    @param memory: Also Measure The Peak Python Memory (Runs Every Scenario a Second Time)
+    @param separate_process: Run The Mock Server In Its Own Process, So Its CPU Time Is Not Counted
+    @return: List of Dicts, One Per Provider and Path (Skipped Ones Have a 'skipped' Reason Instead Of Numbers)
+    """
+    rows = []
+    server = GeoCoordinatesMockServer(latency, latency_jitter, error_rate, rate_limit_rate, unavailable_rate,
+                                      separate_process=separate_process, seed=0)
+    with server:
+        for provider_name in providers:
+            provider_paths = list(paths)
+            if provider_name == 'google' and 'bulk' in provider_paths:
+                provider_paths.insert(provider_paths.index('bulk') + 1, 'elevation')
+            for path in provider_paths:
+                try:
+                    rows.append(_run(server, provider_name, path, count, workers, memory))
+                except ImportError as e:
+                    rows.append({'provider': provider_name, 'path': path, 'skipped': '{}'.format(e)})
+    return rows
+
+
+def format_results(rows: list) -> str:
+    """
+    purpose: Format Benchmark Rows As a Text Table
+    """
+    header = '{:<8} {:<10} {:>8} {:>7} {:>10} {:>9} {:>9} {:>10} {:>12}'.format(
+        'provider', 'path', 'requests', 'errors', 'req/s', 'p50 ms', 'p99 ms', 'cpu ms/req', 'peak mem KB')
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        if 'skipped' in row:
+            lines.append('{:<8} {:<10} skipped: {}'.format(row['provider'], row['path'], row['skipped']))
+            continue
+        peak = '-' if row['peak_memory_kb'] is None else '{:.0f}'.format(row['peak_memory_kb'])
+        lines.append('{:<8} {:<10} {:>8} {:>7} {:>10.0f} {:>9.2f} {:>9.2f} {:>10.3f} {:>12}'.format(
+            row['provider'], row['path'], row['requests'], row['errors'], row['requests_per_second'], row['p50_ms'],
+            row['p99_ms'], row['cpu_ms_per_request'], peak))
+    return '\n'.join(lines)
+
+
+def benchmark_decoding(count: int = 20000, providers=PROVIDERS) -> list:
+    """
+    purpose: Time The Provider's _parse_geocode On Synthetic Responses (Shaped Like The Real Ones), Comparing The
+    Full Decode (The Previous Path) With The Lean Path, For Each Installed JSON Backend
+    @param count: Responses Parsed Per Run
+    @param providers: Provider Names
+    @return: List of Dicts (provider, backend, path, us_per_response, speedup Over The Full Standard Library Decode)
+    """
+    query_names = {'google': 'address', 'here': 'q', 'arcgis': 'singleLine'}
+    paths = {'google': GOOGLE_GEOCODE_PATH, 'here': HERE_GEOCODE_PATH, 'arcgis': ARCGIS_GEOCODE_PATH}
+    backends = ['json'] + (['orjson'] if orjson is not None else [])
+
+    rows = []
+    for provider_name in providers:
+        bodies = [json.dumps(synthetic_response(paths[provider_name], {
+            query_names[provider_name]: ['{} Mock Street, Mock City, Mock State'.format(index)]})).encode('utf-8')
+            for index in range(min(count, 1000))]
+        baseline = None
+        for backend in backends:
+            for lean_parse in (False, True):
+                try:
+                    provider = _create_provider(provider_name, 1, json_backend=backend, lean_parse=lean_parse)
+                except ImportError as e:
+                    rows.append({'provider': provider_name, 'backend': backend, 'skipped': '{}'.format(e)})
+                    break
+                start = time.perf_counter()
+                for index in range(count):
+                    provider._parse_geocode(200, bodies[index % len(bodies)])
+                seconds = (time.perf_counter() - start) / count
+                baseline = baseline or seconds
+                rows.append({'provider': provider_name, 'backend': backend, 'path': 'lean' if lean_parse else 'full',
+                             'us_per_response': seconds * 1e6, 'speedup': baseline / seconds})
+    return rows
+
+
+def format_decoding(rows: list) -> str:
+    """
+    purpose: Format benchmark_decoding Rows As a Text Table
+    """
+    header = '{:<8} {:<8} {:<6} {:>10} {:>8}'.format('provider', 'backend', 'path', 'us/resp', 'speedup')
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        if 'skipped' in row:
+            lines.append('{:<8} {:<8} skipped: {}'.format(row['provider'], row['backend'], row['skipped']))
+            continue
+        lines.append('{:<8} {:<8} {:<6} {:>10.2f} {:>7.1f}x'.format(row['provider'], row['backend'], row['path'],
+                                                                    row['us_per_response'], row['speedup']))
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark The Provider Classes Against a Local Mock Server')
+    parser.add_argument('--providers', nargs='+', default=list(PROVIDERS), choices=PROVIDERS)
+    parser.add_argument('--paths', nargs='+', default=list(PATHS), choices=PATHS)
+    parser.add_argument('--count', type=int, default=1000, help='Requests Per Run')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent Requests')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mock Server Latency In Seconds')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='Extra Random Latency In Seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share Of HTTP 500 Responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Share Of HTTP 429 Responses')
+    parser.add_argument('--unavailable-rate', type=float, default=0.0, help='Share Of HTTP 503 Responses')
+    parser.add_argument('--no-memory', action='store_true', help='Skip The Peak Memory Runs')
+    parser.add_argument('--decoding', action='store_true', help='Only Benchmark The Response Parsing')
+    args = parser.parse_args()
+
+    if args.decoding:
+        print(format_decoding(benchmark_decoding(args.count * 20, args.providers)))
+        return
+
+    rows = run_benchmarks(args.providers, args.paths, args.count, args.workers, args.latency, args.latency_jitter,
+                          args.error_rate, args.rate_limit_rate, args.unavailable_rate, not args.no_memory)
+    print(format_results(rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Purpose:
+This Module Contains The Thread Pool Engine Used By The Bulk Methods Of The Provider Classes.
+
+imap_ordered: Apply a Function To Every Item On a Bounded Thread Pool and Yield The Results In Input Order
+GeoCoordinatesBulkMixin: Bulk Methods (geocode_many, geocode_batch) For Any Class Implementing geocode
+    (An Abstract Method, So a Class Missing It Fails When It Is Instantiated Instead Of Mid Run)
+    (geocode_many(..., processes=N) Runs On Worker Processes, See GeoCoordinatesProcessPool)
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import abc
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from GeoCoordinatesColumns import GeoCoordinatesColumns
+from GeoCoordinatesProcessPool import geocode_processes
+
+
+def imap_ordered(function, items, workers: int = 8, max_pending: int = None):
+    """
+    purpose: Apply a Function To Every Item On a Bounded Thread Pool
+    Items Are Read Lazily, So At Most max_pending Requests Are Queued or In Flight At Any Time.
+    @param function: Function Called With a Single Item
+    @param items: Any Iterable of Items (List, Generator, File, ...)
+    @param workers: Number of Worker Threads
+    @param max_pending: Maximum Number of Submitted But Not Yet Returned Items (Default: 4 x workers)
+    @return: Generator Yielding function(item) In The Same Order As items
+    """
+    if max_pending is None:
+        max_pending = workers * 4
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class GeoCoordinatesBulkMixin(abc.ABC):
+
+    @staticmethod
+    def _get_error_msg(error_msg: str) -> dict:
+        """
+        purpose: Return an Error Object with a given Error Message
+        @param error_msg: Error Message
+        @return: Dict
+            {
+                'status': False,
+                'message': error_msg,
+                'result': None
+            }
+        """
+        return {
+            'status': False,
+            'message': error_msg,
+            'result': None
+        }
+
+    @abc.abstractmethod
+    def geocode(self, location_address: str) -> dict:
+        """
+        purpose: Retrieve Latitude and Longitude to a Given Address/Location Using The Provider's Default Method
+        @param location_address: Latitude and Longitude needed Address/Location
+        @return: Dict (Same Format As The Provider Method)
+        """
+
+    def _geocode_row(self, location_address: str) -> dict:
+        """
+        purpose: Geocode a Single Row of a Bulk Call, Turning Any Exception Into an Error Object
+        """
+        try:
+            return self.geocode(location_address)
+        except Exception as e:
+            return self._get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+
+    def geocode_many(self, location_addresses, workers: int = 8, max_pending: int = None, as_columns: bool = False,
+                     processes: int = None):
+        """
+        purpose: Retrieve Latitude and Longitude For Many Addresses/Locations Using a Bounded Thread Pool
+        Keep workers At or Below pool_maxsize So Every Worker Gets a Pooled Connection.
+        @param location_addresses: Iterable of Addresses/Locations
+        @param workers: Number of Concurrent Requests (Per Process With processes)
+        @param max_pending: Maximum Number of Queued or In Flight Addresses (Default: 4 x workers)
+        @param as_columns: Return a GeoCoordinatesColumns Instead Of a Dict Per Row (For Very Large Inputs)
+        @param processes: Spread The Input Over This Many Worker Processes, Each With Its Own Connection Pool and
+            Share Of The Rate Limit (See GeoCoordinatesProcessPool.geocode_processes For More Options)
+        @return: List of Dicts (or GeoCoordinatesColumns) In The Same Order As location_addresses
+            status: True or False based on success,
+            message: Error message if an error occurred
+            result:
+              {
+                'latitude': Latitude of the Address Provided
+                'longitude': Longitude of the Address Provided
+              }
+        """
+        if processes:
+            return geocode_processes(self, location_addresses, processes, workers, as_columns=as_columns)
+
+        results = imap_ordered(self._geocode_row, location_addresses, workers, max_pending)
+        if as_columns:
+            return GeoCoordinatesColumns.from_responses(results)
+        return list(results)
+
+    def geocode_batch(self, location_addresses: list, workers: int = 8) -> list:
+        """
+        purpose: Geocode One Batch of Addresses Using The Provider's Best Bulk Path (geocode_many By Default)
+        @param location_addresses: List of Addresses/Locations
+        @param workers: Number of Concurrent Requests
+        @return: List of Dicts (status, message, result) In The Same Order As location_addresses
+        """
+        return self.geocode_many(location_addresses, workers)
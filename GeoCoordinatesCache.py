@@ -0,0 +1,244 @@
+"""
+Purpose:
+This Class Contains a Two Tier Cache (In-Memory LRU and Persistent SQLite) That Sits In Front Of The Provider Classes.
+
+normalize_address: Normalize an Address So That Equivalent Spellings Share a Cache Entry
+GeoCoordinatesTwoTierCache: Base Class Holding The In-Memory LRU Tier and The Persistent SQLite Tier Of a Cache
+GeoCoordinatesCache: Cache Keyed By Provider Name and Normalized Address, With TTL, Size Based Eviction and Counters
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_address(location_address: str) -> str:
+    """
+    purpose: Normalize Case, Whitespace, '+' Separators and Punctuation of an Address
+    @param location_address: Address/Location As Given By The Caller
+    @return: Normalized Address, e.g. 'Colombo,+Sri Lanka ' -> 'colombo sri lanka'
+    """
+    address = location_address.replace('+', ' ').lower()
+    address = _PUNCTUATION.sub(' ', address)
+    return _WHITESPACE.sub(' ', address).strip()
+
+
+def make_key(provider_name: str, location_address: str) -> str:
+    """
+    purpose: Build The Cache Key For a Provider and Address
+    @param provider_name: Name of the Provider, e.g. 'google'
+    @param location_address: Address/Location As Given By The Caller
+    @return: Cache Key
+    """
+    return '{}:{}'.format(provider_name, normalize_address(location_address))
+
+
+class GeoCoordinatesTwoTierCache:
+
+    # Table Of The Persistent Tier, Its Key Column and Its Column Definitions (Set By Each Cache)
+    table: str = None
+    key_column: str = None
+    columns: str = None
+    # Number of Writes Between Two Size Checks Of The Persistent Tier
+    eviction_interval = 1000
+
+    def __init__(self, path: str = None, max_memory_entries: int = 10000, max_disk_entries: int = 1000000) -> None:
+        """
+        Class Initializer
+        @param path: SQLite File For The Persistent Tier. Only The In-Memory Tier Is Used If Not Given
+        @param max_memory_entries: Maximum Number of Entries Kept In The In-Memory LRU Tier
+        @param max_disk_entries: Maximum Number of Entries Kept In The Persistent Tier
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._disk_writes = 0
+        if path:
+            connection = self._connection()
+            connection.execute('CREATE TABLE IF NOT EXISTS {} ({})'.format(self.table, self.columns))
+            connection.execute('CREATE INDEX IF NOT EXISTS {0}_created ON {0} (created)'.format(self.table))
+            connection.commit()
+
+    def __getstate__(self) -> dict:
+        """
+        purpose: Pickle The Settings Only (e.g. For a Worker Process): The Copy Starts With an Empty In-Memory Tier
+        and Opens Its Own Connection To The Same SQLite File
+        """
+        state = self.__dict__.copy()
+        for name in ('_memory', '_lock', '_local'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        purpose: Return The SQLite Connection Of The Calling Thread (Connections Can Not Be Shared Between Threads)
+        @return: sqlite3.Connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # WAL Lets Several Processes On The Host Read While One Writes
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _set_memory(self, key: str, entry) -> None:
+        """
+        purpose: Insert Into The LRU Tier and Evict The Least Recently Used Entries (Caller Holds The Lock)
+        """
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _write(self, row: tuple) -> None:
+        """
+        purpose: Insert or Replace a Row Of The Persistent Tier, Dropping The Oldest Rows Every eviction_interval
+        Writes Once The Tier Has Grown Past max_disk_entries
+        @param row: Column Values In Table Order (The Key First, 'created' Last)
+        """
+        connection = self._connection()
+        connection.execute('INSERT OR REPLACE INTO {} VALUES ({})'.format(self.table, ', '.join('?' * len(row))),
+                           row)
+        with self._lock:
+            self._disk_writes += 1
+            evict = self._disk_writes % self.eviction_interval == 0
+        if evict:
+            connection.execute('DELETE FROM {0} WHERE {1} IN (SELECT {1} FROM {0} ORDER BY created DESC '
+                               'LIMIT -1 OFFSET ?)'.format(self.table, self.key_column), (self.max_disk_entries,))
+        connection.commit()
+
+    def _reset_counters(self) -> None:
+        """
+        purpose: Reset The Cache's Counters (Caller Holds The Lock)
+        """
+
+    def clear(self) -> None:
+        """
+        purpose: Remove All Entries and Reset The Counters
+        """
+        with self._lock:
+            self._memory.clear()
+            self._reset_counters()
+        if self.path:
+            connection = self._connection()
+            connection.execute('DELETE FROM {}'.format(self.table))
+            connection.commit()
+
+
+class GeoCoordinatesCache(GeoCoordinatesTwoTierCache):
+
+    table = 'geocode_cache'
+    key_column = 'key'
+    columns = 'key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL'
+
+    def __init__(self, path: str = None, max_memory_entries: int = 10000, max_disk_entries: int = 1000000,
+                 ttl: float = None) -> None:
+        """
+        Class Initializer
+        @param path: SQLite File For The Persistent Tier. Only The In-Memory Tier Is Used If Not Given
+        @param max_memory_entries: Maximum Number of Entries Kept In The In-Memory LRU Tier
+        @param max_disk_entries: Maximum Number of Entries Kept In The Persistent Tier
+        @param ttl: Seconds an Entry Stays Valid. Entries Never Expire If Not Given
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        super().__init__(path, max_memory_entries, max_disk_entries)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, provider_name: str, location_address: str):
+        """
+        purpose: Look Up a Cached Result
+        @param provider_name: Name of the Provider, e.g. 'google'
+        @param location_address: Address/Location As Given By The Caller
+        @return: Cached Result Dict or None On a Miss
+        """
+        key = make_key(provider_name, location_address)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+        if self.path:
+            row = self._connection().execute('SELECT value, created FROM geocode_cache WHERE key = ?',
+                                             (key,)).fetchone()
+            if row is not None and not self._expired(row[1]):
+                value = json.loads(row[0])
+                with self._lock:
+                    self._set_memory(key, (value, row[1]))
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, provider_name: str, location_address: str, value: dict) -> None:
+        """
+        purpose: Store a Result In Both Tiers
+        @param provider_name: Name of the Provider, e.g. 'google'
+        @param location_address: Address/Location As Given By The Caller
+        @param value: Result Dict To Cache (Must Be JSON Serializable For The Persistent Tier)
+        """
+        key = make_key(provider_name, location_address)
+        created = time.time()
+
+        with self._lock:
+            self._set_memory(key, (value, created))
+
+        if self.path:
+            self._write((key, json.dumps(value), created))
+
+    def _reset_counters(self) -> None:
+        self.hits = self.misses = self.memory_hits = self.disk_hits = 0
+
+    def stats(self) -> dict:
+        """
+        purpose: Return The Hit/Miss Counters
+        @return: Dict
+            {
+                'hits': Total Hits,
+                'misses': Total Misses,
+                'memory_hits': Hits Served By The In-Memory Tier,
+                'disk_hits': Hits Served By The Persistent Tier,
+                'memory_entries': Entries Currently In The In-Memory Tier
+            }
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'memory_entries': len(self._memory)
+            }
@@ -0,0 +1,224 @@
+"""
+Purpose:
+This Class Contains a Circuit Breaker Kept Per Provider Endpoint. After Repeated Connection Errors, Timeouts or
+Server Errors The Endpoint's Circuit Opens and Calls Fail Immediately Instead Of Waiting Out Another Connection
+Attempt. After recovery_timeout a Few Trial Calls Are Let Through (Half-Open) To Check If The Endpoint Is Back.
+
+GeoCoordinatesCircuitBreaker: Closed/Open/Half-Open Circuit Per Endpoint (Sync, Threaded and asyncio Callers)
+CircuitOpenError: Raised Instead Of Sending a Request While The Endpoint's Circuit Is Open
+endpoint_key: Return The Endpoint a Request URL Belongs To (Host and Path, Without The Query String)
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+from GeoCoordinatesLogging import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def endpoint_key(url: str) -> str:
+    """
+    purpose: Return The Endpoint a Request URL Belongs To, So Every Address Sent To It Shares One Circuit
+    @param url: Request URL (or Any Other Key Without a Scheme, Which Is Returned As Is)
+    @return: 'host/path'
+    """
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+    return parts.netloc + parts.path
+
+
+class CircuitOpenError(Exception):
+
+    def __init__(self, endpoint: str, retry_in: float) -> None:
+        super().__init__('Circuit Open For {}. Failing Fast For {:.1f} More Seconds'.format(endpoint, retry_in))
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class _Circuit:
+    __slots__ = ('state', 'failures', 'successes', 'opened_at', 'trial_calls', 'rejected')
+
+    def __init__(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.successes = 0
+        self.opened_at = 0.0
+        self.trial_calls = 0
+        self.rejected = 0
+
+
+class GeoCoordinatesCircuitBreaker:
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1,
+                 success_threshold: int = 1, failure_statuses: tuple = (500, 502, 503, 504)) -> None:
+        """
+        Class Initializer
+        @param failure_threshold: Consecutive Failures That Open The Circuit
+        @param recovery_timeout: Seconds The Circuit Stays Open Before Trial Calls Are Let Through
+        @param half_open_max_calls: Trial Calls Allowed At Once While Half-Open
+        @param success_threshold: Successful Trial Calls Needed To Close The Circuit Again
+        @param failure_statuses: HTTP Status Codes Counted As Failures (429 Is Not: The Endpoint Is Up)
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.failure_statuses = frozenset(failure_statuses)
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """
+        purpose: Pickle The Settings (e.g. For a Worker Process); The Copy Starts With Every Circuit Closed
+        """
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_circuits'] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _circuit(self, endpoint: str) -> _Circuit:
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            circuit = self._circuits[endpoint] = _Circuit()
+        return circuit
+
+    def before_call(self, endpoint: str) -> None:
+        """
+        purpose: Check The Endpoint's Circuit Before Sending a Request
+        @param endpoint: Endpoint Key (See endpoint_key)
+        @raise CircuitOpenError: If The Circuit Is Open, or Half-Open With All Trial Calls Taken
+        """
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == CLOSED:
+                return
+
+            now = time.monotonic()
+            if circuit.state == OPEN:
+                retry_in = circuit.opened_at + self.recovery_timeout - now
+                if retry_in > 0:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(endpoint, retry_in)
+                circuit.state = HALF_OPEN
+                circuit.successes = 0
+                circuit.trial_calls = 0
+
+            if circuit.trial_calls >= self.half_open_max_calls:
+                circuit.rejected += 1
+                raise CircuitOpenError(endpoint, 0.0)
+            circuit.trial_calls += 1
+
+    def record_success(self, endpoint: str) -> None:
+        """
+        purpose: Record a Call The Endpoint Answered (Closes a Half-Open Circuit After success_threshold Calls)
+        """
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == HALF_OPEN:
+                circuit.trial_calls = max(0, circuit.trial_calls - 1)
+                circuit.successes += 1
+                if circuit.successes < self.success_threshold:
+                    return
+                circuit.state = CLOSED
+                logger.warning('Circuit For %s Closed', endpoint)
+            circuit.failures = 0
+
+    def record_failure(self, endpoint: str) -> None:
+        """
+        purpose: Record a Failed Call (Opens The Circuit After failure_threshold Failures or a Failed Trial Call)
+        """
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                if circuit.state != OPEN:
+                    logger.warning('Circuit For %s Opened After %d Failures', endpoint, circuit.failures)
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+
+    def _release(self, endpoint: str) -> None:
+        """
+        purpose: Give Back a Trial Call That Ended Without an Answer Either Way
+        """
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == HALF_OPEN and circuit.trial_calls > 0:
+                circuit.trial_calls -= 1
+
+    def call(self, endpoint: str, function, is_failure=None):
+        """
+        purpose: Run function() Through The Endpoint's Circuit
+        @param endpoint: Endpoint Key (See endpoint_key)
+        @param function: Function Sending The Request
+        @param is_failure: Function Taking The Result and Returning True If It Counts As a Failure (Optional)
+        @return: The Result Of function() (Exceptions Are Counted As Failures and Raised)
+        @raise CircuitOpenError: Without Calling function() If The Circuit Is Open
+        """
+        self.before_call(endpoint)
+        try:
+            result = function()
+        except Exception:
+            self.record_failure(endpoint)
+            raise
+        if is_failure is not None and is_failure(result):
+            self.record_failure(endpoint)
+        else:
+            self.record_success(endpoint)
+        return result
+
+    async def call_async(self, endpoint: str, function, is_failure=None):
+        """
+        purpose: Async Version of call(), function Is a Coroutine Function
+        A Cancelled Call (e.g. The Losing Request Of a Hedge) Is Neither a Success Nor a Failure.
+        """
+        self.before_call(endpoint)
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            self._release(endpoint)
+            raise
+        except Exception:
+            self.record_failure(endpoint)
+            raise
+        if is_failure is not None and is_failure(result):
+            self.record_failure(endpoint)
+        else:
+            self.record_success(endpoint)
+        return result
+
+    def state(self, endpoint: str) -> str:
+        """
+        purpose: Return The State Of an Endpoint's Circuit ('closed', 'open' or 'half_open')
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            return CLOSED if circuit is None else circuit.state
+
+    def stats(self) -> dict:
+        """
+        purpose: Return The State Of Every Endpoint's Circuit
+        @return: Dict Of Endpoint ->
+            {
+                'state': 'closed', 'open' or 'half_open',
+                'failures': Consecutive Failures,
+                'rejected': Calls Failed Fast While The Circuit Was Open
+            }
+        """
+        with self._lock:
+            return {
+                endpoint: {'state': circuit.state, 'failures': circuit.failures, 'rejected': circuit.rejected}
+                for endpoint, circuit in self._circuits.items()
+            }
@@ -0,0 +1,192 @@
+"""
+Purpose:
+This Class Contains a Compact Columnar Container For The Results Of Bulk Calls. Instead Of a Dict Per Row, The
+Coordinates Are Kept In float64 Arrays, The Status In a Byte Array and Error Messages In an Interned Table, So
+a Row Costs About 30 Bytes. The Raw Provider Payloads Are Only Kept When Asked For.
+
+GeoCoordinatesColumns: Columnar Bulk Result (latitude, longitude, altitude, status, message) With NumPy Export
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import json
+import struct
+from array import array
+
+NAN = float('nan')
+
+# File Header: Magic and Row Count
+_HEADER = struct.Struct('<8sQ')
+_MAGIC = b'GCCOL001'
+
+
+class GeoCoordinatesColumns:
+
+    def __init__(self, keep_raw: bool = False) -> None:
+        """
+        Class Initializer
+        @param keep_raw: Keep The Raw Provider Payload Of Every Row (Only Filled By Paths That Have One)
+        """
+        self.latitude = array('d')
+        self.longitude = array('d')
+        self.altitude = array('d')
+        self.status = bytearray()
+        self.message_index = array('I')
+        # Index 0 Is Reserved For "No Message"
+        self.messages = [None]
+        self._message_ids = {None: 0}
+        self.raw = [] if keep_raw else None
+
+    @classmethod
+    def from_responses(cls, responses, keep_raw: bool = False):
+        """
+        purpose: Build The Columns From Provider Response Dicts (e.g. The Output Of a Bulk Method)
+        @param responses: Iterable of Dicts (status, message, result)
+        @param keep_raw: Keep The Response Dicts As The Raw Payloads
+        @return: GeoCoordinatesColumns
+        """
+        columns = cls(keep_raw)
+        columns.extend(responses)
+        return columns
+
+    def _intern(self, message) -> int:
+        index = self._message_ids.get(message)
+        if index is None:
+            index = self._message_ids[message] = len(self.messages)
+            self.messages.append(message)
+        return index
+
+    def append_values(self, latitude: float = NAN, longitude: float = NAN, altitude: float = NAN,
+                      status: bool = True, message: str = None, raw=None) -> None:
+        """
+        purpose: Add a Row (Missing Coordinates Are Stored As NaN)
+        """
+        self.latitude.append(NAN if latitude is None else latitude)
+        self.longitude.append(NAN if longitude is None else longitude)
+        self.altitude.append(NAN if altitude is None else altitude)
+        self.status.append(1 if status else 0)
+        self.message_index.append(self._intern(message))
+        if self.raw is not None:
+            self.raw.append(raw)
+
+    def append_error(self, message: str, count: int = 1) -> None:
+        """
+        purpose: Add count Failed Rows Sharing The Same Error Message
+        """
+        self.latitude.extend(array('d', [NAN]) * count)
+        self.longitude.extend(array('d', [NAN]) * count)
+        self.altitude.extend(array('d', [NAN]) * count)
+        self.status.extend(bytes(count))
+        self.message_index.extend(array('I', [self._intern(message)]) * count)
+        if self.raw is not None:
+            self.raw.extend([None] * count)
+
+    def append(self, response: dict) -> None:
+        """
+        purpose: Add a Row From a Provider Response Dict (status, message, result)
+        """
+        result = response['result'] if response and response['result'] else {}
+        self.append_values(result.get('latitude'), result.get('longitude'), result.get('altitude'),
+                           bool(response and response['status']), response['message'] if response else 'No Response',
+                           response)
+
+    def extend(self, responses) -> None:
+        for response in responses:
+            self.append(response)
+
+    def extend_columns(self, other) -> None:
+        """
+        purpose: Append The Rows Of Another GeoCoordinatesColumns (Array Copies, No Per Row Dicts)
+        """
+        self.latitude.extend(other.latitude)
+        self.longitude.extend(other.longitude)
+        self.altitude.extend(other.altitude)
+        self.status.extend(other.status)
+        # Re-Intern The Other Table's Messages; Only Rows Whose Index Changes Need Mapping
+        mapping = [self._intern(message) for message in other.messages]
+        if all(index == new_index for index, new_index in enumerate(mapping)):
+            self.message_index.extend(other.message_index)
+        else:
+            self.message_index.extend(array('I', [mapping[index] for index in other.message_index]))
+        if self.raw is not None:
+            self.raw.extend(other.raw if other.raw is not None else [None] * len(other))
+
+    def save(self, file) -> None:
+        """
+        purpose: Write The Columns To a Binary File Object (Raw Payloads Are Not Written)
+        """
+        file.write(_HEADER.pack(_MAGIC, len(self)))
+        for column in (self.latitude, self.longitude, self.altitude, self.message_index):
+            column.tofile(file)
+        file.write(self.status)
+        file.write(json.dumps(self.messages[1:]).encode('utf-8'))
+
+    @classmethod
+    def load(cls, file):
+        """
+        purpose: Read Columns Written By save From a Binary File Object
+        @return: GeoCoordinatesColumns
+        """
+        magic, count = _HEADER.unpack(file.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError('Not a GeoCoordinatesColumns File')
+        columns = cls()
+        for column in (columns.latitude, columns.longitude, columns.altitude, columns.message_index):
+            column.fromfile(file, count)
+        columns.status = bytearray(file.read(count))
+        for message in json.loads(file.read().decode('utf-8')):
+            columns._intern(message)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    def __getitem__(self, index: int) -> dict:
+        """
+        purpose: Return a Row In The Usual Response Format
+        @return: Dict (status, message, result With latitude, longitude and altitude If Known)
+        """
+        if not self.status[index]:
+            return {'status': False, 'message': self.messages[self.message_index[index]], 'result': None}
+
+        result = {'latitude': self.latitude[index], 'longitude': self.longitude[index]}
+        if self.altitude[index] == self.altitude[index]:
+            result['altitude'] = self.altitude[index]
+        return {'status': True, 'message': self.messages[self.message_index[index]], 'result': result}
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def nbytes(self) -> int:
+        """
+        purpose: Return The Memory Used By The Column Buffers (Excluding The Message Table and Raw Payloads)
+        """
+        return sum(column.itemsize * len(column) for column in
+                   (self.latitude, self.longitude, self.altitude, self.message_index)) + len(self.status)
+
+    def to_numpy(self) -> dict:
+        """
+        purpose: Return The Columns As NumPy Arrays Sharing The Same Memory (No Copy)
+        The Columns Cannot Grow While These Arrays Are Alive (Appending Raises BufferError).
+        @return: Dict
+            {
+                'latitude': float64 Array (NaN For Failed Rows),
+                'longitude': float64 Array,
+                'altitude': float64 Array (NaN If Unknown),
+                'status': uint8 Array (1 = Success),
+                'message_index': uint32 Array Indexing self.messages
+            }
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('to_numpy Needs NumPy. Please Install It With: pip install numpy')
+
+        return {
+            'latitude': numpy.frombuffer(self.latitude, dtype=numpy.float64),
+            'longitude': numpy.frombuffer(self.longitude, dtype=numpy.float64),
+            'altitude': numpy.frombuffer(self.altitude, dtype=numpy.float64),
+            'status': numpy.frombuffer(self.status, dtype=numpy.uint8),
+            'message_index': numpy.frombuffer(self.message_index, dtype=numpy.uint32)
+        }
@@ -0,0 +1,218 @@
+"""
+Purpose:
+This Class Contains a Spatial Cache For Elevation Lookups. Coordinates Are Quantized To a Geohash Grid, So Points
+a Few Metres Apart (e.g. Consecutive GPS Fixes) Share One Cached Elevation Instead Of Each Paying For a Request.
+With interpolate=True, a Point In an Empty Cell Is Answered From The Cached Samples Around It.
+
+geohash: Return The Geohash Of a Latitude and Longitude
+GeoCoordinatesElevationCache: Two Tier (In-Memory LRU and Persistent SQLite) Elevation Cache Keyed By Geohash Cell
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import math
+import time
+
+from GeoCoordinatesCache import GeoCoordinatesTwoTierCache
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_METRES_PER_DEGREE = 111195.08
+
+
+def _cell(latitude: float, longitude: float, precision: int) -> tuple:
+    """
+    purpose: Return The Integer Row and Column Of The Geohash Cell Containing a Point
+    """
+    latitude_bits = 5 * precision // 2
+    longitude_bits = 5 * precision - latitude_bits
+    row = min(int((latitude + 90.0) / 180.0 * (1 << latitude_bits)), (1 << latitude_bits) - 1)
+    column = int((longitude + 180.0) / 360.0 * (1 << longitude_bits)) % (1 << longitude_bits)
+    return row, column
+
+
+def _cell_geohash(row: int, column: int, precision: int) -> str:
+    """
+    purpose: Interleave The Bits Of a Cell's Row and Column Into Its Geohash (Longitude Bits First)
+    """
+    latitude_bits = 5 * precision // 2
+    longitude_bits = 5 * precision - latitude_bits
+    value = 0
+    for bit in range(5 * precision):
+        if bit % 2 == 0:
+            longitude_bits -= 1
+            value = (value << 1) | ((column >> longitude_bits) & 1)
+        else:
+            latitude_bits -= 1
+            value = (value << 1) | ((row >> latitude_bits) & 1)
+    return ''.join(_BASE32[(value >> (5 * (precision - 1 - index))) & 31] for index in range(precision))
+
+
+def geohash(latitude: float, longitude: float, precision: int = 8) -> str:
+    """
+    purpose: Return The Geohash Of a Point
+    @param latitude: Latitude In Degrees
+    @param longitude: Longitude In Degrees
+    @param precision: Number of Characters (8 Is a Cell Of About 38 x 19 Metres, 7 About 153 x 153 Metres)
+    @return: Geohash, e.g. geohash(57.64911, 10.40744, 11) -> 'u4pruydqqvj'
+    """
+    return _cell_geohash(*_cell(latitude, longitude, precision), precision)
+
+
+class GeoCoordinatesElevationCache(GeoCoordinatesTwoTierCache):
+
+    table = 'elevation_cache'
+    key_column = 'cell'
+    columns = ('cell TEXT PRIMARY KEY, latitude REAL NOT NULL, longitude REAL NOT NULL, altitude REAL NOT NULL, '
+               'created REAL NOT NULL')
+
+    def __init__(self, precision: int = 8, interpolate: bool = False, tolerance_m: float = 50.0, path: str = None,
+                 max_memory_entries: int = 100000, max_disk_entries: int = 10000000) -> None:
+        """
+        Class Initializer
+        @param precision: Geohash Precision Of The Grid (Points In The Same Cell Share One Elevation)
+        @param interpolate: Answer Points In Empty Cells From The Cached Samples Of The Neighbouring Cells
+        @param tolerance_m: Maximum Distance Of a Sample Used For Interpolation, In Metres
+        @param path: SQLite File For The Persistent Tier. Only The In-Memory Tier Is Used If Not Given
+        @param max_memory_entries: Maximum Number of Cells Kept In The In-Memory LRU Tier
+        @param max_disk_entries: Maximum Number of Cells Kept In The Persistent Tier
+        """
+        self.precision = precision
+        self.interpolate = interpolate
+        self.tolerance_m = tolerance_m
+        self.hits = 0
+        self.interpolated = 0
+        self.misses = 0
+        super().__init__(path, max_memory_entries, max_disk_entries)
+
+    def cell_key(self, latitude: float, longitude: float) -> str:
+        """
+        purpose: Return The Geohash Of The Cell a Point Falls In (Points With The Same Key Share an Elevation)
+        """
+        return geohash(latitude, longitude, self.precision)
+
+    def _samples(self, keys: list) -> dict:
+        """
+        purpose: Return The Cached Samples Of Cells, From The In-Memory Tier Or Else The Persistent Tier
+        @return: Dict Of Cell Key -> (Latitude, Longitude, Altitude)
+        """
+        samples = {}
+        with self._lock:
+            for key in keys:
+                sample = self._memory.get(key)
+                if sample is not None:
+                    self._memory.move_to_end(key)
+                    samples[key] = sample
+
+        missing = [key for key in keys if key not in samples]
+        if self.path and missing:
+            rows = self._connection().execute(
+                'SELECT cell, latitude, longitude, altitude FROM elevation_cache WHERE cell IN ({})'.format(
+                    ','.join('?' * len(missing))), missing).fetchall()
+            with self._lock:
+                for cell, latitude, longitude, altitude in rows:
+                    samples[cell] = (latitude, longitude, altitude)
+                    self._set_memory(cell, samples[cell])
+        return samples
+
+    def _neighbour_keys(self, latitude: float, longitude: float) -> list:
+        """
+        purpose: Return The Keys Of The Cell Of a Point and Of The Cells Around It Within tolerance_m
+        """
+        row, column = _cell(latitude, longitude, self.precision)
+        latitude_bits = 5 * self.precision // 2
+        longitude_bits = 5 * self.precision - latitude_bits
+        cell_height = _METRES_PER_DEGREE * 180.0 / (1 << latitude_bits)
+        cell_width = _METRES_PER_DEGREE * 360.0 / (1 << longitude_bits) * max(math.cos(math.radians(latitude)), 1e-6)
+        rows = min(int(math.ceil(self.tolerance_m / cell_height)), 8)
+        columns = min(int(math.ceil(self.tolerance_m / cell_width)), 8)
+
+        keys = []
+        for d_row in range(-rows, rows + 1):
+            if 0 <= row + d_row < (1 << latitude_bits):
+                for d_column in range(-columns, columns + 1):
+                    keys.append(_cell_geohash(row + d_row, (column + d_column) % (1 << longitude_bits),
+                                              self.precision))
+        return keys
+
+    def _interpolate(self, latitude: float, longitude: float, samples) -> float:
+        """
+        purpose: Inverse Distance Weighted Elevation From The Samples Within tolerance_m (None If There Are None)
+        """
+        weighted, weights = 0.0, 0.0
+        cos_latitude = math.cos(math.radians(latitude))
+        for sample_latitude, sample_longitude, altitude in samples:
+            distance = _METRES_PER_DEGREE * math.hypot(sample_latitude - latitude,
+                                                       (sample_longitude - longitude) * cos_latitude)
+            if distance > self.tolerance_m:
+                continue
+            if distance < 0.01:
+                return altitude
+            weighted += altitude / (distance * distance)
+            weights += 1.0 / (distance * distance)
+        return weighted / weights if weights else None
+
+    def get(self, latitude: float, longitude: float):
+        """
+        purpose: Look Up The Elevation Of a Point
+        @param latitude: Latitude In Degrees
+        @param longitude: Longitude In Degrees
+        @return: Cached (or Interpolated) Elevation In Metres, or None On a Miss
+        """
+        key = self.cell_key(latitude, longitude)
+        sample = self._samples([key]).get(key)
+        if sample is not None:
+            with self._lock:
+                self.hits += 1
+            return sample[2]
+
+        if self.interpolate:
+            altitude = self._interpolate(latitude, longitude,
+                                         self._samples(self._neighbour_keys(latitude, longitude)).values())
+            if altitude is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.interpolated += 1
+                return altitude
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, latitude: float, longitude: float, altitude: float) -> None:
+        """
+        purpose: Store The Elevation Of a Point As The Sample Of Its Cell
+        @param latitude: Latitude In Degrees
+        @param longitude: Longitude In Degrees
+        @param altitude: Elevation In Metres
+        """
+        key = self.cell_key(latitude, longitude)
+        with self._lock:
+            self._set_memory(key, (latitude, longitude, altitude))
+
+        if self.path:
+            self._write((key, latitude, longitude, altitude, time.time()))
+
+    def _reset_counters(self) -> None:
+        self.hits = self.interpolated = self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        purpose: Return The Hit/Miss Counters
+        @return: Dict
+            {
+                'hits': Lookups Answered From The Cache (Including Interpolated Ones),
+                'interpolated': Hits Interpolated From Neighbouring Cells,
+                'misses': Lookups That Needed a Request,
+                'hit_rate': hits / (hits + misses),
+                'memory_entries': Cells Currently In The In-Memory Tier
+            }
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'interpolated': self.interpolated,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory)
+            }
@@ -5,6 +5,8 @@ This Class Contains Methods To Retrieve Geo Location Information From Google API
 get_geo_coordinates_from_google: Retrieve Latitude and Longitude to a Given Address/Location
 get_lat_lng_altitude_from_google: Retrieve Altitude Information for a given Latitude and Longitude
 get_address_altitude_from_google: Retrieve Altitude Information for a given Address/Location
+get_bulk_altitude_from_google: Retrieve Altitude Information for Many Latitude and Longitude Pairs
+get_bulk_address_altitude_from_google: Retrieve Altitude Information for Many Addresses/Locations
 
 Developers:
 Kevin Patel (GitHub Username: PatelKeviin)
@@ -13,28 +15,58 @@ Kevin Patel (GitHub Username: PatelKeviin)
 Sponsor: DataDisca Pty Ltd. Australia
 https://github.com/DataDisca
 """
-import logging
-import logging.config
-import requests
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from GeoCoordinatesBase import GeoCoordinatesBase, geocode_lookup
+from GeoCoordinatesBulk import imap_ordered
+from GeoCoordinatesColumns import GeoCoordinatesColumns
+from GeoCoordinatesLogging import get_logger
+from GeoCoordinatesJSON import lean_pattern, lean_object, lean_string
 
+logger = get_logger(__name__)
 
-class GeoCoordinatesGoogle:
+_LOCATION = lean_pattern('location')
 
-    # Set Log Level
-    logging.basicConfig(filename='./log/google_log.log',
-                        level=logging.INFO,
-                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+def _encode_polyline_value(value: int) -> str:
+    """
+    purpose: Encode One Coordinate Delta (In 1e-5 Degrees) Using Google's Encoded Polyline Algorithm
+    """
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+
+class GeoCoordinatesGoogle(GeoCoordinatesBase):
 
     # Class Variables
+    provider_name = 'google'
     connection_params: dict = {}
+    geocode_url = 'https://maps.googleapis.com/maps/api/geocode'
+    elevation_url = 'https://maps.googleapis.com/maps/api/elevation'
+    # Elevation API Limits Per Request
+    max_elevation_locations = 512
+    max_url_length = 16384
+    # Google Has No Match Score, So detail='scored' Returns score None With These Fields
+    default_fields = ('formatted_address', 'place_id', 'geometry.location_type', 'partial_match')
 
-    def __init__(self, api_key: str, output_format: str = 'json') -> None:
+    def __init__(self, api_key: str, output_format: str = 'json', elevation_cache=None, **kwargs) -> None:
         """
         Class Initializer
         @param output_format: Required Output Format
         @param api_key: Google API Key
+        @param elevation_cache: GeoCoordinatesElevationCache In Front Of The Elevation Lookups (Optional)
+        @param kwargs: Transport Options Passed To GeoCoordinatesBase (session, pool_maxsize, cache, ...)
         """
+        super().__init__(**kwargs)
         self.connection_params = {'output_format': output_format, 'api_key': api_key}
+        self.elevation_cache = elevation_cache
 
     @staticmethod
     def __get_error_msg(error_msg: str):
@@ -54,6 +86,13 @@ class GeoCoordinatesGoogle:
             'result': None
         }
 
+    def geocode(self, location_address: str, coalesce: bool = True) -> dict:
+        """
+        purpose: Default Single Address Lookup Used By The Bulk Methods (get_geo_coordinates_from_google)
+        """
+        return self.get_geo_coordinates_from_google(location_address, coalesce)
+
+    @geocode_lookup
     def get_geo_coordinates_from_google(self, location_address: str) -> dict:
         """
         purpose: Retrieve Latitude and Longitude to a Given Address/Location
@@ -67,39 +106,64 @@ class GeoCoordinatesGoogle:
                 'longitude': Longitude of the Address Provided
               }
         """
-        base_url = 'https://maps.googleapis.com/maps/api/geocode'
-        endpoint = '{}/{}?address={}&key={}'.format(base_url,
-                                                    self.connection_params['output_format'],
-                                                    location_address,
-                                                    self.connection_params['api_key']
-                                                    )
+        endpoint = self._geocode_endpoint(location_address)
 
         try:
             # make the GET request
-            results = requests.get(endpoint).json()
-
-            # check if codes were successfully obtained or not
-            if results['status'] == 'OK':
-                location = results['results'][0]['geometry']['location']
-
-                return {
-                    'status': True,
-                    'message': None,
-                    'result': {
-                        'longitude': location['lng'],
-                        'latitude': location['lat']
-                    }
-                }
-
-            elif results['status'] == 'ZERO_RESULTS':
-                return self.__get_error_msg('Zero Results')
+            response = self._get(endpoint)
+            return self._parse(self._parse_geocode, response.status_code, response.content)
         except ConnectionError:
             return self.__get_error_msg('Connection Error')
         except TypeError:
             return self.__get_error_msg('Type Error')
         except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
             return self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
 
+    def _retryable_body(self, status_code: int, content: bytes) -> bool:
+        """
+        purpose: Google Reports Quota and Server Errors With HTTP 200 and a Status Field In The Body
+        """
+        return status_code == 200 and (b'"OVER_QUERY_LIMIT"' in content or b'"UNKNOWN_ERROR"' in content)
+
+    def _geocode_endpoint(self, location_address: str) -> str:
+        """
+        purpose: Build The Geocoding Request URL For an Address/Location
+        """
+        return '{}/{}?address={}&key={}'.format(self.geocode_url,
+                                                self.connection_params['output_format'],
+                                                location_address,
+                                                self.connection_params['api_key']
+                                                )
+
+    def _parse_geocode(self, status_code: int, content: bytes) -> dict:
+        """
+        purpose: Turn a Geocoding Response Into The Result Dict (Shared By The Sync and Async Clients)
+        @param status_code: HTTP Status Code
+        @param content: Raw Response Body
+        @return: Dict (Same Format As get_geo_coordinates_from_google)
+        """
+        if self._lean() and lean_string(content, 'status') == 'OK':
+            # results[0].geometry.location Is The First "location" Object Of The Body
+            location = lean_object(content, _LOCATION, self.decode)
+            if location is not None:
+                return self._build_result(location['lng'], location['lat'])
+
+        results = self.decode(content)
+
+        # check if codes were successfully obtained or not
+        if results['status'] == 'OK':
+            candidate = results['results'][0]
+            location = candidate['geometry']['location']
+            return self._build_result(location['lng'], location['lat'], candidate, None, results)
+
+        elif results['status'] == 'ZERO_RESULTS':
+            return self.__get_error_msg('Zero Results')
+        elif results['status'] == 'OVER_QUERY_LIMIT':
+            return self.__get_error_msg('Over Query Limit. Please Reduce The Request Rate')
+        else:
+            return self.__get_error_msg('Request Failed With Status {}'.format(results['status']))
+
     def get_altitude_from_google(self, latitude: float, longitude: float):
         """
         purpose: Retrieve Latitude and Longitude to a Given Address/Location
@@ -115,41 +179,192 @@ class GeoCoordinatesGoogle:
                 'altitude': Altitude of the given location
               }
         """
-        base_url = 'https://maps.googleapis.com/maps/api/elevation'
-        endpoint = '{}/{}?locations={},{}&key={}'.format(base_url,
-                                                         self.connection_params['output_format'],
-                                                         latitude,
-                                                         longitude,
-                                                         self.connection_params['api_key']
-                                                         )
+        if self.elevation_cache is not None:
+            altitude = self.elevation_cache.get(latitude, longitude)
+            if altitude is not None:
+                return self._altitude_result(latitude, longitude, altitude)
+
+        endpoint = self._elevation_endpoint('{},{}'.format(latitude, longitude))
 
         try:
             # make the GET request
-            results = requests.get(endpoint).json()
+            results = self._parse(self.decode, self._get(endpoint).content)
 
             # check if codes were successfully obtained or not
             if results['status'] == 'OK':
-                altitude = results['results'][0]['elevation']
-                location = results['results'][0]['location']
-                return {
-                    'status': True,
-                    'message': None,
-                    'result': {
-                        'latitude': location['lat'],
-                        'longitude': location['lng'],
-                        'altitude': altitude
-                    }
-                }
-
-            elif results['status'] == 'ZERO_RESULTS':
-                return self.__get_error_msg('Zero Results')
+                response = self._elevation_result(results['results'][0])
+                self._cache_elevation(latitude, longitude, response)
+                return response
+            else:
+                return self._elevation_error(results['status'])
         except ConnectionError:
             return self.__get_error_msg('Connection Error')
         except TypeError:
             return self.__get_error_msg('Type Error')
         except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
             return self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
 
+    def _elevation_endpoint(self, locations: str) -> str:
+        """
+        purpose: Build The Elevation Request URL For a locations Parameter ('lat,lng', 'lat,lng|lat,lng' or 'enc:...')
+        """
+        return '{}/{}?locations={}&key={}'.format(self.elevation_url,
+                                                  self.connection_params['output_format'],
+                                                  locations,
+                                                  self.connection_params['api_key']
+                                                  )
+
+    @staticmethod
+    def _altitude_result(latitude: float, longitude: float, altitude: float) -> dict:
+        return {
+            'status': True,
+            'message': None,
+            'result': {
+                'latitude': latitude,
+                'longitude': longitude,
+                'altitude': altitude
+            }
+        }
+
+    @classmethod
+    def _elevation_result(cls, result: dict) -> dict:
+        """
+        purpose: Turn One Entry Of an Elevation Response Into The Result Dict
+        """
+        location = result['location']
+        return cls._altitude_result(location['lat'], location['lng'], result['elevation'])
+
+    def _cache_elevation(self, latitude: float, longitude: float, response: dict) -> None:
+        """
+        purpose: Store a Successful Elevation Under The Requested Point (Google May Return It Rounded)
+        """
+        if self.elevation_cache is not None and response['status']:
+            self.elevation_cache.set(latitude, longitude, response['result']['altitude'])
+
+    def _elevation_error(self, status: str) -> dict:
+        """
+        purpose: Turn a Non OK Elevation Status Into an Error Object
+        """
+        if status == 'ZERO_RESULTS':
+            return self.__get_error_msg('Zero Results')
+        elif status == 'OVER_QUERY_LIMIT':
+            return self.__get_error_msg('Over Query Limit. Please Reduce The Request Rate')
+        else:
+            return self.__get_error_msg('Request Failed With Status {}'.format(status))
+
+    def _pack_elevation_requests(self, locations, use_polyline: bool = True):
+        """
+        purpose: Pack Coordinates Into As Few Elevation Requests As The Point and URL Length Limits Allow
+        @param locations: Iterable of (Latitude, Longitude) Pairs
+        @param use_polyline: Send Encoded Polylines (Shorter, Rounded To 5 Decimals) Instead Of 'lat,lng' Lists
+        @return: Generator Yielding (Number of Points, locations Parameter)
+        """
+        prefix = 'enc:' if use_polyline else ''
+        fixed_length = len(self._elevation_endpoint(prefix))
+        count, parts, length, previous = 0, [], fixed_length, (0, 0)
+
+        for latitude, longitude in locations:
+            for _ in range(2):
+                if use_polyline:
+                    point = (int(round(latitude * 1e5)), int(round(longitude * 1e5)))
+                    part = quote(_encode_polyline_value(point[0] - previous[0]) +
+                                 _encode_polyline_value(point[1] - previous[1]), safe='')
+                else:
+                    part = '{}{},{}'.format('%7C' if count else '', latitude, longitude)
+
+                if count and (count >= self.max_elevation_locations or length + len(part) > self.max_url_length):
+                    # Full: Send The Current Request and Encode This Point Again As The First Of The Next One
+                    yield count, prefix + ''.join(parts)
+                    count, parts, length, previous = 0, [], fixed_length, (0, 0)
+                    continue
+                break
+
+            count += 1
+            parts.append(part)
+            length += len(part)
+            if use_polyline:
+                previous = point
+
+        if count:
+            yield count, prefix + ''.join(parts)
+
+    def _get_elevation_batch(self, request: tuple) -> list:
+        """
+        purpose: Send One Packed Elevation Request
+        @param request: (Number of Points, locations Parameter)
+        @return: List of Result Dicts, One Per Point
+        """
+        count, locations = request
+        try:
+            results = self._parse(self.decode, self._get(self._elevation_endpoint(locations)).content)
+            if results['status'] == 'OK':
+                return [self._elevation_result(result) for result in results['results']]
+            error = self._elevation_error(results['status'])
+        except ConnectionError:
+            error = self.__get_error_msg('Connection Error')
+        except TypeError:
+            error = self.__get_error_msg('Type Error')
+        except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
+            error = self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+        return [error] * count
+
+    def get_bulk_altitude_from_google(self, locations, workers: int = 4, use_polyline: bool = True,
+                                      as_columns: bool = False):
+        """
+        purpose: Retrieve Altitude Information For Many Latitude and Longitude Pairs
+        Points Are Packed Into The Largest Requests Allowed (max_elevation_locations Points, max_url_length
+        Characters), The Requests Are Sent Concurrently and The Results Are Returned In The Original Order.
+        @param locations: Iterable of (Latitude, Longitude) Pairs
+        @param workers: Number of Concurrent Requests
+        @param use_polyline: Send Encoded Polylines (Fits More Points Per Request, Coordinates Rounded To 5 Decimals)
+        @param as_columns: Return a GeoCoordinatesColumns Instead Of a Dict Per Location (For Very Large Inputs)
+        @return: List of Dicts (Same Format As get_altitude_from_google), One Per Location (or GeoCoordinatesColumns)
+        """
+        results = GeoCoordinatesColumns() if as_columns else []
+        if self.elevation_cache is not None:
+            results.extend(self._get_cached_elevations(list(locations), workers, use_polyline))
+            return results
+
+        for batch in imap_ordered(self._get_elevation_batch, self._pack_elevation_requests(locations, use_polyline),
+                                  workers):
+            results.extend(batch)
+        return results
+
+    def _get_cached_elevations(self, locations: list, workers: int = 4, use_polyline: bool = True) -> list:
+        """
+        purpose: Look Up Elevations Through The Elevation Cache, Requesting One Point Per Uncached Cell
+        @param locations: List of (Latitude, Longitude) Pairs
+        @return: List of Result Dicts, One Per Location
+        """
+        cache = self.elevation_cache
+        results = [None] * len(locations)
+        # Cell Key -> Indices Of The Uncached Points In It (Only The First One Is Requested)
+        missing = {}
+        for index, (latitude, longitude) in enumerate(locations):
+            altitude = cache.get(latitude, longitude)
+            if altitude is not None:
+                results[index] = self._altitude_result(latitude, longitude, altitude)
+            else:
+                missing.setdefault(cache.cell_key(latitude, longitude), []).append(index)
+
+        requested = [locations[indices[0]] for indices in missing.values()]
+        responses = []
+        for batch in imap_ordered(self._get_elevation_batch, self._pack_elevation_requests(requested, use_polyline),
+                                  workers):
+            responses.extend(batch)
+
+        for indices, response in zip(missing.values(), responses):
+            self._cache_elevation(*locations[indices[0]], response)
+            for index in indices:
+                if response['status']:
+                    latitude, longitude = locations[index]
+                    results[index] = self._altitude_result(latitude, longitude, response['result']['altitude'])
+                else:
+                    results[index] = response
+        return results
+
     def get_address_altitude_from_google(self, location_address: str):
         """
         purpose: Retrieve Latitude and Longitude to a Given Address/Location
@@ -187,4 +402,87 @@ class GeoCoordinatesGoogle:
         except TypeError:
             return self.__get_error_msg('Type Error')
         except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
             return self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+
+    def _elevate_located(self, located: list, results: dict) -> None:
+        """
+        purpose: Look Up The Altitude Of Geocoded Rows and Store The Final Result Of Each Row
+        @param located: List of (Row Index, Latitude, Longitude)
+        @param results: Dict Of Row Index To Result Dict, Filled In Place
+        """
+        rows = iter(located)
+        locations = [(latitude, longitude) for _, latitude, longitude in located]
+        if self.elevation_cache is not None:
+            for response in self._get_cached_elevations(locations, workers=1):
+                results[next(rows)[0]] = response
+            return
+
+        for request in self._pack_elevation_requests(locations):
+            for response in self._get_elevation_batch(request):
+                results[next(rows)[0]] = response
+
+    def get_bulk_address_altitude_from_google(self, location_addresses, geocode_workers: int = 8,
+                                              elevation_workers: int = 2, batch_wait: float = 0.2) -> list:
+        """
+        purpose: Retrieve Altitude Information For Many Addresses/Locations
+        Geocoding and Elevation Run As Two Concurrent Stages: Geocoded Rows Are Queued and The Elevation Stage
+        Drains The Queue In Batches, So Throughput Approaches The Slower API Instead Of The Sum Of Both.
+        @param location_addresses: Iterable of Addresses/Locations
+        @param geocode_workers: Number of Concurrent Geocoding Requests
+        @param elevation_workers: Number of Concurrent Elevation Requests
+        @param batch_wait: Seconds The Elevation Stage Waits For More Geocoded Rows Before Sending a Partial Batch
+        @return: List of Dicts (Same Format As get_address_altitude_from_google) In The Same Order As The Input
+            (An Exception Raised While Reading location_addresses Is Raised Here, Not Returned As a Short List)
+        """
+        located = queue.Queue(maxsize=self.max_elevation_locations * 4)
+        results = {}
+        errors = []
+
+        def geocode_stage():
+            try:
+                for index, response in enumerate(imap_ordered(self._geocode_row, location_addresses,
+                                                              geocode_workers)):
+                    located.put((index, response))
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                located.put(None)
+
+        producer = threading.Thread(target=geocode_stage, daemon=True)
+        producer.start()
+
+        with ThreadPoolExecutor(max_workers=elevation_workers) as executor:
+            futures = []
+            done = False
+            while not done:
+                batch = []
+                item = located.get()
+                while True:
+                    if item is None:
+                        done = True
+                        break
+
+                    index, response = item
+                    if response and response['status']:
+                        batch.append((index, response['result']['latitude'], response['result']['longitude']))
+                    else:
+                        results[index] = response or self.__get_error_msg('No Response')
+
+                    if len(batch) >= self.max_elevation_locations:
+                        break
+                    try:
+                        item = located.get(timeout=batch_wait)
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    futures.append(executor.submit(self._elevate_located, batch, results))
+
+            producer.join()
+            for future in futures:
+                future.result()
+
+        if errors:
+            raise errors[0]
+        return [results[index] for index in range(len(results))]
@@ -0,0 +1,216 @@
+"""
+Purpose:
+This Module Sends Hedged Requests To Cut Tail Latency: If The Primary Provider Has Not Answered Within a
+Percentile Of Its Recent Latencies, The Same Address Is Also Sent To a Secondary Provider (or Again To The
+Primary). The First Successful Answer Wins and The Other Request Is Cancelled.
+
+When The Hedge Goes To The Primary Again, It Bypasses The Provider's single_flight, Which Would Otherwise Make It
+Wait On The Very Request It Is Hedging.
+
+GeoCoordinatesHedge: Hedging For The Sync Provider Classes (Threads)
+GeoCoordinatesHedgeAsync: Hedging For The asyncio Clients (The Losing Request Is Cancelled)
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from GeoCoordinatesBulk import GeoCoordinatesBulkMixin
+
+
+class _HedgeStatsMixin:
+
+    def _init_stats(self, delay_percentile: float, initial_delay: float, min_delay: float, window: int) -> None:
+        self.delay_percentile = delay_percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.calls = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self._latencies = deque(maxlen=window)
+        self._stats_lock = threading.Lock()
+
+    def hedge_delay(self) -> float:
+        """
+        purpose: Return How Long To Wait For The Primary Before Hedging (delay_percentile Of Its Recent Latencies)
+        """
+        with self._stats_lock:
+            if len(self._latencies) < 20:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.delay_percentile))
+        return max(self.min_delay, latencies[index])
+
+    def _hedge_options(self) -> dict:
+        """
+        purpose: Keyword Arguments Of The Hedge Request (It Must Not Join The Primary's In-Flight Request)
+        """
+        if self.secondary is self.primary and getattr(self.primary, 'single_flight', None) is not None:
+            return {'coalesce': False}
+        return {}
+
+    def _record_latency(self, latency: float) -> None:
+        with self._stats_lock:
+            self._latencies.append(latency)
+
+    def _count(self, fired: bool, won: bool) -> None:
+        with self._stats_lock:
+            self.calls += 1
+            self.hedges_fired += 1 if fired else 0
+            self.hedges_won += 1 if won else 0
+
+    def stats(self) -> dict:
+        """
+        purpose: Return The Hedging Counters
+        @return: Dict
+            {
+                'calls': Lookups Made,
+                'hedges_fired': Lookups Where The Hedge Request Was Sent,
+                'hedges_won': Lookups Answered By The Hedge Request,
+                'hedge_delay': Current Delay Before Hedging In Seconds
+            }
+        """
+        delay = self.hedge_delay()
+        with self._stats_lock:
+            return {'calls': self.calls, 'hedges_fired': self.hedges_fired, 'hedges_won': self.hedges_won,
+                    'hedge_delay': delay}
+
+
+class GeoCoordinatesHedge(GeoCoordinatesBulkMixin, _HedgeStatsMixin):
+
+    def __init__(self, primary, secondary=None, delay_percentile: float = 0.95, initial_delay: float = 1.0,
+                 min_delay: float = 0.05, window: int = 500, max_workers: int = 32) -> None:
+        """
+        Class Initializer
+        @param primary: Provider Instance Asked First
+        @param secondary: Provider Instance Used For The Hedge Request (Default: The Primary Again)
+        @param delay_percentile: Percentile Of The Primary's Recent Latencies To Wait Before Hedging
+        @param initial_delay: Delay Used Until Enough Latencies Have Been Seen
+        @param min_delay: Lower Bound Of The Delay
+        @param window: Number of Recent Primary Latencies Kept
+        @param max_workers: Threads Available For Requests (Abandoned Requests Keep a Thread Until They Return)
+        """
+        self.primary = primary
+        self.secondary = secondary if secondary is not None else primary
+        self.provider_name = primary.provider_name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._init_stats(delay_percentile, initial_delay, min_delay, window)
+
+    def _call(self, provider, location_address: str, **options) -> dict:
+        try:
+            return provider.geocode(location_address, **options) or self._get_error_msg('No Response')
+        except Exception as e:
+            return self._get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+
+    def geocode(self, location_address: str) -> dict:
+        """
+        purpose: Retrieve Latitude and Longitude to a Given Address/Location, Hedging Slow Primary Requests
+        @param location_address: Latitude and Longitude needed Address/Location
+        @return: Dict (Same Format As The Provider Methods)
+        """
+        start = time.monotonic()
+        primary = self._executor.submit(self._call, self.primary, location_address)
+        primary.add_done_callback(lambda _: self._record_latency(time.monotonic() - start))
+
+        done, _ = wait([primary], timeout=self.hedge_delay())
+        if done and primary.result()['status']:
+            self._count(fired=False, won=False)
+            return primary.result()
+
+        # Slow (or Failed) Primary: Send The Hedge and Take The First Successful Answer
+        secondary = self._executor.submit(self._call, self.secondary, location_address, **self._hedge_options())
+        pending = {primary, secondary}
+        response = None
+        won = False
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if response is None or not response['status']:
+                    response = future.result()
+                    won = future is secondary
+            if response['status']:
+                break
+
+        for future in pending:
+            future.cancel()
+        self._count(fired=True, won=won and response['status'])
+        return response
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class GeoCoordinatesHedgeAsync(_HedgeStatsMixin):
+
+    def __init__(self, primary, secondary=None, delay_percentile: float = 0.95, initial_delay: float = 1.0,
+                 min_delay: float = 0.05, window: int = 500) -> None:
+        """
+        Class Initializer
+        @param primary: Async Client (GeoCoordinatesAsync) Asked First
+        @param secondary: Async Client Used For The Hedge Request (Default: The Primary Again)
+        @param delay_percentile: Percentile Of The Primary's Recent Latencies To Wait Before Hedging
+        @param initial_delay: Delay Used Until Enough Latencies Have Been Seen
+        @param min_delay: Lower Bound Of The Delay
+        @param window: Number of Recent Primary Latencies Kept
+        """
+        self.primary = primary
+        self.secondary = secondary if secondary is not None else primary
+        self._init_stats(delay_percentile, initial_delay, min_delay, window)
+
+    @staticmethod
+    async def _call(client, location_address: str, **options) -> dict:
+        try:
+            return (await client.geocode(location_address, **options)
+                    or GeoCoordinatesBulkMixin._get_error_msg('No Response'))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return GeoCoordinatesBulkMixin._get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+
+    @staticmethod
+    def _result(task) -> dict:
+        if task.cancelled():
+            return GeoCoordinatesBulkMixin._get_error_msg('Request Cancelled')
+        return task.result()
+
+    async def geocode(self, location_address: str) -> dict:
+        """
+        purpose: Retrieve Latitude and Longitude to a Given Address/Location, Hedging Slow Primary Requests
+        @param location_address: Latitude and Longitude needed Address/Location
+        @return: Dict (Same Format As The Provider Methods)
+        """
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._call(self.primary, location_address))
+        # A Cancelled Primary Records The Time It Had Run (a Lower Bound Of Its Latency), Otherwise Only The Fast
+        # Requests Would Be Kept and The Hedge Delay Would Drift Down
+        primary.add_done_callback(lambda _: self._record_latency(time.monotonic() - start))
+
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if done and self._result(primary)['status']:
+                self._count(fired=False, won=False)
+                return self._result(primary)
+
+            secondary = asyncio.ensure_future(self._call(self.secondary, location_address, **self._hedge_options()))
+            pending = {primary, secondary}
+            response = None
+            won = False
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if response is None or not response['status']:
+                        response = self._result(task)
+                        won = task is secondary
+                if response['status']:
+                    break
+            self._count(fired=True, won=won and response['status'])
+            return response
+        finally:
+            # The Losing Request (or Both, If The Caller Was Cancelled) Is Cancelled, Which Releases Its Connection
+            for task in pending:
+                task.cancel()
@@ -11,22 +11,29 @@ Kevin Patel (GitHub Username: PatelKeviin)
 Sponsor: DataDisca Pty Ltd. Australia
 https://github.com/DataDisca
 """
-import logging
-import requests
+from GeoCoordinatesBase import GeoCoordinatesBase, geocode_lookup, DETAIL_RAW
+from GeoCoordinatesLogging import get_logger
+from GeoCoordinatesJSON import lean_pattern, lean_object
 
+logger = get_logger(__name__)
 
-class GeoCoordinatesHere:
-    # Set Log Level
-    logging.basicConfig(filename='./log/google_log.txt', level=logging.INFO)
+_POSITION = lean_pattern('position')
 
+
+class GeoCoordinatesHere(GeoCoordinatesBase):
     # Class Variables
+    provider_name = 'here'
     connection_params: dict = {}
+    geocode_url = 'https://geocode.search.hereapi.com/v1/geocode'
+    default_fields = ('title', 'resultType', 'address.label')
 
-    def __init__(self, api_key: str) -> None:
+    def __init__(self, api_key: str, **kwargs) -> None:
         """
         Class Initializer
         @param api_key: Here API Key
+        @param kwargs: Transport Options Passed To GeoCoordinatesBase (session, pool_maxsize, cache, ...)
         """
+        super().__init__(**kwargs)
         self.connection_params = {'api_key': api_key}
 
     @staticmethod
@@ -47,6 +54,13 @@ class GeoCoordinatesHere:
             'result': None
         }
 
+    def geocode(self, location_address: str, coalesce: bool = True) -> dict:
+        """
+        purpose: Default Single Address Lookup Used By The Bulk Methods (get_geo_coordinates_from_here)
+        """
+        return self.get_geo_coordinates_from_here(location_address, coalesce)
+
+    @geocode_lookup
     def get_geo_coordinates_from_here(self, location_address: str) -> dict:
         """
         purpose: Retrieve Latitude and Longitude to a Given Address/Location
@@ -60,42 +74,62 @@ class GeoCoordinatesHere:
                 'longitude': Longitude of the Address Provided
               }
         """
-        base_url = 'https://geocode.search.hereapi.com/v1/geocode'
-        endpoint = '{}?q={}&apiKey={}'.format(base_url,
-                                              location_address,
-                                              self.connection_params['api_key']
-                                              )
+        endpoint = self._geocode_endpoint(location_address)
 
         try:
             # make the GET request
-            results = requests.get(endpoint)
-
-            # check if codes were successfully obtained or not
-            if results.status_code == 200:
-                items = results.json().get('items')
-                if len(items) > 0:
-                    location = items[0]['position']
-
-                    return {
-                        'status': True,
-                        'message': None,
-                        'result': {
-                            'longitude': location['lng'],
-                            'latitude': location['lat']
-                        }
-                    }
-                else:
-                    return self.__get_error_msg('Unknown Location. No Results Found')
-            elif results.status_code == 400:
-                return self.__get_error_msg('Request Failed Validation. Please Check your API key')
-            elif results.status_code == 503:
-                return self.__get_error_msg('Temporary Server Error. Please Check back again in a short while')
-            else:
-                return self.__get_error_msg('Some Unknown Error Occurred While Sending Request To Server')
+            response = self._get(endpoint)
+            return self._parse(self._parse_geocode, response.status_code, response.content)
 
         except ConnectionError:
             return self.__get_error_msg('Connection Error')
         except TypeError:
             return self.__get_error_msg('Type Error')
         except Exception as e:
+            logger.debug('Unknown Error Occurred', exc_info=True)
             return self.__get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+
+    def _geocode_endpoint(self, location_address: str) -> str:
+        """
+        purpose: Build The Geocoding Request URL For an Address/Location
+        """
+        endpoint = '{}?q={}&apiKey={}'.format(self.geocode_url,
+                                              location_address,
+                                              self.connection_params['api_key']
+                                              )
+        # Only The Best Item Is Used Unless The Raw Response Is Kept
+        if self._detail() != DETAIL_RAW:
+            endpoint += '&limit=1'
+        return endpoint
+
+    def _parse_geocode(self, status_code: int, content: bytes) -> dict:
+        """
+        purpose: Turn a Geocoding Response Into The Result Dict (Shared By The Sync and Async Clients)
+        @param status_code: HTTP Status Code
+        @param content: Raw Response Body
+        @return: Dict (Same Format As get_geo_coordinates_from_here)
+        """
+        # check if codes were successfully obtained or not
+        if status_code == 200:
+            if self._lean():
+                # items[0].position Is The First "position" Object Of The Body
+                location = lean_object(content, _POSITION, self.decode)
+                if location is not None:
+                    return self._build_result(location['lng'], location['lat'])
+
+            results = self.decode(content)
+            items = results.get('items')
+            if len(items) > 0:
+                location = items[0]['position']
+                score = items[0].get('scoring', {}).get('queryScore')
+                return self._build_result(location['lng'], location['lat'], items[0], score, results)
+            else:
+                return self.__get_error_msg('Unknown Location. No Results Found')
+        elif status_code == 400:
+            return self.__get_error_msg('Request Failed Validation. Please Check your API key')
+        elif status_code == 429:
+            return self.__get_error_msg('Too Many Requests. Please Reduce The Request Rate')
+        elif status_code == 503:
+            return self.__get_error_msg('Temporary Server Error. Please Check back again in a short while')
+        else:
+            return self.__get_error_msg('Some Unknown Error Occurred While Sending Request To Server')
@@ -0,0 +1,98 @@
+"""
+Purpose:
+This Module Contains The JSON Decoding Used By The Provider Classes: a Pluggable Decoder (orjson When Installed,
+The Standard Library Otherwise) and a Lean Path That Reads Only The Fields a Coordinates Lookup Needs.
+
+The Lean Path Finds The First "key": { ... } Object In The Raw Body With a Regular Expression and Decodes Just
+That Flat Object (e.g. {"lat": 43.6, "lng": -116.2}), So The Rest Of The Response (address_components,
+viewport, ...) Is Never Turned Into Python Objects. Anything Unexpected Returns None and The Caller Falls Back
+To The Full Decode.
+
+get_decoder: Return a Decoder For a Backend Name ('auto', 'orjson', 'json') or a Callable
+lean_pattern: Compile The Pattern Matching a Key Followed By an Object
+lean_object: Decode The First Flat Object Under a Key
+lean_string: Read The First String Value Under a Key (e.g. "status")
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Backend Used With 'auto'
+DEFAULT_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def get_decoder(backend='auto'):
+    """
+    purpose: Return The Function Decoding a Response Body
+    @param backend: 'auto' (orjson If Installed, Else The Standard Library), 'orjson', 'json', or a Callable
+        Taking bytes/str and Returning The Decoded Object
+    @return: Callable
+    """
+    if callable(backend):
+        return backend
+    if backend == 'auto':
+        backend = DEFAULT_BACKEND
+    if backend == 'orjson':
+        if orjson is None:
+            raise ImportError('The orjson Backend Needs orjson. Please Install It With: pip install orjson')
+        return orjson.loads
+    if backend == 'json':
+        return json.loads
+    raise ValueError('Unsupported JSON Backend: {}'.format(backend))
+
+
+def lean_pattern(key: str):
+    """
+    purpose: Compile The Pattern Matching "key": { In a Raw Response Body (Any Whitespace Around The Colon)
+    """
+    return re.compile(b'"' + re.escape(key.encode('utf-8')) + rb'"\s*:\s*\{')
+
+
+def lean_object(content, pattern, decode) -> dict:
+    """
+    purpose: Decode Only The First Object Matched By pattern
+    @param content: Raw Response Body (bytes)
+    @param pattern: Compiled Pattern From lean_pattern
+    @param decode: Decoder From get_decoder
+    @return: Dict, or None If The Key Is Missing, The Object Is Nested or It Does Not Decode
+    """
+    if not isinstance(content, bytes):
+        return None
+    match = pattern.search(content)
+    if match is None:
+        return None
+    start = match.end() - 1
+    end = content.find(b'}', start)
+    # Only Flat Objects: a Nested One Would End At The Inner Brace
+    if end < 0 or content.find(b'{', start + 1, end) >= 0:
+        return None
+    try:
+        value = decode(content[start:end + 1])
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+_string_patterns = {}
+
+
+def lean_string(content, key: str) -> str:
+    """
+    purpose: Read The First Plain String Value Of a Key (e.g. "status": "OK") Without Decoding The Body
+    @param content: Raw Response Body (bytes)
+    @param key: Key Name
+    @return: The Value, or None If It Is Missing or Has Escapes
+    """
+    pattern = _string_patterns.get(key)
+    if pattern is None:
+        pattern = _string_patterns[key] = re.compile(
+            b'"' + re.escape(key.encode('utf-8')) + rb'"\s*:\s*"([^"\\]*)"')
+    match = pattern.search(content) if isinstance(content, bytes) else None
+    return match.group(1).decode('utf-8') if match else None
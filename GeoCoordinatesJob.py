@@ -0,0 +1,214 @@
+"""
+Purpose:
+This Class Contains a Resumable Bulk Geocoding Job. Results Are Committed To a Local SQLite File In Input Order,
+So a Job That Dies Part Way Can Be Restarted and Continues After The Last Committed Row.
+
+A Chunk Where (Almost) Every Row Failed On a Systemic Error (Quota Used Up, Bad Credentials, Circuit Open, Network
+Down, Server Error) Is Not Committed and The Run Stops, So a Restart Redoes It. Rows That Failed On Their Own (e.g.
+Zero Results) Are Always Committed With Status False; Failed Rows Can Be Geocoded Again With retry_failed.
+
+GeoCoordinatesJob: Run, Resume, Retry, Inspect and Export a Bulk Geocoding Job
+JobStoppedError: Raised When a Run Stops On a Systemic Error
+is_systemic_error: True If a Result's Error Message Points To a Systemic Error Rather Than The Address
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import itertools
+import json
+import sqlite3
+
+from GeoCoordinatesStream import merge_result, write_records
+
+# Error Messages (or Parts Of Them) Of Failures That Would Hit Every Row, Not Just The One Address
+SYSTEMIC_ERRORS = (
+    'Connection Error',
+    'Too Many Requests',
+    'Over Query Limit',
+    'Temporary Server Error',
+    'Some Unknown Error Occurred While Sending Request To Server',
+    'Request Failed Validation',
+    'Request Failed With Status REQUEST_DENIED',
+    'Request Failed With Status UNKNOWN_ERROR',
+    'Username or Password is not Set',
+    'Circuit Open For',
+    'No Provider Available',
+)
+
+
+def is_systemic_error(message: str) -> bool:
+    """
+    purpose: Check If an Error Message Is Caused By Quota, Credentials, Connection, Circuit Breaker or Server Errors
+    @param message: The 'message' Of a Failed Result
+    @return: True For a Systemic Error, False For a Per-Row Outcome (e.g. 'Zero Results', 'Unknown Location')
+    """
+    return message is not None and any(error in message for error in SYSTEMIC_ERRORS)
+
+
+class JobStoppedError(Exception):
+
+    def __init__(self, row: int, failed: int, rows: int, message: str) -> None:
+        super().__init__('Job Stopped At Row {}: {} Of {} Rows Failed. Last Error: {}'.format(
+            row, failed, rows, message))
+        self.row = row
+
+
+class GeoCoordinatesJob:
+
+    def __init__(self, provider, path: str, address_field: str = 'address', workers: int = 8,
+                 commit_every: int = 500, max_failure_rate: float = 1.0) -> None:
+        """
+        Class Initializer
+        @param provider: GeoCoordinatesGoogle, GeoCoordinatesHere or GeoCoordinatesArcGIS Instance
+            (ArcGIS Instances With Credentials Use The batch_geocode Path)
+        @param path: SQLite File Holding The Job's Progress and Results
+        @param address_field: Key Holding The Address When The Input Records Are Dicts
+        @param workers: Number of Concurrent Requests
+        @param commit_every: Rows Geocoded and Committed Together (The Most Work Lost When a Job Dies)
+        @param max_failure_rate: Share Of Rows Failing On a Systemic Error (is_systemic_error) At Which a Chunk Is
+            Not Committed and JobStoppedError Is Raised (Default: Only When Every Row Did; None = Never Stop).
+            Per-Row Failures Such As Zero Results Never Stop a Run
+        """
+        self.provider = provider
+        self.path = path
+        self.address_field = address_field
+        self.workers = workers
+        self.commit_every = commit_every
+        self.max_failure_rate = max_failure_rate
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS job_results '
+                                 '(row INTEGER PRIMARY KEY, status INTEGER NOT NULL, record TEXT NOT NULL)')
+        self._connection.commit()
+
+    def completed_rows(self) -> int:
+        """
+        purpose: Return The Number of Rows Already Committed (The Offset a Restarted Job Resumes From)
+        """
+        row = self._connection.execute('SELECT MAX(row) FROM job_results').fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def run(self, records) -> dict:
+        """
+        purpose: Geocode The Input, Skipping The Rows Committed By Earlier Runs Of The Same Job
+        The Input Must Yield The Same Records In The Same Order Every Time The Job Is Run.
+        @param records: Iterable of Dicts (e.g. read_records) or of Address Strings
+        @return: Dict
+            {
+                'skipped': Rows Already Done Before This Run,
+                'processed': Rows Geocoded In This Run,
+                'failed': Rows Of This Run Whose Status Is False
+            }
+        """
+        skipped = self.completed_rows()
+        rows = itertools.islice(records, skipped, None)
+        offset = skipped
+        failed = 0
+
+        while True:
+            chunk = list(itertools.islice(rows, self.commit_every))
+            if not chunk:
+                break
+
+            failed += self._geocode_chunk(range(offset, offset + len(chunk)), chunk)
+            offset += len(chunk)
+
+        return {'skipped': skipped, 'processed': offset - skipped, 'failed': failed}
+
+    def retry_failed(self) -> dict:
+        """
+        purpose: Geocode The Committed Rows Whose Status Is False Again (e.g. After a Quota Reset), Replacing
+        Their Results
+        @return: Dict
+            {
+                'retried': Rows Geocoded Again,
+                'failed': Rows Still Failing
+            }
+        """
+        last_row = -1
+        retried = 0
+        failed = 0
+        while True:
+            chunk = self._connection.execute('SELECT row, record FROM job_results WHERE status = 0 AND row > ? '
+                                             'ORDER BY row LIMIT ?', (last_row, self.commit_every)).fetchall()
+            if not chunk:
+                break
+
+            row_numbers = [row for row, _ in chunk]
+            failed += self._geocode_chunk(row_numbers, [json.loads(record) for _, record in chunk])
+            retried += len(chunk)
+            last_row = row_numbers[-1]
+
+        return {'retried': retried, 'failed': failed}
+
+    def _geocode_chunk(self, row_numbers, chunk: list) -> int:
+        """
+        purpose: Geocode a Chunk Of Records and Commit Their Results In One Transaction
+        @param row_numbers: Row Number Of Each Record
+        @param chunk: Input Records (Dicts or Address Strings)
+        @return: Number of Failed Rows
+        """
+        addresses = [record[self.address_field] if isinstance(record, dict) else record for record in chunk]
+        responses = self.provider.geocode_batch(addresses, self.workers)
+
+        values = []
+        failed = 0
+        systemic = 0
+        message = None
+        for row, record, response in zip(row_numbers, chunk, responses):
+            record = merge_result(record, response, self.address_field)
+            if not record['status']:
+                failed += 1
+                if is_systemic_error(record['message']):
+                    systemic += 1
+                    message = record['message']
+            values.append((row, int(bool(record['status'])), json.dumps(record)))
+
+        if self.max_failure_rate is not None and systemic and systemic >= self.max_failure_rate * len(values):
+            # Quota, Outage or Network Error: Leave The Chunk Uncommitted So a Restart Redoes It
+            raise JobStoppedError(values[0][0], systemic, len(values), message)
+
+        # One Transaction Per Chunk: a Chunk Is Either Fully Recorded Or Redone On Restart
+        with self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO job_results (row, status, record) '
+                                         'VALUES (?, ?, ?)', values)
+        return failed
+
+    def progress(self) -> dict:
+        """
+        purpose: Return The Job's Progress
+        @return: Dict
+            {
+                'completed': Rows Committed,
+                'failed': Committed Rows Whose Status Is False
+            }
+        """
+        failed = self._connection.execute('SELECT COUNT(*) FROM job_results WHERE status = 0').fetchone()[0]
+        return {'completed': self.completed_rows(), 'failed': failed}
+
+    def results(self):
+        """
+        purpose: Read The Committed Results Back In Input Order
+        @return: Generator Yielding a Dict Per Row (The Input Record With status, message, latitude, longitude)
+        """
+        cursor = self._connection.execute('SELECT record FROM job_results ORDER BY row')
+        for (record,) in cursor:
+            yield json.loads(record)
+
+    def export(self, output_path: str, file_format: str = None) -> int:
+        """
+        purpose: Write The Committed Results To a CSV or JSONL File
+        @param output_path: Output File
+        @param file_format: 'csv' or 'jsonl' (Default: Guessed From The File Extension)
+        @return: Number of Records Written
+        """
+        return write_records(self.results(), output_path, file_format)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,150 @@
+"""
+Purpose:
+This Module Contains The Logging Setup Of The Library. Every Module Logs To Its Own Named Logger Under The
+'GeoCoordinates' Logger (e.g. 'GeoCoordinates.GeoCoordinatesGoogle'), Which Has Only a NullHandler, So Importing
+The Library Neither Configures Logging Nor Touches The Disk. Applications Either Configure The 'GeoCoordinates'
+Logger Themselves or Call configure_logging.
+
+Log Levels Used:
+    DEBUG: One Line Per Request (High Volume, Sample It)
+    INFO: Retried Attempts
+    WARNING: Circuit Breaker State Changes
+
+get_logger: Return The Named Logger Of a Library Module
+configure_logging: Attach a (By Default Queue Based, Non-Blocking) Handler To The Library Loggers
+stop_logging: Flush and Remove The Handler Added By configure_logging
+GeoCoordinatesLogSampler: Filter Passing Only a Share Of The Low Level Records
+GeoCoordinatesQueueHandler: QueueHandler That Drops Records Instead Of Blocking When Its Queue Is Full
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+
+LOGGER_NAME = 'GeoCoordinates'
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+# Handler Installed By configure_logging (Only One At a Time)
+_installed = None
+_installed_lock = threading.Lock()
+
+
+def get_logger(module_name: str) -> logging.Logger:
+    """
+    purpose: Return The Logger Of a Library Module
+    @param module_name: The Module's __name__
+    @return: logging.Logger Named 'GeoCoordinates.<module_name>'
+    """
+    return logging.getLogger(LOGGER_NAME).getChild(module_name)
+
+
+class GeoCoordinatesLogSampler(logging.Filter):
+
+    def __init__(self, rate: float = 0.01, max_level: int = logging.DEBUG) -> None:
+        """
+        Class Initializer
+        @param rate: Share Of The Records At or Below max_level That Are Kept (0 To 1)
+        @param max_level: Highest Level That Is Sampled; Records Above It Are Always Kept
+        """
+        super().__init__()
+        self.rate = rate
+        self.max_level = max_level
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or random.random() < self.rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class GeoCoordinatesQueueHandler(logging.handlers.QueueHandler):
+
+    def __init__(self, target: logging.Handler, queue_size: int = 10000) -> None:
+        """
+        Class Initializer
+        @param target: Handler Doing The Actual (Blocking) Output, Called From a Background Thread
+        @param queue_size: Maximum Number of Records Waiting; Further Records Are Dropped and Counted
+        """
+        super().__init__(queue.Queue(queue_size))
+        self.target = target
+        self.dropped = 0
+        self.listener = logging.handlers.QueueListener(self.queue, target, respect_handler_level=True)
+        self.listener.start()
+        self._closed = False
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # The Caller Must Never Wait On The Disk
+            self.dropped += 1
+
+    def close(self) -> None:
+        """
+        purpose: Write Out The Queued Records, Then Stop The Background Thread and Close The Target Handler
+        Safe To Call Twice (logging Also Closes Handlers At Exit).
+        """
+        if not self._closed:
+            self._closed = True
+            self.listener.stop()
+            self.target.close()
+        super().close()
+
+
+def configure_logging(filename: str = None, level: int = logging.INFO, asynchronous: bool = True,
+                      sample_rate: float = 1.0, sample_max_level: int = logging.DEBUG, queue_size: int = 10000,
+                      fmt: str = DEFAULT_FORMAT) -> logging.Handler:
+    """
+    purpose: Send The Library's Logs To a File (or stderr), Replacing a Handler Added Earlier By This Function
+    @param filename: Log File (Its Directory Is Created If Missing). Logs Go To stderr If Not Given
+    @param level: Lowest Level Logged (logging.DEBUG Adds One Line Per Request)
+    @param asynchronous: Hand Records To a Background Thread Through a Bounded Queue, So Callers Never Block
+    @param sample_rate: Share Of The Records At or Below sample_max_level That Are Kept
+    @param sample_max_level: Highest Level That Is Sampled (Default: Only The Per Request DEBUG Lines)
+    @param queue_size: Maximum Number of Records Waiting In The Queue (asynchronous Only)
+    @param fmt: Log Record Format
+    @return: The Handler Attached To The 'GeoCoordinates' Logger
+    """
+    if filename:
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+        target = logging.FileHandler(filename, encoding='utf-8', delay=True)
+    else:
+        target = logging.StreamHandler()
+    target.setFormatter(logging.Formatter(fmt))
+
+    handler = GeoCoordinatesQueueHandler(target, queue_size) if asynchronous else target
+    if sample_rate < 1.0:
+        # Sampled On The Caller's Side, So Dropped Records Are Never Formatted Or Queued
+        handler.addFilter(GeoCoordinatesLogSampler(sample_rate, sample_max_level))
+
+    global _installed
+    with _installed_lock:
+        logger = logging.getLogger(LOGGER_NAME)
+        if _installed is not None:
+            logger.removeHandler(_installed)
+            _installed.close()
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        _installed = handler
+    return handler
+
+
+def stop_logging() -> None:
+    """
+    purpose: Flush and Remove The Handler Added By configure_logging (The Library Goes Back To Not Logging)
+    """
+    global _installed
+    with _installed_lock:
+        if _installed is not None:
+            logging.getLogger(LOGGER_NAME).removeHandler(_installed)
+            _installed.close()
+            _installed = None
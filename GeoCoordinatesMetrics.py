@@ -0,0 +1,326 @@
+"""
+Purpose:
+This Class Contains The Metrics Layer Of The Provider Classes. Pass a GeoCoordinatesMetrics As metrics= To Any
+Provider To Collect Per Phase Latency Histograms, Counters Per HTTP Status and Error Class, Cache and Retry
+Counters and In-Flight Gauges. Without One, The Providers Skip All Measuring.
+
+Latency Phases (Seconds):
+    rate_limit: Waiting On The Rate Limiter
+    connect: DNS Lookup and TCP Connect Of a New Connection (Reused Connections Skip It)
+    tls: TLS Handshake Of a New Connection
+    server: Request Sent Until The Response Headers Arrive, Excluding connect and tls
+    download: Reading The Response Body
+    parse: JSON Decoding and Building The Result
+    total: Whole Single Address Lookup, Including Cache Hits and Retries
+
+Counters: requests (Label: HTTP Status), errors (Label: Exception Class), retries, cache (Label: hit/miss),
+lookups (Label: ok/error). Gauge: in_flight.
+
+GeoCoordinatesMetrics: Thread Safe In-Process Metrics Registry (snapshot, prometheus_text, serve_prometheus)
+GeoCoordinatesStatsD: Exporter Forwarding Every Measurement To a StatsD Daemon Over UDP
+instrument_session: Make a Session Report The connect and tls Phases Of New Connections
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import bisect
+import random
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Upper Bounds Of The Latency Buckets In Seconds (An Implicit +Inf Bucket Follows)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# connect and tls Times Of The Connections Opened By The Current Thread's Request
+_connection_timings = threading.local()
+
+
+def reset_connection_timings() -> None:
+    _connection_timings.connect = 0.0
+    _connection_timings.tls = 0.0
+
+
+def connection_timings() -> tuple:
+    """
+    purpose: Return The connect and tls Seconds Spent By The Current Thread Since The Last Reset
+    """
+    return getattr(_connection_timings, 'connect', 0.0), getattr(_connection_timings, 'tls', 0.0)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            _connection_timings.connect = getattr(_connection_timings, 'connect', 0.0) + time.perf_counter() - start
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._new_conn_seconds = time.perf_counter() - start
+            _connection_timings.connect = getattr(_connection_timings, 'connect', 0.0) + self._new_conn_seconds
+
+    def connect(self) -> None:
+        # connect() Opens The Socket Through _new_conn, Then Does The TLS Handshake
+        self._new_conn_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connection_timings.tls = (getattr(_connection_timings, 'tls', 0.0) + time.perf_counter() - start -
+                                       self._new_conn_seconds)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def instrument_session(session) -> None:
+    """
+    purpose: Make The Connection Pools Of a Session Time The DNS/TCP Connect and TLS Handshake Of New Connections
+    Pools Already Created Keep Their Connections Untimed. Calling It Twice Is Harmless.
+    @param session: requests.Session
+    """
+    for adapter in set(session.adapters.values()):
+        poolmanager = getattr(adapter, 'poolmanager', None)
+        if poolmanager is not None:
+            poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                  'https': _TimedHTTPSConnectionPool}
+
+
+class _Histogram:
+
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.count = 0
+        self.total = 0.0
+
+
+class GeoCoordinatesMetrics:
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, exporters=()) -> None:
+        """
+        Class Initializer
+        @param buckets: Upper Bounds Of The Latency Histogram Buckets In Seconds, Ascending
+        @param exporters: Push Exporters (e.g. GeoCoordinatesStatsD) Receiving Every Measurement As It Is Made
+        """
+        self.buckets = tuple(buckets)
+        self.exporters = list(exporters)
+        self._histograms = {}
+        self._counters = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def observe(self, provider: str, phase: str, seconds: float) -> None:
+        """
+        purpose: Record The Latency Of a Phase
+        @param provider: Provider Name
+        @param phase: Phase Name (See The Module Docstring)
+        @param seconds: Duration In Seconds
+        """
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get((provider, phase))
+            if histogram is None:
+                histogram = self._histograms[(provider, phase)] = _Histogram(len(self.buckets) + 1)
+            histogram.counts[index] += 1
+            histogram.count += 1
+            histogram.total += seconds
+        for exporter in self.exporters:
+            exporter.timing(provider, phase, seconds)
+
+    def increment(self, name: str, provider: str, label: str = '', value: int = 1) -> None:
+        """
+        purpose: Add To a Counter
+        @param name: Counter Name (requests, errors, retries, cache, lookups)
+        @param provider: Provider Name
+        @param label: Counter Label (HTTP Status, Exception Class, hit/miss, ok/error)
+        @param value: Amount To Add
+        """
+        key = (name, provider, label)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        for exporter in self.exporters:
+            exporter.increment(name, provider, label, value)
+
+    def add_in_flight(self, provider: str, delta: int) -> None:
+        """
+        purpose: Move The Gauge Of Requests Currently Being Sent To a Provider
+        """
+        with self._lock:
+            value = self._in_flight[provider] = self._in_flight.get(provider, 0) + delta
+        for exporter in self.exporters:
+            exporter.gauge(provider, value)
+
+    def reset(self) -> None:
+        """
+        purpose: Drop All Histograms and Counters (The In-Flight Gauges Are Kept)
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        """
+        purpose: Return a Copy Of All Metrics
+        @return: Dict
+            {
+                'latency': {provider: {phase: {'count', 'sum', 'p50', 'p99', 'buckets': {Upper Bound: Count}}}},
+                'counters': {name: {provider: {label: value}}},
+                'in_flight': {provider: value}
+            }
+            Bucket Counts Are Cumulative (Prometheus Style); p50/p99 Are The Upper Bounds Of Their Buckets.
+        """
+        with self._lock:
+            histograms = [(key, list(histogram.counts), histogram.count, histogram.total)
+                          for key, histogram in self._histograms.items()]
+            counters = dict(self._counters)
+            in_flight = dict(self._in_flight)
+
+        latency = {}
+        bounds = self.buckets + (float('inf'),)
+        for (provider, phase), counts, count, total in histograms:
+            cumulative, running = {}, 0
+            for bound, bucket_count in zip(bounds, counts):
+                running += bucket_count
+                cumulative[bound] = running
+            latency.setdefault(provider, {})[phase] = {
+                'count': count,
+                'sum': total,
+                'p50': self._quantile(cumulative, count, 0.5),
+                'p99': self._quantile(cumulative, count, 0.99),
+                'buckets': cumulative
+            }
+
+        counter_tree = {}
+        for (name, provider, label), value in counters.items():
+            counter_tree.setdefault(name, {}).setdefault(provider, {})[label] = value
+        return {'latency': latency, 'counters': counter_tree, 'in_flight': in_flight}
+
+    @staticmethod
+    def _quantile(cumulative: dict, count: int, quantile: float) -> float:
+        for bound, running in cumulative.items():
+            if running >= count * quantile:
+                return bound
+        return float('inf')
+
+    def prometheus_text(self, prefix: str = 'geocoordinates') -> str:
+        """
+        purpose: Render All Metrics In The Prometheus Text Exposition Format
+        @param prefix: Metric Name Prefix
+        @return: str
+        """
+        snapshot = self.snapshot()
+        lines = ['# HELP {}_latency_seconds Latency Of Each Request Phase'.format(prefix),
+                 '# TYPE {}_latency_seconds histogram'.format(prefix)]
+        for provider, phases in sorted(snapshot['latency'].items()):
+            for phase, histogram in sorted(phases.items()):
+                labels = 'provider="{}",phase="{}"'.format(_escape(provider), _escape(phase))
+                for bound, running in histogram['buckets'].items():
+                    lines.append('{}_latency_seconds_bucket{{{},le="{}"}} {}'.format(
+                        prefix, labels, '+Inf' if bound == float('inf') else repr(bound), running))
+                lines.append('{}_latency_seconds_sum{{{}}} {!r}'.format(prefix, labels, histogram['sum']))
+                lines.append('{}_latency_seconds_count{{{}}} {}'.format(prefix, labels, histogram['count']))
+
+        for name, providers in sorted(snapshot['counters'].items()):
+            lines.append('# TYPE {}_{}_total counter'.format(prefix, name))
+            for provider, labels in sorted(providers.items()):
+                for label, value in sorted(labels.items()):
+                    lines.append('{}_{}_total{{provider="{}",label="{}"}} {}'.format(
+                        prefix, name, _escape(provider), _escape(label), value))
+
+        lines.append('# TYPE {}_in_flight gauge'.format(prefix))
+        for provider, value in sorted(snapshot['in_flight'].items()):
+            lines.append('{}_in_flight{{provider="{}"}} {}'.format(prefix, _escape(provider), value))
+        return '\n'.join(lines) + '\n'
+
+    def serve_prometheus(self, port: int = 9464, host: str = '127.0.0.1', prefix: str = 'geocoordinates'):
+        """
+        purpose: Serve prometheus_text On http://host:port/metrics From a Background Thread
+        @return: The HTTP Server (Call shutdown() To Stop It)
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                body = metrics.prometheus_text(prefix).encode('utf-8')
+                self.send_response(200 if self.path.split('?')[0] == '/metrics' else 404)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _escape(value: str) -> str:
+    return '{}'.format(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class GeoCoordinatesStatsD:
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8125, prefix: str = 'geocoordinates',
+                 sample_rate: float = 1.0) -> None:
+        """
+        Class Initializer
+        @param host: StatsD Host
+        @param port: StatsD UDP Port
+        @param prefix: Metric Name Prefix
+        @param sample_rate: Share Of Timings and Counter Increments Sent (Gauges Are Always Sent)
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self.sample_rate = sample_rate
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def _send(self, line: str, sampled: bool = True) -> None:
+        if sampled and self.sample_rate < 1.0:
+            if random.random() >= self.sample_rate:
+                return
+            line += '|@{}'.format(self.sample_rate)
+        try:
+            self._socket.sendto(line.encode('utf-8'), self.address)
+        except OSError:
+            # Metrics Must Never Break a Lookup
+            pass
+
+    def timing(self, provider: str, phase: str, seconds: float) -> None:
+        self._send('{}.{}.latency.{}:{:.3f}|ms'.format(self.prefix, provider, phase, seconds * 1000))
+
+    def increment(self, name: str, provider: str, label: str, value: int) -> None:
+        name = '{}.{}.{}'.format(self.prefix, provider, name)
+        if label:
+            name += '.' + '{}'.format(label).replace('.', '_').replace(':', '_')
+        self._send('{}:{}|c'.format(name, value))
+
+    def gauge(self, provider: str, value: int) -> None:
+        self._send('{}.{}.in_flight:{}|g'.format(self.prefix, provider, value), sampled=False)
+
+    def close(self) -> None:
+        self._socket.close()
@@ -0,0 +1,319 @@
+"""
+Purpose:
+This Module Contains a Local Stand-In For The Google, Here and ArcGIS HTTP APIs, So The Provider Classes Can Be
+Tested and Benchmarked Offline. It Serves Synthetic Responses Shaped Like The Real Ones (or Recorded Responses),
+With Configurable Latency, Error Rates and 429/503 Injection.
+
+GeoCoordinatesMockServer: Mock HTTP Server (In a Background Thread or a Separate Process) With attach(provider)
+synthetic_response: Build The Synthetic Response Body For a Request Path and Query
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import hashlib
+import itertools
+import json
+import multiprocessing
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+GOOGLE_GEOCODE_PATH = '/maps/api/geocode/json'
+GOOGLE_ELEVATION_PATH = '/maps/api/elevation/json'
+HERE_GEOCODE_PATH = '/v1/geocode'
+ARCGIS_GEOCODE_PATH = '/arcgis/rest/services/World/GeocodeServer/findAddressCandidates'
+
+
+def _position(text: str) -> tuple:
+    """
+    purpose: Return a Stable Latitude and Longitude For Any Text, So Repeated Requests Get The Same Answer
+    """
+    digest = hashlib.md5(text.encode('utf-8')).digest()
+    latitude = int.from_bytes(digest[:4], 'big') / 0xffffffff * 140.0 - 60.0
+    longitude = int.from_bytes(digest[4:8], 'big') / 0xffffffff * 360.0 - 180.0
+    return round(latitude, 7), round(longitude, 7)
+
+
+def _decode_polyline(encoded: str) -> list:
+    """
+    purpose: Decode a Google Encoded Polyline Into (Latitude, Longitude) Pairs
+    """
+    points, values, value, shift = [], [], 0, 0
+    for char in encoded:
+        byte = ord(char) - 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    latitude = longitude = 0
+    for d_latitude, d_longitude in zip(values[0::2], values[1::2]):
+        latitude += d_latitude
+        longitude += d_longitude
+        points.append((latitude / 1e5, longitude / 1e5))
+    return points
+
+
+def _google_geocode(address: str) -> dict:
+    latitude, longitude = _position(address)
+    return {
+        'results': [{
+            'address_components': [
+                {'long_name': part, 'short_name': part[:3], 'types': ['locality', 'political']}
+                for part in (address.split(',') + ['Mock County', 'Mock State', 'Mock Country'])[:5]
+            ],
+            'formatted_address': address,
+            'geometry': {
+                'location': {'lat': latitude, 'lng': longitude},
+                'location_type': 'ROOFTOP',
+                'viewport': {
+                    'northeast': {'lat': latitude + 0.001, 'lng': longitude + 0.001},
+                    'southwest': {'lat': latitude - 0.001, 'lng': longitude - 0.001}
+                }
+            },
+            'place_id': hashlib.md5(address.encode('utf-8')).hexdigest(),
+            'plus_code': {'compound_code': 'MOCK+00', 'global_code': 'MOCKMOCK+00'},
+            'types': ['street_address']
+        }],
+        'status': 'OK'
+    }
+
+
+def _google_elevation(locations: str) -> dict:
+    if locations.startswith('enc:'):
+        points = _decode_polyline(locations[4:])
+    else:
+        points = [tuple(float(value) for value in point.split(',')) for point in locations.split('|')]
+    return {
+        'results': [{
+            'elevation': round((abs(latitude) * 37.0 + abs(longitude) * 11.0) % 3000.0, 3),
+            'location': {'lat': latitude, 'lng': longitude},
+            'resolution': 9.5
+        } for latitude, longitude in points],
+        'status': 'OK'
+    }
+
+
+def _here_geocode(address: str) -> dict:
+    latitude, longitude = _position(address)
+    return {
+        'items': [{
+            'title': address,
+            'id': 'here:mock:' + hashlib.md5(address.encode('utf-8')).hexdigest(),
+            'resultType': 'houseNumber',
+            'houseNumberType': 'PA',
+            'address': {'label': address, 'countryCode': 'MCK', 'countryName': 'Mock Country', 'city': 'Mock City',
+                        'street': 'Mock Street', 'postalCode': '00000', 'houseNumber': '1'},
+            'position': {'lat': latitude, 'lng': longitude},
+            'access': [{'lat': latitude, 'lng': longitude}],
+            'mapView': {'west': longitude - 0.001, 'south': latitude - 0.001, 'east': longitude + 0.001,
+                        'north': latitude + 0.001},
+            'scoring': {'queryScore': 0.98, 'fieldScore': {'city': 1.0, 'streets': [0.9], 'houseNumber': 1.0}}
+        }]
+    }
+
+
+def _arcgis_geocode(address: str) -> dict:
+    latitude, longitude = _position(address)
+    return {
+        'spatialReference': {'wkid': 4326, 'latestWkid': 4326},
+        'candidates': [{
+            'address': address,
+            'location': {'x': longitude, 'y': latitude},
+            'score': 100,
+            'attributes': {'Addr_type': 'PointAddress', 'Score': 100},
+            'extent': {'xmin': longitude - 0.001, 'ymin': latitude - 0.001, 'xmax': longitude + 0.001,
+                       'ymax': latitude + 0.001}
+        }]
+    }
+
+
+def synthetic_response(path: str, query: dict) -> dict:
+    """
+    purpose: Build a Synthetic Response Body Shaped Like The Real API's
+    @param path: Request Path (e.g. '/v1/geocode')
+    @param query: Parsed Query String (parse_qs Format)
+    @return: Response Body As a Dict, or None For an Unknown Path
+    """
+    def param(name: str) -> str:
+        return query.get(name, [''])[0]
+
+    if path == GOOGLE_GEOCODE_PATH:
+        return _google_geocode(param('address'))
+    if path == GOOGLE_ELEVATION_PATH:
+        return _google_elevation(param('locations'))
+    if path == HERE_GEOCODE_PATH:
+        return _here_geocode(param('q'))
+    if path == ARCGIS_GEOCODE_PATH:
+        return _arcgis_geocode(param('singleLine'))
+    return None
+
+
+def _load_recorded(path: str) -> dict:
+    """
+    purpose: Read Recorded Responses From a JSONL File of {"path": ..., "status": ..., "body": ...} Lines
+    @return: Dict Of Path -> Cycle Of (Status, Body Bytes)
+    """
+    recorded = {}
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                entry = json.loads(line)
+                recorded.setdefault(entry['path'], []).append(
+                    (entry.get('status', 200), json.dumps(entry['body']).encode('utf-8')))
+    return {path_: itertools.cycle(entries) for path_, entries in recorded.items()}
+
+
+def _make_handler(config: dict):
+    recorded = _load_recorded(config['recorded']) if config.get('recorded') else {}
+    recorded_lock = threading.Lock()
+    rng = random.Random(config.get('seed'))
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-Alive, So The Client's Connection Pool Is Exercised
+        protocol_version = 'HTTP/1.1'
+        # Headers and Body Are Written Separately; Without This Nagle Adds ~40 ms Per Keep-Alive Response
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            latency = config['latency']
+            with rng_lock:
+                if config['latency_jitter']:
+                    latency += rng.uniform(0, config['latency_jitter'])
+                draw = rng.random()
+            if latency:
+                time.sleep(latency)
+
+            # Injected Failures: 429 First, Then 503, Then 500 (With a Google Style status In The Body)
+            if draw < config['rate_limit_rate']:
+                return self._reply(429, b'{"status": "OVER_QUERY_LIMIT", "error": "Too Many Requests"}',
+                                   {'Retry-After': '0'})
+            draw -= config['rate_limit_rate']
+            if draw < config['unavailable_rate']:
+                return self._reply(503, b'{"status": "UNKNOWN_ERROR", "error": "Service Unavailable"}')
+            draw -= config['unavailable_rate']
+            if draw < config['error_rate']:
+                return self._reply(500, b'{"status": "UNKNOWN_ERROR", "error": "Internal Server Error"}')
+
+            parts = urlsplit(self.path)
+            if parts.path in recorded:
+                with recorded_lock:
+                    status, body = next(recorded[parts.path])
+                return self._reply(status, body)
+
+            body = synthetic_response(parts.path, parse_qs(parts.query))
+            if body is None:
+                return self._reply(404, b'{"error": "Not Found"}')
+            return self._reply(200, json.dumps(body).encode('utf-8'))
+
+        def _reply(self, status: int, body: bytes, headers: dict = None) -> None:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    # Bulk Runs Open Many Connections At Once
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def _create_server(config: dict) -> ThreadingHTTPServer:
+    return _Server((config['host'], config['port']), _make_handler(config))
+
+
+def _serve_process(config: dict, ports) -> None:
+    server = _create_server(config)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+class GeoCoordinatesMockServer:
+
+    def __init__(self, latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, unavailable_rate: float = 0.0, recorded: str = None,
+                 host: str = '127.0.0.1', port: int = 0, separate_process: bool = False, seed: int = None) -> None:
+        """
+        Class Initializer
+        @param latency: Seconds Every Response Is Delayed
+        @param latency_jitter: Extra Random Delay, Uniform Between 0 and latency_jitter Seconds
+        @param error_rate: Share Of Requests Answered With HTTP 500
+        @param rate_limit_rate: Share Of Requests Answered With HTTP 429 (With Retry-After: 0)
+        @param unavailable_rate: Share Of Requests Answered With HTTP 503
+        @param recorded: JSONL File Of Recorded Responses ({"path", "status", "body"} Per Line), Served In Turn
+            For Their Path Instead Of The Synthetic Ones
+        @param host: Interface To Listen On
+        @param port: Port To Listen On (0 Picks a Free Port)
+        @param separate_process: Run The Server In Its Own Process, So Its CPU Time Is Not Counted As The Client's
+        @param seed: Seed Of The Random Latency and Failure Draws
+        """
+        self.config = {
+            'latency': latency, 'latency_jitter': latency_jitter, 'error_rate': error_rate,
+            'rate_limit_rate': rate_limit_rate, 'unavailable_rate': unavailable_rate, 'recorded': recorded,
+            'host': host, 'port': port, 'seed': seed
+        }
+        self.separate_process = separate_process
+        self.port = None
+        self._server = None
+        self._process = None
+
+    @property
+    def url(self) -> str:
+        return 'http://{}:{}'.format(self.config['host'], self.port)
+
+    def start(self):
+        """
+        purpose: Start Serving In The Background
+        @return: self
+        """
+        if self.separate_process:
+            ports = multiprocessing.Queue()
+            self._process = multiprocessing.Process(target=_serve_process, args=(self.config, ports), daemon=True)
+            self._process.start()
+            self.port = ports.get(timeout=30)
+        else:
+            self._server = _create_server(self.config)
+            self.port = self._server.server_address[1]
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def attach(self, provider):
+        """
+        purpose: Point a Provider Instance (or The Provider Of an Async Client) At This Server
+        Only The HTTP Methods Are Redirected; The ArcGIS Login Methods Still Go Through The ArcGIS Library.
+        @param provider: GeoCoordinatesGoogle, GeoCoordinatesHere or GeoCoordinatesArcGIS Instance
+        @return: The Provider
+        """
+        for name in ('geocode_url', 'elevation_url'):
+            url = getattr(provider, name, None)
+            if url is not None:
+                setattr(provider, name, self.url + urlsplit(url).path)
+        return provider
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,166 @@
+"""
+Purpose:
+This Module Contains The Process Pool Engine Behind geocode_many(..., processes=N). The Input Is Cut Into
+Chunks That Are Geocoded By Worker Processes, Each With Its Own Copy Of The Provider (Own Connection Pool, Own
+Share Of The Rate Limit), So Normalizing Addresses and Parsing Responses Use Every Core.
+
+Workers Write Each Chunk's Results To a Temp File (Binary Columns or JSON Lines) and Only Send Back Its Path;
+The Parent Reads The Files In Input Order and Deletes Them, So Large Result Lists Are Never Pickled.
+
+imap_processes: Geocode an Iterable Of Addresses On Worker Processes and Yield The Results In Input Order
+geocode_processes: Same, Collected Into a List or a GeoCoordinatesColumns
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from GeoCoordinatesColumns import GeoCoordinatesColumns
+from GeoCoordinatesRateLimiter import GeoCoordinatesRateLimiter
+
+# The Provider Copy Of The Current Worker Process (Set By _init_worker)
+_worker_provider = None
+
+
+# Chunk Size When The Input Length Is Unknown (Or Large)
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _init_worker(pickled_provider: bytes, rate: float, burst: float) -> None:
+    """
+    purpose: Unpickle The Provider For The Worker's Chunks and Give It Its Share Of The Rate Limit
+    The Provider Is Pickled Explicitly, So Forked Workers Do Not Inherit The Parent's Pooled Connections.
+    """
+    global _worker_provider
+    provider = pickle.loads(pickled_provider)
+    if rate:
+        provider.rate_limiter = GeoCoordinatesRateLimiter(rate, burst)
+    _worker_provider = provider
+
+
+def _geocode_chunk(location_addresses: list, workers: int, as_columns: bool, temp_dir: str) -> str:
+    """
+    purpose: Geocode One Chunk In a Worker Process and Write The Results To a Temp File
+    @return: Path Of The Temp File
+    """
+    results = _worker_provider.geocode_many(location_addresses, workers, as_columns=as_columns)
+    descriptor, path = tempfile.mkstemp(prefix='geocoordinates-', suffix='.bin' if as_columns else '.jsonl',
+                                        dir=temp_dir)
+    with os.fdopen(descriptor, 'wb') as file:
+        if as_columns:
+            results.save(file)
+        else:
+            for result in results:
+                file.write(json.dumps(result, default=str).encode('utf-8'))
+                file.write(b'\n')
+    return path
+
+
+def _chunks(location_addresses, chunk_size: int):
+    iterator = iter(location_addresses)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _chunk_files(provider, location_addresses, processes: int, workers: int, rate: float, burst: float,
+                 chunk_size: int, as_columns: bool, temp_dir: str, mp_context: str):
+    """
+    purpose: Run The Chunks On The Process Pool and Yield Their Temp File Paths In Input Order
+    At Most 2 x processes Chunks Are Queued or Running, So The Input Is Read Lazily.
+    The Caller Deletes Each Yielded File; Files Of Chunks Never Yielded Are Deleted Here.
+    """
+    if rate is None and provider.rate_limiter is not None:
+        rate, burst = provider.rate_limiter.rate, provider.rate_limiter.burst
+    rate_share = rate / processes if rate else None
+    burst_share = max(1.0, (burst or rate or 1.0) / processes)
+    if chunk_size is None:
+        # Spread a Sized Input Over Every Worker, Otherwise Idle Workers Leave Their Rate Share Unused
+        chunk_size = DEFAULT_CHUNK_SIZE
+        if hasattr(location_addresses, '__len__'):
+            chunk_size = max(1, min(chunk_size, math.ceil(len(location_addresses) / processes)))
+    context = multiprocessing.get_context(mp_context)
+
+    pending = deque()
+    initargs = (pickle.dumps(provider), rate_share, burst_share)
+    with ProcessPoolExecutor(processes, context, _init_worker, initargs) as executor:
+        try:
+            for chunk in _chunks(location_addresses, chunk_size):
+                pending.append(executor.submit(_geocode_chunk, chunk, workers, as_columns, temp_dir))
+                if len(pending) >= processes * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                if not future.cancel() and future.exception() is None:
+                    _remove(future.result())
+
+
+def imap_processes(provider, location_addresses, processes: int = None, workers: int = 8, rate: float = None,
+                   burst: float = None, chunk_size: int = None, temp_dir: str = None, mp_context: str = None):
+    """
+    purpose: Geocode Addresses On Worker Processes, Yielding The Result Dicts In Input Order
+    @param provider: Provider Instance (Pickled Into Every Worker, See GeoCoordinatesBase.__getstate__)
+    @param location_addresses: Iterable of Addresses/Locations (Read Lazily)
+    @param processes: Number of Worker Processes (Default: Number of CPUs)
+    @param workers: Concurrent Requests Per Worker Process (Keep At or Below The Provider's pool_maxsize)
+    @param rate: Requests Per Second Allowed Across All Workers (Default: The Provider's rate_limiter, If Any)
+    @param burst: Burst Across All Workers (Default: The Provider's rate_limiter Burst, or rate)
+    @param chunk_size: Addresses Per Chunk Sent To a Worker (Default: An Even Split Of a Sized Input Over The
+        Workers, At Most DEFAULT_CHUNK_SIZE)
+    @param temp_dir: Directory For The Result Files (Default: The System Temp Directory)
+    @param mp_context: multiprocessing Start Method ('spawn', 'fork', 'forkserver'; Default: The Platform's)
+    @return: Generator of Dicts (status, message, result)
+    """
+    processes = processes or os.cpu_count() or 1
+    for path in _chunk_files(provider, location_addresses, processes, workers, rate, burst, chunk_size, False,
+                             temp_dir, mp_context):
+        try:
+            with open(path, 'rb') as file:
+                for line in file:
+                    yield json.loads(line)
+        finally:
+            _remove(path)
+
+
+def geocode_processes(provider, location_addresses, processes: int = None, workers: int = 8, rate: float = None,
+                      burst: float = None, chunk_size: int = None, as_columns: bool = False, temp_dir: str = None,
+                      mp_context: str = None):
+    """
+    purpose: Geocode Addresses On Worker Processes (Same Parameters As imap_processes)
+    @param as_columns: Return a GeoCoordinatesColumns; The Workers Then Write Binary Columns, Which Are Merged
+        With Array Copies Instead Of Per Row Dicts (Only The Coordinates, Status and Message Are Kept)
+    @return: List of Dicts (or GeoCoordinatesColumns) In The Same Order As location_addresses
+    """
+    if not as_columns:
+        return list(imap_processes(provider, location_addresses, processes, workers, rate, burst, chunk_size,
+                                   temp_dir, mp_context))
+
+    processes = processes or os.cpu_count() or 1
+    columns = GeoCoordinatesColumns()
+    for path in _chunk_files(provider, location_addresses, processes, workers, rate, burst, chunk_size, True,
+                             temp_dir, mp_context):
+        try:
+            with open(path, 'rb') as file:
+                columns.extend_columns(GeoCoordinatesColumns.load(file))
+        finally:
+            _remove(path)
+    return columns
@@ -0,0 +1,80 @@
+"""
+Purpose:
+This Class Contains a Client Side Token Bucket Rate Limiter Used To Stay Within Each Provider's QPS Quota.
+
+GeoCoordinatesRateLimiter: Token Bucket With a Configurable Rate and Burst (Sync, Threaded and asyncio Callers)
+shared_rate_limiter: Return The Limiter Shared By All Instances Using The Same Provider and Key In This Process
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import asyncio
+import threading
+import time
+
+_shared_limiters = {}
+_shared_limiters_lock = threading.Lock()
+
+
+class GeoCoordinatesRateLimiter:
+
+    def __init__(self, rate: float, burst: int = None) -> None:
+        """
+        Class Initializer
+        @param rate: Requests Per Second Allowed On Average
+        @param burst: Maximum Number of Requests Allowed At Once (Default: One Second Worth of Requests)
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int = 1) -> float:
+        """
+        purpose: Take Tokens From The Bucket, Going Into Debt If Needed
+        @return: Seconds The Caller Must Wait Before Sending (0 If Tokens Were Available)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: int = 1) -> None:
+        """
+        purpose: Block The Calling Thread Until The Request May Be Sent
+        @param tokens: Number of Requests To Account For
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 1) -> None:
+        """
+        purpose: Suspend The Calling Coroutine Until The Request May Be Sent
+        @param tokens: Number of Requests To Account For
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def shared_rate_limiter(provider_name: str, key: str, rate: float, burst: int = None) -> GeoCoordinatesRateLimiter:
+    """
+    purpose: Return The Rate Limiter For a Provider and API Key/Username, Creating It On First Use
+    @param provider_name: Name of the Provider, e.g. 'google'
+    @param key: API Key or Username The Quota Belongs To
+    @param rate: Requests Per Second (Only Used When The Limiter Is Created)
+    @param burst: Maximum Burst (Only Used When The Limiter Is Created)
+    @return: GeoCoordinatesRateLimiter
+    """
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get((provider_name, key))
+        if limiter is None:
+            limiter = GeoCoordinatesRateLimiter(rate, burst)
+            _shared_limiters[(provider_name, key)] = limiter
+        return limiter
@@ -0,0 +1,173 @@
+"""
+Purpose:
+This Class Contains The Retry Policy Used By The Provider Classes For Transient Errors
+(HTTP 429/5xx, Google OVER_QUERY_LIMIT/UNKNOWN_ERROR and Connection Errors).
+
+GeoCoordinatesRetryPolicy: Exponential Backoff With Jitter, Retry-After Support and Retry Counters
+parse_retry_after: Convert a Retry-After Header Into Seconds
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from GeoCoordinatesLogging import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_retry_after(value) -> float:
+    """
+    purpose: Convert a Retry-After Header (Seconds or HTTP Date) Into Seconds
+    @param value: Header Value or None
+    @return: Seconds To Wait or None If The Header Is Missing or Invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class GeoCoordinatesRetryPolicy:
+
+    def __init__(self, max_attempts: int = 4, backoff_base: float = 0.5, backoff_cap: float = 30.0,
+                 jitter: bool = True, retry_statuses: tuple = (429, 500, 502, 503, 504),
+                 retry_on_connection_error: bool = True, respect_retry_after: bool = True) -> None:
+        """
+        Class Initializer
+        @param max_attempts: Maximum Number of Attempts Per Request (Including The First One)
+        @param backoff_base: Delay Before The First Retry In Seconds, Doubled For Every Further Retry
+        @param backoff_cap: Maximum Delay Between Two Attempts In Seconds
+        @param jitter: Pick a Random Delay Between 0 and The Backoff ("Full Jitter") To Spread Out Retries
+        @param retry_statuses: HTTP Status Codes That Are Retried
+        @param retry_on_connection_error: Retry Connection Errors and Timeouts
+        @param respect_retry_after: Wait At Least As Long As The Server's Retry-After Header Asks
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_on_connection_error = retry_on_connection_error
+        self.respect_retry_after = respect_retry_after
+        self.calls = 0
+        self.retries = 0
+        self.gave_up = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """
+        purpose: Pickle The Settings (e.g. For a Worker Process); The Copy's Counters Start At Zero
+        """
+        state = self.__dict__.copy()
+        del state['_lock']
+        state.update(calls=0, retries=0, gave_up=0)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_delay(self, attempt: int, retry_after: float = None) -> float:
+        """
+        purpose: Return The Delay Before The Next Attempt
+        @param attempt: Number of The Attempt That Just Failed, Starting At 0
+        @param retry_after: Seconds Requested By The Server (Optional)
+        @return: Seconds To Wait
+        """
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if self.respect_retry_after and retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _record(self, attempts: int, gave_up: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            self.retries += attempts - 1
+            if gave_up:
+                self.gave_up += 1
+
+    def _next_delay(self, attempt: int, result, error, is_retryable, retry_exceptions: tuple):
+        """
+        purpose: Decide Whether an Attempt Is Final
+        @return: Delay Before The Next Attempt, or None If The Result (or Error) Should Be Returned
+        """
+        if error is not None:
+            if not (self.retry_on_connection_error and isinstance(error, retry_exceptions)):
+                return None
+            return self.get_delay(attempt)
+
+        retry, retry_after = is_retryable(result)
+        return self.get_delay(attempt, retry_after) if retry else None
+
+    def _log_retry(self, attempt: int, error, delay: float) -> None:
+        logger.info('Attempt %d of %d Failed (%s), Retrying In %.3f Seconds', attempt + 1, self.max_attempts,
+                    error if error is not None else 'Retryable Response', delay)
+
+    def call(self, send, is_retryable, retry_exceptions: tuple = ()):
+        """
+        purpose: Call send() Until It Returns a Non Retryable Result or The Attempts Run Out
+        @param send: Function Sending The Request
+        @param is_retryable: Function Taking The Result and Returning (Retry?, Retry-After Seconds or None)
+        @param retry_exceptions: Exception Types Treated As Connection Errors
+        @return: The Last Result (The Last Exception Is Raised If Every Attempt Failed With One)
+        """
+        for attempt in range(self.max_attempts):
+            result, error = None, None
+            try:
+                result = send()
+            except Exception as e:
+                error = e
+
+            delay = self._next_delay(attempt, result, error, is_retryable, retry_exceptions)
+            if delay is None or attempt + 1 >= self.max_attempts:
+                self._record(attempt + 1, gave_up=delay is not None)
+                if error is not None:
+                    raise error
+                return result
+            self._log_retry(attempt, error, delay)
+            time.sleep(delay)
+
+    async def call_async(self, send, is_retryable, retry_exceptions: tuple = ()):
+        """
+        purpose: Async Version of call(), send Is a Coroutine Function
+        """
+        for attempt in range(self.max_attempts):
+            result, error = None, None
+            try:
+                result = await send()
+            except Exception as e:
+                error = e
+
+            delay = self._next_delay(attempt, result, error, is_retryable, retry_exceptions)
+            if delay is None or attempt + 1 >= self.max_attempts:
+                self._record(attempt + 1, gave_up=delay is not None)
+                if error is not None:
+                    raise error
+                return result
+            self._log_retry(attempt, error, delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        """
+        purpose: Return The Retry Counters
+        @return: Dict
+            {
+                'calls': Requests Sent Through The Policy,
+                'retries': Extra Attempts Made,
+                'gave_up': Requests Still Failing After max_attempts
+            }
+        """
+        with self._lock:
+            return {'calls': self.calls, 'retries': self.retries, 'gave_up': self.gave_up}
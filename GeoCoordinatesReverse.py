@@ -0,0 +1,348 @@
+"""
+Purpose:
+This Class Reverse Geocodes Latitude and Longitude Pairs Offline, Against a Local Gazetteer (CSV/JSONL Of Place
+Names and Coordinates), So Mapping a Point Back To The Nearest Known Place Needs No Provider Call.
+
+Places Are Indexed On a Grid Of 3D Unit Vectors (No Special Cases At The Poles or The Antimeridian). The Index Can
+Be Saved To a Binary File and Loaded Memory-Mapped, So Loading Does Not Parse or Copy The Gazetteer.
+
+GeoCoordinatesReverse: Nearest Place, Places Within a Radius and Batch Queries (Vectorized With SciPy If Installed)
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import math
+import mmap
+import struct
+from array import array
+from itertools import count
+
+from GeoCoordinatesStream import read_records
+
+EARTH_RADIUS_KM = 6371.0088
+# Cell Coordinates Are Packed Into One Integer Key, 21 Bits Per Axis
+_KEY_BITS = 21
+_KEY_OFFSET = 1 << (_KEY_BITS - 1)
+_KEY_MASK = (1 << _KEY_BITS) - 1
+_HEADER = struct.Struct('<8sQQd')
+_MAGIC = b'GCREV001'
+
+
+def _to_xyz(latitude: float, longitude: float) -> tuple:
+    """
+    purpose: Convert Latitude and Longitude In Degrees To a Point On The Unit Sphere
+    """
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    cos_phi = math.cos(phi)
+    return cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi)
+
+
+def _chord(distance_km: float) -> float:
+    """
+    purpose: Convert a Great Circle Distance To The Straight Line Distance Between Unit Vectors
+    """
+    return 2.0 * math.sin(min(math.pi, distance_km / EARTH_RADIUS_KM) / 2.0)
+
+
+def _distance_km(chord: float) -> float:
+    return 2.0 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2.0))
+
+
+def _pack(ix: int, iy: int, iz: int) -> int:
+    return ((ix + _KEY_OFFSET) << (2 * _KEY_BITS)) | ((iy + _KEY_OFFSET) << _KEY_BITS) | (iz + _KEY_OFFSET)
+
+
+def _unpack(key: int) -> tuple:
+    return ((key >> (2 * _KEY_BITS)) & _KEY_MASK) - _KEY_OFFSET, ((key >> _KEY_BITS) & _KEY_MASK) - _KEY_OFFSET, \
+        (key & _KEY_MASK) - _KEY_OFFSET
+
+
+class GeoCoordinatesReverse:
+
+    def __init__(self, names: list, latitudes, longitudes, cell_size_km: float = 25.0) -> None:
+        """
+        Class Initializer (See from_csv and load For The Usual Ways To Create an Index)
+        @param names: Place Names
+        @param latitudes: Latitudes Of The Places, Same Order As names
+        @param longitudes: Longitudes Of The Places, Same Order As names
+        @param cell_size_km: Grid Cell Size (Roughly The Typical Distance Between Neighbouring Places Works Best)
+        """
+        if cell_size_km < 0.01:
+            raise ValueError('cell_size_km Must Be At Least 0.01')
+        self.cell_size = _chord(cell_size_km)
+        self._mmap = None
+
+        points = []
+        for name, latitude, longitude in zip(names, latitudes, longitudes):
+            latitude, longitude = float(latitude), float(longitude)
+            x, y, z = _to_xyz(latitude, longitude)
+            points.append((self._cell_key(x, y, z), name, latitude, longitude, x, y, z))
+        # Places Of a Cell Are Stored Next To Each Other
+        points.sort(key=lambda point: point[0])
+
+        self._latitude = array('d', (point[2] for point in points))
+        self._longitude = array('d', (point[3] for point in points))
+        self._x = array('d', (point[4] for point in points))
+        self._y = array('d', (point[5] for point in points))
+        self._z = array('d', (point[6] for point in points))
+
+        names_blob = bytearray()
+        self._name_offsets = array('q', [0])
+        for point in points:
+            names_blob += str(point[1]).encode('utf-8')
+            self._name_offsets.append(len(names_blob))
+        self._names = bytes(names_blob)
+
+        self._cell_keys = array('q')
+        self._cell_starts = array('q')
+        for index, point in enumerate(points):
+            if not self._cell_keys or self._cell_keys[-1] != point[0]:
+                self._cell_keys.append(point[0])
+                self._cell_starts.append(index)
+        self._cell_starts.append(len(points))
+        self._build_cells()
+
+    @classmethod
+    def from_csv(cls, path: str, name_field: str = 'name', latitude_field: str = 'latitude',
+                 longitude_field: str = 'longitude', cell_size_km: float = 25.0, file_format: str = None):
+        """
+        purpose: Build The Index From a Gazetteer File
+        @param path: CSV (With a Header Row) or JSONL File With a Record Per Place
+        @param name_field: Column/Key Holding The Place Name
+        @param latitude_field: Column/Key Holding The Latitude
+        @param longitude_field: Column/Key Holding The Longitude
+        @param cell_size_km: Grid Cell Size
+        @param file_format: 'csv' or 'jsonl' (Default: Guessed From The File Extension)
+        @return: GeoCoordinatesReverse
+        """
+        names, latitudes, longitudes = [], array('d'), array('d')
+        for record in read_records(path, file_format):
+            names.append(record[name_field])
+            latitudes.append(float(record[latitude_field]))
+            longitudes.append(float(record[longitude_field]))
+        return cls(names, latitudes, longitudes, cell_size_km)
+
+    def save(self, path: str) -> None:
+        """
+        purpose: Write The Index To a Binary File That load() Maps Into Memory
+        """
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, len(self), len(self._cell_keys), self.cell_size))
+            for column in (self._latitude, self._longitude, self._x, self._y, self._z, self._cell_keys,
+                           self._cell_starts, self._name_offsets):
+                file.write(column.tobytes() if isinstance(column, array) else bytes(column))
+            file.write(self._names)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        purpose: Load an Index Written By save(), Memory-Mapped (Pages Are Read From Disk Only When Used)
+        @param path: Index File
+        @return: GeoCoordinatesReverse
+        """
+        with open(path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, size, cells, cell_size = _HEADER.unpack_from(mapped)
+        if magic != _MAGIC:
+            raise ValueError('Not a Reverse Geocoding Index: {}'.format(path))
+
+        index = cls.__new__(cls)
+        index.cell_size = cell_size
+        index._mmap = mapped
+        view = memoryview(mapped)
+        offset = _HEADER.size
+
+        def column(length: int, type_code: str):
+            nonlocal offset
+            data = view[offset:offset + 8 * length].cast(type_code)
+            offset += 8 * length
+            return data
+
+        index._latitude = column(size, 'd')
+        index._longitude = column(size, 'd')
+        index._x = column(size, 'd')
+        index._y = column(size, 'd')
+        index._z = column(size, 'd')
+        index._cell_keys = column(cells, 'q')
+        index._cell_starts = column(cells + 1, 'q')
+        index._name_offsets = column(size + 1, 'q')
+        index._names = view[offset:]
+        index._build_cells()
+        return index
+
+    def _build_cells(self) -> None:
+        self._cells = {key: cell for cell, key in enumerate(self._cell_keys)}
+        self._tree = None
+
+    def _cell_key(self, x: float, y: float, z: float) -> int:
+        size = self.cell_size
+        return _pack(math.floor(x / size), math.floor(y / size), math.floor(z / size))
+
+    def __len__(self) -> int:
+        return len(self._latitude)
+
+    def place(self, index: int) -> dict:
+        """
+        purpose: Return a Place Of The Index
+        @return: Dict {'name', 'latitude', 'longitude'}
+        """
+        name = bytes(self._names[self._name_offsets[index]:self._name_offsets[index + 1]]).decode('utf-8')
+        return {'name': name, 'latitude': self._latitude[index], 'longitude': self._longitude[index]}
+
+    def _rings(self, x: float, y: float, z: float):
+        """
+        purpose: Yield The Occupied Cells Around a Point, Ring By Ring
+        @return: Generator Yielding (r, Cell Numbers) Where Every Place Not Yet Yielded Is Further Than r x cell_size
+        """
+        size = self.cell_size
+        cx, cy, cz = math.floor(x / size), math.floor(y / size), math.floor(z / size)
+        cells = self._cells
+        for r in count():
+            if (2 * r + 1) ** 3 > len(cells):
+                break
+            found = []
+            for dx in range(-r, r + 1):
+                for dy in range(-r, r + 1):
+                    on_edge = abs(dx) == r or abs(dy) == r
+                    for dz in (range(-r, r + 1) if on_edge else ((-r, r) if r else (0,))):
+                        cell = cells.get(_pack(cx + dx, cy + dy, cz + dz))
+                        if cell is not None:
+                            found.append(cell)
+            yield r, found
+
+        # Few Occupied Cells Compared To The Rings Left: Go Through Them By Distance Instead
+        rings = {}
+        for key, cell in cells.items():
+            ix, iy, iz = _unpack(key)
+            distance = max(abs(ix - cx), abs(iy - cy), abs(iz - cz))
+            if distance >= r:
+                rings.setdefault(distance, []).append(cell)
+        for distance in sorted(rings):
+            yield distance, rings[distance]
+
+    def _scan(self, cells: list, x: float, y: float, z: float):
+        """
+        purpose: Yield (Squared Chord Distance, Place Index) For Every Place In The Cells
+        """
+        xs, ys, zs, starts = self._x, self._y, self._z, self._cell_starts
+        for cell in cells:
+            for index in range(starts[cell], starts[cell + 1]):
+                dx, dy, dz = xs[index] - x, ys[index] - y, zs[index] - z
+                yield dx * dx + dy * dy + dz * dz, index
+
+    def _result(self, index: int, chord: float) -> dict:
+        result = self.place(index)
+        result['distance_km'] = _distance_km(chord)
+        return result
+
+    def nearest(self, latitude: float, longitude: float, max_distance_km: float = None) -> dict:
+        """
+        purpose: Return The Place Nearest To a Point
+        @param latitude: Latitude Of The Point
+        @param longitude: Longitude Of The Point
+        @param max_distance_km: Ignore Places Further Away (Optional)
+        @return: Dict {'name', 'latitude', 'longitude', 'distance_km'}, or None If No Place Qualifies
+        """
+        x, y, z = _to_xyz(latitude, longitude)
+        limit = _chord(max_distance_km) if max_distance_km is not None else None
+        best, best_distance = None, float('inf') if limit is None else limit * limit
+
+        for r, cells in self._rings(x, y, z):
+            for distance, index in self._scan(cells, x, y, z):
+                if distance <= best_distance:
+                    best, best_distance = index, distance
+            # Everything Not Scanned Yet Is At Least This Far Away
+            bound = r * self.cell_size
+            if bound * bound >= best_distance:
+                break
+
+        return None if best is None else self._result(best, math.sqrt(best_distance))
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float, limit: int = None) -> list:
+        """
+        purpose: Return The Places Within a Distance Of a Point, Nearest First
+        @param latitude: Latitude Of The Point
+        @param longitude: Longitude Of The Point
+        @param radius_km: Search Radius
+        @param limit: Maximum Number Of Places Returned (Optional)
+        @return: List of Dicts {'name', 'latitude', 'longitude', 'distance_km'}
+        """
+        x, y, z = _to_xyz(latitude, longitude)
+        radius = _chord(radius_km)
+        found = []
+        for r, cells in self._rings(x, y, z):
+            found.extend(item for item in self._scan(cells, x, y, z) if item[0] <= radius * radius)
+            if r * self.cell_size >= radius:
+                break
+
+        found.sort()
+        return [self._result(index, math.sqrt(distance)) for distance, index in found[:limit]]
+
+    def nearest_many(self, points, max_distance_km: float = None) -> list:
+        """
+        purpose: Return The Nearest Place For Many Points
+        With NumPy and SciPy Installed The Points Are Queried As One Vectorized Batch Against a k-d Tree Built
+        Once Over The Index (Without Copying It), Otherwise They Are Queried One By One.
+        @param points: Iterable of (Latitude, Longitude) Pairs
+        @param max_distance_km: Ignore Places Further Away (Optional)
+        @return: List of Dicts (Same Format As nearest, None Where No Place Qualifies) In The Same Order As points
+        """
+        try:
+            import numpy
+            from scipy.spatial import cKDTree
+        except ImportError:
+            return [self.nearest(latitude, longitude, max_distance_km) for latitude, longitude in points]
+
+        if self._tree is None:
+            columns = [numpy.frombuffer(column, dtype=numpy.float64) for column in (self._x, self._y, self._z)]
+            self._tree = cKDTree(numpy.column_stack(columns))
+
+        coordinates = numpy.radians(numpy.asarray(list(points), dtype=numpy.float64).reshape(-1, 2))
+        cos_phi = numpy.cos(coordinates[:, 0])
+        queries = numpy.column_stack((cos_phi * numpy.cos(coordinates[:, 1]), cos_phi * numpy.sin(coordinates[:, 1]),
+                                      numpy.sin(coordinates[:, 0])))
+        upper_bound = _chord(max_distance_km) if max_distance_km is not None else numpy.inf
+        distances, indices = self._tree.query(queries, distance_upper_bound=upper_bound)
+
+        return [None if index >= len(self) else self._result(int(index), float(distance))
+                for distance, index in zip(distances, indices)]
+
+    def reverse_geocode(self, latitude: float, longitude: float, max_distance_km: float = None) -> dict:
+        """
+        purpose: Return The Nearest Place In The Same Format As The Provider Methods
+        @param latitude: Latitude Of The Point
+        @param longitude: Longitude Of The Point
+        @param max_distance_km: Ignore Places Further Away (Optional)
+        @return: Dict
+            status: True or False based on success,
+            message: Error message if an error occurred
+            result:
+              {
+                'name': Name Of The Nearest Place
+                'latitude': Latitude Of The Place
+                'longitude': Longitude Of The Place
+                'distance_km': Distance From The Point To The Place
+              }
+        """
+        result = self.nearest(latitude, longitude, max_distance_km)
+        if result is None:
+            return {'status': False, 'message': 'No Place Found', 'result': None}
+        return {'status': True, 'message': None, 'result': result}
+
+    def close(self) -> None:
+        """
+        purpose: Unmap The Index File If It Was Loaded With load()
+        """
+        if self._mmap is not None:
+            self._latitude = self._longitude = self._x = self._y = self._z = None
+            self._cell_keys = self._cell_starts = self._name_offsets = self._names = None
+            self._tree = None
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,195 @@
+"""
+Purpose:
+This Class Puts Several Provider Instances Behind One geocode(address) Method. Each Call Goes To The Fastest
+Healthy Provider (Weighted By Cost) and Fails Over To The Next One On Errors or Zero Results.
+
+GeoCoordinatesRouter: Multi-Provider Router With Rolling Latency/Error Statistics, Cost Weights and Quotas
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import threading
+import time
+from collections import deque
+
+from GeoCoordinatesBulk import GeoCoordinatesBulkMixin
+
+
+class _ProviderStats:
+
+    def __init__(self, window: int) -> None:
+        self.latencies = deque(maxlen=window)
+        self.errors = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.last_call = 0.0
+        self.quota_calls = 0
+        self.quota_start = time.monotonic()
+
+    def percentile(self, percentile: float) -> float:
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile))]
+
+    def error_rate(self) -> float:
+        return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+
+class GeoCoordinatesRouter(GeoCoordinatesBulkMixin):
+
+    def __init__(self, providers: list, cost_weights: dict = None, quotas: dict = None, window: int = 200,
+                 max_error_rate: float = 0.5, min_samples: int = 10, probe_interval: float = 30.0,
+                 quota_window: float = None) -> None:
+        """
+        Class Initializer
+        @param providers: Provider Instances (GeoCoordinatesGoogle, GeoCoordinatesHere, GeoCoordinatesArcGIS)
+        @param cost_weights: Provider Name -> Weight Multiplying Its Latency When Ranking (Default 1.0)
+        @param quotas: Provider Name -> Maximum Number of Requests Sent To It Per quota_window (Default: Unlimited)
+        @param window: Number of Recent Calls Per Provider The Statistics Are Computed Over
+        @param max_error_rate: Error Rate Above Which a Provider Is Unhealthy and Only Used As a Last Resort
+        @param min_samples: Calls Needed Before a Provider Can Be Marked Unhealthy
+        @param probe_interval: Seconds After Which an Unhealthy Provider Gets One Call To Check If It Recovered
+        @param quota_window: Seconds After Which The Quotas Start Again (e.g. 24 * 3600 For Daily Quotas). None Keeps
+            Counting Until reset_quotas Is Called
+        """
+        self.providers = {}
+        for provider in providers:
+            name = provider.provider_name
+            while name in self.providers:
+                name += "'"
+            self.providers[name] = provider
+
+        self.cost_weights = cost_weights or {}
+        self.quotas = quotas or {}
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval
+        self.quota_window = quota_window
+        self._stats = {name: _ProviderStats(window) for name in self.providers}
+        self._lock = threading.Lock()
+
+    def _healthy(self, stats: _ProviderStats, now: float) -> bool:
+        if len(stats.errors) < self.min_samples or stats.error_rate() <= self.max_error_rate:
+            return True
+        return now - stats.last_call > self.probe_interval
+
+    def _within_quota(self, name: str, stats: _ProviderStats, now: float) -> bool:
+        """
+        purpose: Check If The Provider Has Quota Left In The Current Window, Starting a New Window When Due (Caller
+        Holds The Lock)
+        """
+        if self.quota_window is not None and now - stats.quota_start >= self.quota_window:
+            stats.quota_calls = 0
+            stats.quota_start = now
+        quota = self.quotas.get(name)
+        return quota is None or stats.quota_calls < quota
+
+    def reset_quotas(self) -> None:
+        """
+        purpose: Start a New Quota Window For Every Provider (e.g. When The Providers' Daily Quotas Reset)
+        """
+        now = time.monotonic()
+        with self._lock:
+            for stats in self._stats.values():
+                stats.quota_calls = 0
+                stats.quota_start = now
+
+    def _ranked(self) -> list:
+        """
+        purpose: Return The Provider Names To Try, Best First (Healthy Before Unhealthy, Then By Weighted p50 Latency)
+        Providers That Have Used Up Their Quota For The Current Window Are Left Out.
+        """
+        now = time.monotonic()
+        with self._lock:
+            ranking = []
+            for name, stats in self._stats.items():
+                if not self._within_quota(name, stats, now):
+                    continue
+                score = stats.percentile(0.5) * self.cost_weights.get(name, 1.0)
+                ranking.append((not self._healthy(stats, now), score, name))
+        return [name for _, _, name in sorted(ranking)]
+
+    def _reserve(self, name: str) -> bool:
+        """
+        purpose: Count a Call Against The Provider's Quota, Unless The Quota Is Used Up
+        """
+        with self._lock:
+            stats = self._stats[name]
+            if not self._within_quota(name, stats, time.monotonic()):
+                return False
+            stats.calls += 1
+            stats.quota_calls += 1
+            return True
+
+    def _record(self, name: str, latency: float, failed: bool) -> None:
+        with self._lock:
+            stats = self._stats[name]
+            stats.latencies.append(latency)
+            stats.errors.append(1 if failed else 0)
+            stats.failures += 1 if failed else 0
+            stats.last_call = time.monotonic()
+
+    def geocode(self, location_address: str) -> dict:
+        """
+        purpose: Retrieve Latitude and Longitude to a Given Address/Location From The Best Available Provider
+        @param location_address: Latitude and Longitude needed Address/Location
+        @return: Dict
+            status: True or False based on success,
+            message: Error message if an error occurred (The Last Provider's Error If All Failed)
+            result:
+              {
+                'latitude': Latitude of the Address Provided
+                'longitude': Longitude of the Address Provided
+              }
+            provider: Name Of The Provider That Answered (None If No Provider Was Available)
+        """
+        response = self._get_error_msg('No Provider Available. All Quotas Are Used Up')
+        answered_by = None
+        for name in self._ranked():
+            if not self._reserve(name):
+                continue
+            answered_by = name
+            start = time.monotonic()
+            try:
+                response = self.providers[name].geocode(location_address)
+            except Exception as e:
+                response = self._get_error_msg('Unknown Error Occurred, Error: {}'.format(e))
+            if not response:
+                response = self._get_error_msg('No Response')
+
+            self._record(name, time.monotonic() - start, not response['status'])
+            if response['status']:
+                break
+
+        response = dict(response)
+        response['provider'] = answered_by
+        return response
+
+    def stats(self) -> dict:
+        """
+        purpose: Return The Rolling Statistics Of Every Provider
+        @return: Dict Of Provider Name ->
+            {
+                'p50': Median Latency In Seconds,
+                'p99': 99th Percentile Latency In Seconds,
+                'error_rate': Share Of Failed Calls In The Window,
+                'calls': Total Calls,
+                'quota_calls': Calls Counted Against The Quota In The Current Window,
+                'failures': Total Failed Calls,
+                'healthy': False While The Provider Is Only Used As a Last Resort
+            }
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    'p50': stats.percentile(0.5),
+                    'p99': stats.percentile(0.99),
+                    'error_rate': stats.error_rate(),
+                    'calls': stats.calls,
+                    'quota_calls': stats.quota_calls,
+                    'failures': stats.failures,
+                    'healthy': self._healthy(stats, now)
+                } for name, stats in self._stats.items()
+            }
@@ -0,0 +1,124 @@
+"""
+Purpose:
+This Class Coalesces Identical Lookups That Are In Flight At The Same Time, So Concurrent Callers Asking For The
+Same Address From The Same Provider Share One Upstream Request.
+
+GeoCoordinatesSingleFlight: In-Flight De-Duplication For Threaded (do) and asyncio (do_async) Callers
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Flight:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class GeoCoordinatesSingleFlight:
+
+    def __init__(self) -> None:
+        """
+        Class Initializer
+        """
+        self.calls = 0
+        self.shared = 0
+        self._calls = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """
+        purpose: Pickle For a Worker Process: The Copy Has No Calls In Flight
+        """
+        return {}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__()
+
+    def do(self, key: str, function):
+        """
+        purpose: Run function() Unless a Call With The Same Key Is Already Running, In Which Case Wait For Its Result
+        @param key: Lookup Key (e.g. GeoCoordinatesCache.make_key(provider_name, address))
+        @param function: Function Doing The Lookup
+        @return: The Result Of The Call That Ran (Exceptions Are Raised In Every Waiting Caller)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key: str, function):
+        """
+        purpose: Async Version of do(), function Is a Coroutine Function (One Event Loop Per Instance)
+        The Lookup Runs As Its Own Task and Every Caller Awaits It Through asyncio.shield, So Cancelling One Caller
+        (e.g. a Hedge Cancelling Its Primary) Does Not Cancel The Others. The Task Is Only Cancelled Once No
+        Caller Is Left Waiting For It.
+        """
+        flight = self._futures.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(function()))
+            self._futures[key] = flight
+            flight.task.add_done_callback(lambda task: self._forget(key, flight))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight) -> None:
+        if self._futures.get(key) is flight:
+            del self._futures[key]
+
+    def stats(self) -> dict:
+        """
+        purpose: Return The Coalescing Counters
+        @return: Dict
+            {
+                'calls': Upstream Lookups Made,
+                'shared': Lookups Answered By Another Caller's In-Flight Request
+            }
+        """
+        return {'calls': self.calls, 'shared': self.shared}
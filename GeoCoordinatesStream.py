@@ -0,0 +1,129 @@
+"""
+Purpose:
+This Module Contains a Streaming Geocode Pipeline: Records Are Read, Geocoded and Written One At a Time,
+So Memory Stays Bounded By The Number of Requests In Flight Instead Of The Size Of The Input.
+
+read_records: Read Records From a CSV or JSONL File
+merge_result: Add The Fields Of a Provider Response To a Record
+geocode_stream: Geocode Records From Any Iterable Through a Provider Instance
+write_records: Write Geocoded Records To a CSV or JSONL File As They Arrive
+run_pipeline: Read, Geocode and Write a File In One Call
+
+Sponsor: DataDisca Pty Ltd. Australia
+https://github.com/DataDisca
+"""
+import csv
+import json
+import os
+
+from GeoCoordinatesBulk import imap_ordered
+
+
+def _file_format(path: str, file_format: str = None) -> str:
+    """
+    purpose: Return 'csv' or 'jsonl', Guessed From The File Extension If Not Given
+    """
+    if file_format is None:
+        file_format = 'jsonl' if os.path.splitext(path)[1].lower() in ('.jsonl', '.json', '.ndjson') else 'csv'
+    if file_format not in ('csv', 'jsonl'):
+        raise ValueError('Unsupported File Format: {}'.format(file_format))
+    return file_format
+
+
+def read_records(path: str, file_format: str = None):
+    """
+    purpose: Read Records From a CSV (With a Header Row) or JSONL File, One At a Time
+    @param path: Input File
+    @param file_format: 'csv' or 'jsonl' (Default: Guessed From The File Extension)
+    @return: Generator Yielding a Dict Per Record
+    """
+    file_format = _file_format(path, file_format)
+    with open(path, 'r', newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            for record in csv.DictReader(file):
+                yield record
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def merge_result(record, response: dict, address_field: str = 'address') -> dict:
+    """
+    purpose: Return a Copy Of The Record With status, message, latitude and longitude From The Provider Response
+    @param record: Input Dict, or an Address String
+    @param response: Provider Response Dict (status, message, result)
+    @param address_field: Key Holding The Address When record Is a String
+    @return: Dict
+    """
+    record = dict(record) if isinstance(record, dict) else {address_field: record}
+    result = response['result'] or {}
+    record['status'] = response['status']
+    record['message'] = response['message']
+    record['latitude'] = result.get('latitude')
+    record['longitude'] = result.get('longitude')
+    return record
+
+
+def geocode_stream(provider, records, address_field: str = 'address', workers: int = 8, max_pending: int = None):
+    """
+    purpose: Geocode Records Through Any Provider Instance, Yielding Each Record As Soon As It Is Done
+    @param provider: GeoCoordinatesGoogle, GeoCoordinatesHere or GeoCoordinatesArcGIS Instance
+    @param records: Iterable of Dicts (e.g. read_records) or of Address Strings
+    @param address_field: Key Holding The Address In Each Record
+    @param workers: Number of Concurrent Requests
+    @param max_pending: Maximum Number of Records Read Ahead Of The Writer (Backpressure, Default: 4 x workers)
+    @return: Generator Yielding The Input Records, In Order, With status, message, latitude and longitude Added
+    """
+    def geocode_record(record):
+        location_address = record[address_field] if isinstance(record, dict) else record
+        response = provider._geocode_row(location_address) or provider._get_error_msg('No Response')
+        return merge_result(record, response, address_field)
+
+    return imap_ordered(geocode_record, records, workers, max_pending)
+
+
+def write_records(records, path: str, file_format: str = None, flush_every: int = 1000) -> int:
+    """
+    purpose: Write Records To a CSV or JSONL File As They Arrive
+    @param records: Iterable of Dicts (e.g. geocode_stream)
+    @param path: Output File
+    @param file_format: 'csv' or 'jsonl' (Default: Guessed From The File Extension)
+    @param flush_every: Number of Records Between Two Flushes To Disk
+    @return: Number of Records Written
+    """
+    file_format = _file_format(path, file_format)
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = None
+        for record in records:
+            if file_format == 'csv':
+                if writer is None:
+                    writer = csv.DictWriter(file, fieldnames=list(record), extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow(record)
+            else:
+                file.write(json.dumps(record) + '\n')
+            count += 1
+            if count % flush_every == 0:
+                file.flush()
+    return count
+
+
+def run_pipeline(provider, input_path: str, output_path: str, address_field: str = 'address', workers: int = 8,
+                 max_pending: int = None, input_format: str = None, output_format: str = None) -> int:
+    """
+    purpose: Geocode Every Record Of a CSV/JSONL File Into Another CSV/JSONL File With Bounded Memory
+    @param provider: GeoCoordinatesGoogle, GeoCoordinatesHere or GeoCoordinatesArcGIS Instance
+    @param input_path: Input File (CSV With a Header Row or JSONL)
+    @param output_path: Output File
+    @param address_field: Column/Key Holding The Address
+    @param workers: Number of Concurrent Requests
+    @param max_pending: Maximum Number of Records Read Ahead Of The Writer (Default: 4 x workers)
+    @param input_format: 'csv' or 'jsonl' (Default: Guessed From The File Extension)
+    @param output_format: 'csv' or 'jsonl' (Default: Guessed From The File Extension)
+    @return: Number of Records Written
+    """
+    records = read_records(input_path, input_format)
+    results = geocode_stream(provider, records, address_field, workers, max_pending)
+    return write_records(results, output_path, output_format)
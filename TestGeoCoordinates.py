@@ -12,12 +12,61 @@ import pytest
 from GeoCoordinatesGoogle import GeoCoordinatesGoogle
 from GeoCoordinatesHere import GeoCoordinatesHere
 from GeoCoordinatesArcGIS import GeoCoordinatesArcGIS
+from GeoCoordinatesCache import GeoCoordinatesCache, normalize_address
+from GeoCoordinatesElevationCache import GeoCoordinatesElevationCache, geohash
+from GeoCoordinatesBulk import imap_ordered, GeoCoordinatesBulkMixin
+from GeoCoordinatesColumns import GeoCoordinatesColumns
+from GeoCoordinatesProcessPool import geocode_processes
+from GeoCoordinatesAsync import GeoCoordinatesHereAsync
+from GeoCoordinatesRateLimiter import GeoCoordinatesRateLimiter
+from GeoCoordinatesRetry import GeoCoordinatesRetryPolicy
+from GeoCoordinatesCircuitBreaker import GeoCoordinatesCircuitBreaker, CircuitOpenError
+from GeoCoordinatesStream import run_pipeline, read_records
+from GeoCoordinatesJob import GeoCoordinatesJob, JobStoppedError, is_systemic_error
+from GeoCoordinatesSingleFlight import GeoCoordinatesSingleFlight
+from GeoCoordinatesRouter import GeoCoordinatesRouter
+from GeoCoordinatesHedge import GeoCoordinatesHedge, GeoCoordinatesHedgeAsync
+from GeoCoordinatesReverse import GeoCoordinatesReverse
+from GeoCoordinatesMock import GeoCoordinatesMockServer, synthetic_response
+from GeoCoordinatesMetrics import GeoCoordinatesMetrics
+from GeoCoordinatesLogging import (configure_logging, stop_logging, get_logger, GeoCoordinatesLogSampler,
+                                   GeoCoordinatesQueueHandler)
 
 
-class TestGeoCoordinates:
+# Log To a File While The Tests Run
+@pytest.fixture(autouse=True, scope='module')
+def log_to_file():
+    configure_logging('./log/test_log.txt', level=logging.INFO)
+    yield
+    stop_logging()
+
+
+def stub_arcgis(monkeypatch, batch_geocode=None):
+    """
+    purpose: Replace The ArcGIS Library Calls Made By GeoCoordinatesArcGIS, So The Login Paths Run Offline
+    Addresses Are Named 'a<N>' and Geocode To x = y = N.
+    @return: List Of The Logins Made (One Entry Per GIS Created)
+    """
+    logins = []
+
+    def gis(url, username, password):
+        logins.append(username)
+        return object()
+
+    def geocode(location_address, geocoder=None, **options):
+        return [{'location': {'x': int(location_address[1:]), 'y': int(location_address[1:])}, 'score': 100}]
 
-    # Set Log Level
-    logging.basicConfig(filename='./log/test_log.txt', level=logging.INFO)
+    def batch(addresses, geocoder=None):
+        return [geocode(address)[0] for address in addresses]
+
+    monkeypatch.setattr('GeoCoordinatesArcGIS.GIS', gis)
+    monkeypatch.setattr('GeoCoordinatesArcGIS.get_geocoders', lambda gis_: [object()])
+    monkeypatch.setattr('GeoCoordinatesArcGIS.geocode', geocode)
+    monkeypatch.setattr('GeoCoordinatesArcGIS.batch_geocode', batch_geocode or batch)
+    return logins
+
+
+class TestGeoCoordinates:
 
     # Open Credentials
     with open("./credentials/google_cred.json", 'r') as file:
@@ -70,6 +119,19 @@ class TestGeoCoordinates:
         else:
             assert False
 
+    @pytest.mark.parametrize("locations, expect", [
+        ([(43.6150186, -116.2023137), (6.9270786, 79.861243)], [822.3980712890625, 11.43205261230469])
+    ])
+    def test_get_bulk_altitude_from_google(self, locations, expect):
+        response = self.obj_google.get_bulk_altitude_from_google(locations)
+
+        assert len(response) == len(expect)
+        for res, location, exp_alt in zip(response, locations, expect):
+            assert res['status']
+            assert res['result']['latitude'] == pytest.approx(location[0], 0.001) \
+                   and res['result']['longitude'] == pytest.approx(location[1], 0.001) \
+                   and res['result']['altitude'] == pytest.approx(exp_alt, 0.01)
+
     @pytest.mark.parametrize("address_, expect", [
         ("Boise,+US", {'longitude': -116.2023137, 'latitude': 43.6150186,
                        'altitude': 822.3980712890625}),
@@ -94,6 +156,16 @@ class TestGeoCoordinates:
         else:
             assert False
 
+    @pytest.mark.parametrize("addresses_, expect", [
+        (["Boise,+US", "Colombo,+Sri+Lanka"], [822.3980712890625, 11.43205261230469])
+    ])
+    def test_get_bulk_address_altitude_from_google(self, addresses_, expect):
+        response = self.obj_google.get_bulk_address_altitude_from_google(addresses_)
+
+        assert len(response) == len(expect)
+        for res, exp_alt in zip(response, expect):
+            assert res['status'] and res['result']['altitude'] == pytest.approx(exp_alt, 0.01)
+
     # Here
     @pytest.mark.parametrize("address_, expect", [
         ("Boise,+US", {'longitude': -116.19341, 'latitude': 43.60765}),
@@ -161,3 +233,650 @@ class TestGeoCoordinates:
                 assert resp_lat == pytest.approx(exp_lat, 0.001) and resp_lng == pytest.approx(exp_lng, 0.001)
         else:
             assert False
+
+    @pytest.mark.parametrize("addresses_, expect", [
+        (["Boise,+US", "Colombo,+Sri+Lanka"], [[43.60765, -116.19341], [6.93243, 79.84588]])
+    ])
+    def test_geocode_many(self, addresses_, expect):
+        response = self.obj_here.geocode_many(addresses_, workers=2)
+        assert len(response) == len(expect)
+        for res, exp in zip(response, expect):
+            assert res['status']
+            assert res['result']['latitude'] == pytest.approx(exp[0], 0.001) \
+                   and res['result']['longitude'] == pytest.approx(exp[1], 0.001)
+
+    @pytest.mark.parametrize("addresses_, expect", [
+        (["Boise,+US", "Colombo,+Sri+Lanka"], [[43.60765, -116.19341], [6.93243, 79.84588]])
+    ])
+    def test_geocode_many_async(self, addresses_, expect):
+        import asyncio
+
+        async def run():
+            async with GeoCoordinatesHereAsync(self.here_cred['API_KEY'], max_in_flight=2) as obj_here_async:
+                return await obj_here_async.geocode_many(addresses_)
+
+        response = asyncio.run(run())
+        assert len(response) == len(expect)
+        for res, exp in zip(response, expect):
+            assert res['status']
+            assert res['result']['latitude'] == pytest.approx(exp[0], 0.001) \
+                   and res['result']['longitude'] == pytest.approx(exp[1], 0.001)
+
+    def test_bulk_mixin_requires_geocode(self):
+        class NoGeocode(GeoCoordinatesBulkMixin):
+            pass
+
+        # The Missing Method Is Reported When The Class Is Instantiated, Not In The Middle Of a Bulk Run
+        with pytest.raises(TypeError, match='geocode'):
+            NoGeocode()
+
+    def test_imap_ordered(self):
+        import time
+
+        def slow_square(x):
+            time.sleep(0.01 * (x % 3))
+            return x * x
+
+        assert list(imap_ordered(slow_square, iter(range(50)), workers=4, max_pending=6)) == \
+               [x * x for x in range(50)]
+
+    @pytest.mark.parametrize("detail_, expect_keys", [
+        ('coords', {'latitude', 'longitude'}),
+        ('scored', {'latitude', 'longitude', 'score', 'fields'}),
+        ('raw', {'latitude', 'longitude', 'all_results'})
+    ])
+    def test_detail(self, detail_, expect_keys):
+        content = json.dumps({'items': [{'title': 'Boise', 'position': {'lat': 43.6, 'lng': -116.2},
+                                         'scoring': {'queryScore': 0.97}}]}).encode()
+        here = GeoCoordinatesHere(self.here_cred['API_KEY'], detail=detail_, fields=['title'])
+        result = here._parse_geocode(200, content)['result']
+
+        assert set(result) == expect_keys
+        if detail_ == 'scored':
+            assert result['score'] == 0.97 and result['fields'] == {'title': 'Boise'}
+
+    def test_columns(self):
+        responses = [
+            {'status': True, 'message': None, 'result': {'latitude': 43.6, 'longitude': -116.2}},
+            {'status': False, 'message': 'Zero Results', 'result': None},
+            {'status': False, 'message': 'Zero Results', 'result': None}
+        ]
+        columns = GeoCoordinatesColumns.from_responses(responses)
+
+        assert list(columns) == responses
+        assert columns.messages == [None, 'Zero Results'] and columns.raw is None
+
+        numpy = pytest.importorskip('numpy')
+        arrays = columns.to_numpy()
+        assert arrays['status'].tolist() == [1, 0, 0] and numpy.isnan(arrays['latitude'][1])
+
+    def test_process_pool(self, tmp_path):
+        addresses = ['Boise,+US', 'Colombo,+Sri+Lanka', 'Moscow,+Russia'] * 4
+        with GeoCoordinatesMockServer() as server:
+            obj_here = server.attach(GeoCoordinatesHere('mock-key'))
+            expect = obj_here.geocode_many(addresses, workers=4)
+
+            responses = obj_here.geocode_many(addresses, workers=2, processes=2)
+            columns = geocode_processes(obj_here, addresses, processes=2, workers=2, chunk_size=5,
+                                        as_columns=True, temp_dir=str(tmp_path))
+
+        assert responses == expect and list(columns) == expect
+        # The Workers' Temp Files Are Deleted Once Merged
+        assert list(tmp_path.iterdir()) == []
+
+    def test_arcgis_login_reuse(self, monkeypatch):
+        import time
+
+        logins = stub_arcgis(monkeypatch)
+        obj_arc = GeoCoordinatesArcGIS('user', 'password', detail='coords', gis_session_ttl=0.2)
+
+        # One Login Serves Every Call, Also From Concurrent Threads
+        addresses = ['a{}'.format(i) for i in range(20)]
+        responses = list(imap_ordered(obj_arc.get_geo_coordinates_from_arcgis_with_login, addresses, workers=8))
+        assert all(response['status'] for response in responses) and len(logins) == 1
+
+        # A New Login Once The TTL Has Expired
+        time.sleep(0.25)
+        assert obj_arc.get_geo_coordinates_from_arcgis_with_login('a1')['status'] and len(logins) == 2
+
+        # An Unknown Error Drops The Login, So The Next Call Logs In Again
+        import GeoCoordinatesArcGIS as arcgis_module
+        geocode = arcgis_module.geocode
+        errors = [RuntimeError('Invalid Token')]
+
+        def failing_once(location_address, geocoder=None, **options):
+            if errors:
+                raise errors.pop()
+            return geocode(location_address, geocoder, **options)
+
+        monkeypatch.setattr(arcgis_module, 'geocode', failing_once)
+        assert not obj_arc.get_geo_coordinates_from_arcgis_with_login('a1')['status'] and len(logins) == 2
+        assert obj_arc.get_geo_coordinates_from_arcgis_with_login('a1')['status'] and len(logins) == 3
+
+    def test_arcgis_batch_chunks(self, monkeypatch):
+        attempts = {}
+
+        def batch_geocode(addresses, geocoder=None):
+            # Chunks Are Named By Their First Address: a3 Fails Once, a6 Fails Every Time
+            first = addresses[0]
+            attempts[first] = attempts.get(first, 0) + 1
+            if first == 'a6' or (first == 'a3' and attempts[first] == 1):
+                raise ConnectionError('Batch Failed')
+            return [{'location': {'x': int(address[1:]), 'y': int(address[1:])}, 'score': 100}
+                    for address in addresses]
+
+        stub_arcgis(monkeypatch, batch_geocode)
+        retry_policy = GeoCoordinatesRetryPolicy(max_attempts=2, backoff_base=0.001)
+        obj_arc = GeoCoordinatesArcGIS('user', 'password', detail='coords', retry_policy=retry_policy)
+        addresses = ['a{}'.format(i) for i in range(10)]
+
+        response = obj_arc.get_batch_geo_coordinates_from_arcgis_with_login(addresses, batch_size=3, workers=3)
+        # Results Stay In Input Order Across Chunks; The Rows Of The Chunk That Kept Failing Are Left Empty
+        assert [row['latitude'] for row in response['result']['lat_lng_list']] == [0, 1, 2, 3, 4, 5, None, None,
+                                                                                   None, 9]
+        assert attempts == {'a0': 1, 'a3': 2, 'a6': 2, 'a9': 1}
+        assert response['status'] and response['message'].startswith('1 of 4 Chunks Failed')
+
+        columns = obj_arc.get_batch_geo_columns_from_arcgis_with_login(addresses, batch_size=3, workers=3)
+        assert [row['status'] for row in columns] == [True] * 6 + [False] * 3 + [True]
+        assert columns[6]['message'] == 'Unknown Error Occurred, Error: Batch Failed'
+        assert columns[9]['result'] == {'latitude': 9, 'longitude': 9}
+
+    def test_arcgis_batch_errors(self, monkeypatch):
+        attempts = {}
+
+        def batch_geocode(addresses, geocoder=None):
+            # The Token Has Expired When a0 Is First Sent, a3 Is Rejected Every Time
+            first = addresses[0]
+            attempts[first] = attempts.get(first, 0) + 1
+            if first == 'a0' and attempts[first] == 1:
+                raise Exception('Invalid token.\n(Error Code: 498)')
+            if first == 'a3':
+                raise Exception('Unable to complete operation.\n(Error Code: 400)')
+            return [{'location': {'x': int(address[1:]), 'y': int(address[1:])}, 'score': 100}
+                    for address in addresses]
+
+        logins = stub_arcgis(monkeypatch, batch_geocode)
+        retry_policy = GeoCoordinatesRetryPolicy(max_attempts=3, backoff_base=0.001)
+        obj_arc = GeoCoordinatesArcGIS('user', 'password', detail='coords', retry_policy=retry_policy)
+
+        response = obj_arc.get_batch_geo_coordinates_from_arcgis_with_login(['a{}'.format(i) for i in range(6)],
+                                                                            batch_size=3)
+        # The Expired Login Is Dropped Before The Retry, The Rejected Chunk Is Not Retried
+        assert attempts == {'a0': 2, 'a3': 1} and len(logins) == 2
+        assert [row['latitude'] for row in response['result']['lat_lng_list']] == [0, 1, 2, None, None, None]
+
+    def test_arcgis_login_retried(self, monkeypatch):
+        import GeoCoordinatesArcGIS as arcgis_module
+
+        stub_arcgis(monkeypatch)
+        geocode = arcgis_module.geocode
+        errors = [ConnectionError('Connection Reset'), Exception('Service Unavailable.\n(Error Code: 503)')]
+
+        def flaky(location_address, geocoder=None, **options):
+            if errors:
+                raise errors.pop()
+            return geocode(location_address, geocoder, **options)
+
+        monkeypatch.setattr(arcgis_module, 'geocode', flaky)
+        retry_policy = GeoCoordinatesRetryPolicy(max_attempts=3, backoff_base=0.001)
+        obj_arc = GeoCoordinatesArcGIS('user', 'password', detail='coords', retry_policy=retry_policy)
+        assert obj_arc.get_geo_coordinates_from_arcgis_with_login('a4')['result'] == {'latitude': 4, 'longitude': 4}
+        assert retry_policy.stats() == {'calls': 1, 'retries': 2, 'gave_up': 0}
+
+    def test_arcgis_login_rate_limited(self, monkeypatch):
+        stub_arcgis(monkeypatch)
+
+        class CountingRateLimiter(GeoCoordinatesRateLimiter):
+            acquired = 0
+
+            def acquire(self, tokens=1):
+                self.acquired += tokens
+                super().acquire(tokens)
+
+        limiter = CountingRateLimiter(rate=1000)
+        obj_arc = GeoCoordinatesArcGIS('user', 'password', rate_limiter=limiter)
+        response = obj_arc.get_batch_geo_coordinates_from_arcgis_with_login(['a{}'.format(i) for i in range(10)],
+                                                                            batch_size=3)
+        # One Token Per batch_geocode Request (4 Chunks), Then One For The Single Lookup
+        assert response['status'] and limiter.acquired == 4
+        assert obj_arc.get_geo_coordinates_from_arcgis_with_login('a7')['result']['latitude'] == 7
+        assert limiter.acquired == 5
+
+    def test_rate_limiter(self):
+        import time
+
+        limiter = GeoCoordinatesRateLimiter(rate=100, burst=5)
+        start = time.monotonic()
+        for _ in range(25):
+            limiter.acquire()
+        # 5 Requests Go Out As a Burst, The Other 20 At 100 Per Second
+        assert time.monotonic() - start == pytest.approx(0.2, abs=0.05)
+
+    @pytest.mark.parametrize("statuses_, expect_status, expect_stats", [
+        ([503, 429, 200], 200, {'calls': 1, 'retries': 2, 'gave_up': 0}),
+        ([503, 503, 503], 503, {'calls': 1, 'retries': 2, 'gave_up': 1}),
+        ([400], 400, {'calls': 1, 'retries': 0, 'gave_up': 0})
+    ])
+    def test_retry_policy(self, statuses_, expect_status, expect_stats):
+        policy = GeoCoordinatesRetryPolicy(max_attempts=3, backoff_base=0.001)
+        statuses = iter(statuses_)
+
+        status = policy.call(lambda: next(statuses),
+                             lambda status_code: (status_code in policy.retry_statuses, None))
+        assert status == expect_status and policy.stats() == expect_stats
+
+    def test_circuit_breaker(self):
+        import time
+
+        breaker = GeoCoordinatesCircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+        for _ in range(2):
+            breaker.call('here', lambda: 503, lambda status_code: status_code in breaker.failure_statuses)
+        assert breaker.state('here') == 'open'
+        with pytest.raises(CircuitOpenError):
+            breaker.call('here', lambda: 200)
+
+        # After The Recovery Timeout One Successful Trial Call Closes The Circuit
+        time.sleep(0.06)
+        assert breaker.call('here', lambda: 200) == 200
+        assert breaker.stats()['here'] == {'state': 'closed', 'failures': 0, 'rejected': 1}
+
+    def test_mock_server(self):
+        # Every Other Request Is Answered With a 503, So The Retry Policy Has To Carry Each Lookup Through
+        with GeoCoordinatesMockServer(unavailable_rate=0.5, seed=1) as server:
+            retry_policy = GeoCoordinatesRetryPolicy(max_attempts=20, backoff_base=0.001)
+            obj_here = server.attach(GeoCoordinatesHere('mock-key', retry_policy=retry_policy))
+            responses = obj_here.geocode_many(['Boise,+US', 'Colombo,+Sri+Lanka'] * 5, workers=4)
+
+            assert all(response['status'] for response in responses)
+            assert responses[0]['result'] == responses[2]['result']
+            assert retry_policy.stats()['retries'] > 0 and retry_policy.stats()['gave_up'] == 0
+
+            obj_google = server.attach(GeoCoordinatesGoogle('mock-key', retry_policy=retry_policy))
+            altitudes = obj_google.get_bulk_altitude_from_google([(6.9271, 79.8612), (43.615, -116.2023)])
+            assert [response['result']['latitude'] for response in altitudes] == [6.9271, 43.615]
+
+    def test_async_client_cache(self, tmp_path):
+        import asyncio
+        import threading
+
+        cache = GeoCoordinatesCache(str(tmp_path / 'geocode_cache.db'))
+        cache_threads = set()
+        cache_get = cache.get
+
+        def get(provider_name, location_address):
+            cache_threads.add(threading.get_ident())
+            return cache_get(provider_name, location_address)
+
+        cache.get = get
+
+        async def run(client):
+            async with client:
+                first = await client.geocode_many(['Boise,+US', 'Colombo,+Sri+Lanka'])
+                return first, await client.geocode('Boise,+US'), threading.get_ident()
+
+        with GeoCoordinatesMockServer() as server:
+            obj_here = GeoCoordinatesHereAsync('mock-key', cache=cache)
+            server.attach(obj_here.provider)
+            responses, cached, loop_thread = asyncio.run(run(obj_here))
+
+        assert all(response['status'] for response in responses) and cached == responses[0]
+        assert cache.stats()['hits'] == 1
+        # The SQLite Tier Is Only Used Off The Event Loop, and The Wrapped Provider Never Opens a Session
+        assert cache_threads and loop_thread not in cache_threads
+        assert obj_here.provider._session is None
+
+    def test_bulk_address_altitude_input_error(self):
+        def addresses():
+            yield 'Boise,+US'
+            yield 'Colombo,+Sri+Lanka'
+            raise ValueError('Bad Input Row')
+
+        with GeoCoordinatesMockServer() as server:
+            obj_google = server.attach(GeoCoordinatesGoogle('mock-key'))
+            altitudes = obj_google.get_bulk_address_altitude_from_google(['Boise,+US', 'Colombo,+Sri+Lanka'])
+            assert [response['status'] for response in altitudes] == [True, True]
+
+            # The Error Reading The Input Reaches The Caller Instead Of a List Shorter Than The Input
+            with pytest.raises(ValueError, match='Bad Input Row'):
+                obj_google.get_bulk_address_altitude_from_google(addresses())
+
+    def test_metrics(self):
+        metrics = GeoCoordinatesMetrics()
+        with GeoCoordinatesMockServer(unavailable_rate=0.5, seed=1) as server:
+            retry_policy = GeoCoordinatesRetryPolicy(max_attempts=20, backoff_base=0.001)
+            obj_here = server.attach(GeoCoordinatesHere('mock-key', retry_policy=retry_policy,
+                                                        cache=GeoCoordinatesCache(), metrics=metrics))
+            obj_here.geocode_many(['Boise,+US', 'Colombo,+Sri+Lanka'] * 3, workers=1)
+
+        snapshot = metrics.snapshot()
+        counters = snapshot['counters']
+        assert counters['lookups']['here'] == {'ok': 6}
+        assert counters['cache']['here'] == {'miss': 2, 'hit': 4}
+        assert counters['requests']['here']['503'] == counters['retries']['here']['']
+        assert counters['requests']['here']['200'] == 2 and snapshot['in_flight']['here'] == 0
+        assert {'connect', 'server', 'download', 'parse', 'total'} <= set(snapshot['latency']['here'])
+        assert 'geocoordinates_latency_seconds_count{provider="here",phase="total"} 6' in metrics.prometheus_text()
+
+    def test_logging(self, tmp_path):
+        path = tmp_path / 'logs' / 'test.log'
+        target = logging.FileHandler(str(path.parent.mkdir() or path), delay=True)
+        handler = GeoCoordinatesQueueHandler(target, queue_size=100)
+        sampler = GeoCoordinatesLogSampler(rate=0.0, max_level=logging.DEBUG)
+        handler.addFilter(sampler)
+
+        logger = get_logger('TestGeoCoordinates')
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        try:
+            for index in range(10):
+                logger.debug('Request %d', index)
+            logger.warning('Circuit Opened')
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        # The Sampled DEBUG Lines Are Dropped Before Queueing, The WARNING Is Written By The Background Thread
+        assert path.read_text().splitlines() == ['Circuit Opened']
+        assert sampler.dropped == 10 and handler.dropped == 0
+
+    @pytest.mark.parametrize("json_backend_", ['json', 'auto'])
+    def test_lean_parse(self, json_backend_):
+        google_body = synthetic_response('/maps/api/geocode/json', {'address': ['Boise,+US']})
+        here_body = synthetic_response('/v1/geocode', {'q': ['Boise,+US']})
+        lean_google = GeoCoordinatesGoogle('mock-key', json_backend=json_backend_)
+        full_google = GeoCoordinatesGoogle('mock-key', json_backend=json_backend_, lean_parse=False)
+        lean_here = GeoCoordinatesHere('mock-key', json_backend=json_backend_)
+
+        # Google Pretty Prints Its Responses
+        for content in (json.dumps(google_body).encode('utf-8'), json.dumps(google_body, indent=3).encode('utf-8')):
+            assert lean_google._parse_geocode(200, content) == full_google._parse_geocode(200, content)
+        assert lean_here._parse_geocode(200, json.dumps(here_body).encode('utf-8'))['result'] == {
+            'longitude': here_body['items'][0]['position']['lng'], 'latitude': here_body['items'][0]['position']['lat']}
+
+        # Anything Else Falls Back To The Full Decode
+        zero_results = b'{"results": [], "status": "ZERO_RESULTS"}'
+        assert lean_google._parse_geocode(200, zero_results)['message'] == 'Zero Results'
+        assert not lean_here._parse_geocode(200, b'{"items": []}')['status']
+
+    def test_run_pipeline(self, tmp_path):
+        input_path = str(tmp_path / 'addresses.csv')
+        output_path = str(tmp_path / 'results.jsonl')
+        with open(input_path, 'w') as file:
+            file.write('id,address\n1,Boise+US\n2,Colombo+Sri+Lanka\n')
+
+        with GeoCoordinatesMockServer() as server:
+            obj_here = server.attach(GeoCoordinatesHere('mock-key'))
+            assert run_pipeline(obj_here, input_path, output_path, workers=2) == 2
+            expect = obj_here.geocode('Boise+US')['result']
+
+        records = list(read_records(output_path))
+        assert [record['id'] for record in records] == ['1', '2']
+        assert all(record['status'] for record in records)
+        assert (records[0]['latitude'], records[0]['longitude']) == (expect['latitude'], expect['longitude'])
+
+    def test_reverse_geocode(self, tmp_path):
+        gazetteer_path = str(tmp_path / 'places.csv')
+        with open(gazetteer_path, 'w') as file:
+            file.write('name,latitude,longitude\nColombo,6.9271,79.8612\nKandy,7.2906,80.6337\n'
+                       'Boise,43.6150,-116.2023\nSuva,-18.1416,178.4419\n')
+
+        index = GeoCoordinatesReverse.from_csv(gazetteer_path)
+        assert index.nearest(7.2, 80.5)['name'] == 'Kandy'
+        # Across The Antimeridian
+        assert index.nearest(-18.0, -179.9)['name'] == 'Suva'
+        assert [place['name'] for place in index.within_radius(7.0, 80.0, 100)] == ['Colombo', 'Kandy']
+        assert not index.reverse_geocode(0.0, 0.0, max_distance_km=500)['status']
+
+        index.save(str(tmp_path / 'places.idx'))
+        with GeoCoordinatesReverse.load(str(tmp_path / 'places.idx')) as loaded:
+            assert loaded.nearest_many([(43.6, -116.2), (6.9, 79.9)]) == index.nearest_many([(43.6, -116.2),
+                                                                                             (6.9, 79.9)])
+
+    def test_job_resume(self, tmp_path):
+        path = str(tmp_path / 'job.db')
+        addresses = ["Boise,+US", "Colombo,+Sri+Lanka", "Kandy"]
+
+        with GeoCoordinatesMockServer() as server:
+            obj_here = server.attach(GeoCoordinatesHere('mock-key'))
+            with GeoCoordinatesJob(obj_here, path, commit_every=2) as job:
+                assert job.run(addresses[:2]) == {'skipped': 0, 'processed': 2, 'failed': 0}
+
+            # Restarting The Same Job Only Geocodes The Remaining Row
+            with GeoCoordinatesJob(obj_here, path, commit_every=2) as job:
+                assert job.run(iter(addresses)) == {'skipped': 2, 'processed': 1, 'failed': 0}
+                assert [record['address'] for record in job.results()] == addresses
+                assert job.progress() == {'completed': 3, 'failed': 0}
+
+    def test_job_retry_failed(self, tmp_path):
+        class FlakyProvider(GeoCoordinatesBulkMixin):
+            # Fails Every Row While down, and The Addresses In failing On Their Own
+            down = False
+            failing = {'Kandy'}
+
+            def geocode(self, location_address, coalesce=True):
+                if self.down:
+                    return self._get_error_msg('Too Many Requests. Please Reduce The Request Rate')
+                if location_address in self.failing:
+                    return self._get_error_msg('Connection Error')
+                return {'status': True, 'message': None, 'result': {'latitude': 6.9, 'longitude': 79.8}}
+
+        provider = FlakyProvider()
+        addresses = ["Boise,+US", "Colombo,+Sri+Lanka", "Kandy", "Galle"]
+
+        # A Chunk Where Every Row Failed Is Not Committed, So Restarting After The Outage Redoes It
+        provider.down = True
+        with GeoCoordinatesJob(provider, str(tmp_path / 'job.db'), commit_every=2) as job:
+            with pytest.raises(JobStoppedError):
+                job.run(addresses)
+            assert job.progress() == {'completed': 0, 'failed': 0}
+
+            provider.down = False
+            assert job.run(addresses) == {'skipped': 0, 'processed': 4, 'failed': 1}
+
+            # Rows That Failed On Their Own Are Committed and Geocoded Again By retry_failed
+            provider.failing = set()
+            assert job.retry_failed() == {'retried': 1, 'failed': 0}
+            assert job.progress() == {'completed': 4, 'failed': 0}
+            assert [record['address'] for record in job.results()] == addresses
+
+    def test_job_final_chunk_fails(self, tmp_path):
+        class ZeroResultsProvider(GeoCoordinatesBulkMixin):
+            def geocode(self, location_address, coalesce=True):
+                if location_address == 'nowhere':
+                    return self._get_error_msg('Zero Results')
+                return {'status': True, 'message': None, 'result': {'latitude': 6.9, 'longitude': 79.8}}
+
+        assert is_systemic_error('Unknown Error Occurred, Error: Circuit Open For host/path. Failing Fast')
+        assert not is_systemic_error('Zero Results') and not is_systemic_error(None)
+
+        # A Final Chunk Whose Only Row Has No Match Is Committed, So The Job Finishes
+        with GeoCoordinatesJob(ZeroResultsProvider(), str(tmp_path / 'job.db'), commit_every=2) as job:
+            assert job.run(['a', 'b', 'nowhere']) == {'skipped': 0, 'processed': 3, 'failed': 1}
+            assert job.progress() == {'completed': 3, 'failed': 1}
+
+    def test_single_flight(self):
+        import time
+
+        single_flight = GeoCoordinatesSingleFlight()
+        calls = []
+
+        def lookup():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'status': True, 'message': None, 'result': None}
+
+        results = list(imap_ordered(lambda _: single_flight.do('google:colombo', lookup), range(8), workers=8))
+        assert len(calls) == 1 and all(result is results[0] for result in results)
+        assert single_flight.stats() == {'calls': 1, 'shared': 7}
+
+    def test_single_flight_cancelled_leader(self):
+        import asyncio
+
+        single_flight = GeoCoordinatesSingleFlight()
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'status': True, 'message': None, 'result': None}
+
+        async def run():
+            leader = asyncio.ensure_future(single_flight.do_async('here:boise', lookup))
+            await asyncio.sleep(0.01)
+            follower = asyncio.ensure_future(single_flight.do_async('here:boise', lookup))
+            await asyncio.sleep(0.01)
+            # Cancelling The Leader (e.g. By a Hedge) Must Not Cancel The Follower Sharing Its Request
+            leader.cancel()
+            return leader, await follower
+
+        leader, response = asyncio.run(run())
+        assert leader.cancelled() and response['status'] is True
+        assert len(calls) == 1 and single_flight.stats() == {'calls': 1, 'shared': 1}
+
+    def test_router(self):
+        # Google's Server Answers Every Request With a 503, So The Router Has To Fail Over To Here
+        with GeoCoordinatesMockServer() as server, GeoCoordinatesMockServer(unavailable_rate=1.0) as down:
+            obj_google = down.attach(GeoCoordinatesGoogle('mock-key'))
+            obj_here = server.attach(GeoCoordinatesHere('mock-key'))
+            expect = obj_here.geocode('Colombo,+Sri+Lanka')['result']
+            router = GeoCoordinatesRouter([obj_google, obj_here], quotas={'google': 1})
+            responses = [router.geocode('Colombo,+Sri+Lanka') for _ in range(3)]
+
+        assert all(response['status'] and response['provider'] == 'here' for response in responses)
+        assert all(response['result'] == expect for response in responses)
+        # The First Call Tried Google (Ranked First While No Latencies Are Known), Then Its Quota Was Used Up
+        stats = router.stats()
+        assert stats['google']['calls'] == 1 and stats['google']['failures'] == 1
+        assert stats['here']['calls'] == 3 and stats['here']['failures'] == 0
+
+    def test_router_quota_window(self):
+        import time
+
+        with GeoCoordinatesMockServer() as server:
+            router = GeoCoordinatesRouter([server.attach(GeoCoordinatesHere('mock-key'))], quotas={'here': 1},
+                                          quota_window=0.2)
+            assert router.geocode('Boise,+US')['provider'] == 'here'
+            assert router.geocode('Boise,+US')['provider'] is None
+
+            # The Quota Starts Again In The Next Window, or At Once With reset_quotas
+            time.sleep(0.25)
+            assert router.geocode('Boise,+US')['provider'] == 'here'
+            router.reset_quotas()
+            assert router.geocode('Boise,+US')['status']
+
+        assert router.stats()['here']['calls'] == 3 and router.stats()['here']['quota_calls'] == 1
+
+    def test_hedge(self):
+        # Here's Server Takes 0.5 Seconds, ArcGIS's Answers At Once: The Hedge Fires After 0.05 Seconds and Wins
+        with GeoCoordinatesMockServer(latency=0.5) as slow, GeoCoordinatesMockServer() as fast:
+            obj_here = slow.attach(GeoCoordinatesHere('mock-key'))
+            obj_arc = fast.attach(GeoCoordinatesArcGIS())
+            expect = obj_arc.geocode('Boise,+US')['result']
+
+            hedge = GeoCoordinatesHedge(obj_here, obj_arc, initial_delay=0.05, min_delay=0.05)
+            response = hedge.geocode('Boise,+US')
+            assert response['status'] and response['result'] == expect
+            assert hedge.stats()['hedges_fired'] == 1 and hedge.stats()['hedges_won'] == 1
+            hedge.close()
+
+            # A Primary Answering Within The Delay Is Not Hedged
+            hedge = GeoCoordinatesHedge(obj_arc, obj_here, initial_delay=0.4, min_delay=0.4)
+            response = hedge.geocode('Boise,+US')
+            assert response['status'] and hedge.stats() == {'calls': 1, 'hedges_fired': 0, 'hedges_won': 0,
+                                                            'hedge_delay': 0.4}
+            hedge.close()
+
+    def test_hedge_async(self):
+        import asyncio
+
+        class SlowFirstClient:
+            # Stand-In For an Async Client: The First Request Is Slow, Later Ones Answer At Once
+            def __init__(self):
+                self.single_flight = GeoCoordinatesSingleFlight()
+                self.requests = 0
+
+            async def geocode(self, location_address, coalesce=True):
+                async def lookup():
+                    self.requests += 1
+                    await asyncio.sleep(0.2 if self.requests == 1 else 0)
+                    return {'status': True, 'message': None, 'result': {'latitude': 43.6, 'longitude': -116.2}}
+
+                if not coalesce:
+                    return await lookup()
+                return await self.single_flight.do_async(location_address, lookup)
+
+        class FailingClient:
+            async def geocode(self, location_address):
+                raise ConnectionError('Connection Reset')
+
+        async def run(hedge, location_address):
+            response = await hedge.geocode(location_address)
+            # Let The Cancelled Primary Finish
+            await asyncio.sleep(0.01)
+            return response
+
+        # The Hedge Sent To The Same Client Must Not Join The Primary's In-Flight Request
+        client = SlowFirstClient()
+        hedge = GeoCoordinatesHedgeAsync(client, initial_delay=0.02, min_delay=0.02)
+        response = asyncio.run(run(hedge, 'Boise,+US'))
+        assert response['status'] and client.requests == 2
+        assert hedge.stats()['hedges_won'] == 1
+        # The Cancelled Primary's Latency Is Still Recorded
+        assert len(hedge._latencies) == 1 and hedge._latencies[0] >= 0.02
+
+        # A Leg Raising an Exception Is Returned As an Error Object
+        hedge = GeoCoordinatesHedgeAsync(FailingClient(), initial_delay=0, min_delay=0)
+        response = asyncio.run(run(hedge, 'Boise,+US'))
+        assert not response['status'] and 'Connection Reset' in response['message']
+
+    # Cache
+    @pytest.mark.parametrize("address_, expect", [
+        ("Boise,+US", "boise us"),
+        ("  Colombo,  Sri+Lanka. ", "colombo sri lanka"),
+        ("NEW YORK", "new york")
+    ])
+    def test_normalize_address(self, address_, expect):
+        assert normalize_address(address_) == expect
+
+    def test_geocode_cache(self, tmp_path):
+        path = str(tmp_path / 'geocode_cache.db')
+        value = {'status': True, 'message': None, 'result': {'longitude': 79.861243, 'latitude': 6.9270786}}
+
+        cache = GeoCoordinatesCache(path, max_memory_entries=1)
+        assert cache.get('google', 'Colombo,+Sri+Lanka') is None
+        cache.set('google', 'Colombo,+Sri+Lanka', value)
+        assert cache.get('google', 'colombo sri lanka') == value
+        assert cache.get('here', 'colombo sri lanka') is None
+
+        # A New Instance Only Sees The Persistent Tier
+        assert GeoCoordinatesCache(path).get('google', 'Colombo, Sri Lanka') == value
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+    def test_geocode_cache_fields(self):
+        cache = GeoCoordinatesCache()
+        with GeoCoordinatesMockServer() as server:
+            titles = server.attach(GeoCoordinatesHere('mock-key', cache=cache, detail='scored', fields=['title']))
+            types = server.attach(GeoCoordinatesHere('mock-key', cache=cache, detail='scored', fields=['resultType']))
+            assert titles.cache_name != types.cache_name
+
+            assert list(titles.get_geo_coordinates_from_here('Boise,+US')['result']['fields']) == ['title']
+            assert list(types.get_geo_coordinates_from_here('Boise,+US')['result']['fields']) == ['resultType']
+            assert list(titles.get_geo_coordinates_from_here('Boise,+US')['result']['fields']) == ['title']
+            assert cache.stats()['hits'] == 1
+
+    def test_elevation_cache(self, tmp_path):
+        assert geohash(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+
+        path = str(tmp_path / 'elevation.db')
+        cache = GeoCoordinatesElevationCache(precision=8, interpolate=True, tolerance_m=60, path=path)
+        cache.set(6.92710, 79.8612, 10.0)
+        cache.set(6.92760, 79.8612, 20.0)
+        # Same Cell, Then Halfway Between Two Cached Samples
+        assert cache.get(6.92711, 79.86121) == 10.0
+        assert cache.get(6.92735, 79.8612) == pytest.approx(15.0)
+        assert cache.get(7.0, 80.0) is None
+        assert cache.stats()['interpolated'] == 1 and cache.stats()['misses'] == 1
+
+        # The Cells Survive a Restart
+        assert GeoCoordinatesElevationCache(path=path).get(6.92711, 79.86121) == 10.0